@@ -15,7 +15,6 @@ from datetime import timedelta
 from dotenv import load_dotenv
 import os
 import dj_database_url
-import cloudinary
 
 load_dotenv()
 
@@ -35,7 +34,7 @@ ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "").split(",")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "checklists.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -47,6 +46,13 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+CHECKLISTS = {
+    "LAST_OPENED_FLUSH_SECONDS": int(os.environ.get("LAST_OPENED_FLUSH_SECONDS", "30")),
+    "TREE_CACHE": "project_trees",
+    "SQL_REPEAT_THRESHOLD": int(os.environ.get("SQL_REPEAT_THRESHOLD", "10")),
+    "COLD_START_BUDGET_MS": int(os.environ.get("COLD_START_BUDGET_MS", "2000")),
+}
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -62,7 +68,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
 
-    "cloudinary",
+    # only contributes management commands; the SDK itself is imported with the storage, on first use
     "cloudinary_storage",
 ]
 
@@ -111,6 +117,24 @@ DATABASES = {
     )
 }
 
+# Caches
+# Rendered project trees are kept per process; LocMemCache evicts the least recently used entries once full
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "project_trees": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "project-trees",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("PROJECT_TREE_CACHE_ENTRIES", "500")),
+            "CULL_FREQUENCY": 10,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -169,28 +193,42 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR /"staticfiles"
 
 MIDDLEWARE.insert(
-    1, "whitenoise.middleware.WhiteNoiseMiddleware"
+    1, "checklists.middleware.AsyncWhiteNoiseMiddleware"
 )
 
+# per-request query count / SQL time in Server-Timing headers and N+1 warnings in the log
+if os.environ.get("SQL_INSTRUMENTATION") == "True":
+    MIDDLEWARE.insert(0, "checklists.middleware.SQLInstrumentationMiddleware")
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "checklists.middleware.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+
 SECURE_SSL_REDIRECT = True
 SECURE_HSTS_SECONDS = 3600
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
 # Creating cloudinary media storage
+# without Cloudinary credentials (local development, tests) media is stored on disk under MEDIA_ROOT instead
 
-DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
 
+if os.getenv("CLOUDINARY_CLOUD_NAME"):
+    DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
+else:
+    DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
+
+STORAGES = {
+    "default": {"BACKEND": DEFAULT_FILE_STORAGE},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# read by cloudinary_storage, which configures the SDK when the storage is first used
 CLOUDINARY_STORAGE = {
     "CLOUD_NAME": os.getenv("CLOUDINARY_CLOUD_NAME"),
     "API_KEY": os.getenv("CLOUDINARY_API_KEY"),
     "API_SECRET": os.getenv("CLOUDINARY_API_SECRET"),
 }
 
-cloudinary.config(
-    cloud_name=os.environ.get('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.environ.get('CLOUDINARY_API_KEY'),
-    api_secret=os.environ.get('CLOUDINARY_API_SECRET'),
-    secure=True
-)
-
@@ -4,4 +4,4 @@ set -o errexit
 pip install -r requirements.txt
 python manage.py collectstatic --noinput
 python manage.py migrate
-python startup.py
\ No newline at end of file
+python manage.py ensure_superuser
\ No newline at end of file
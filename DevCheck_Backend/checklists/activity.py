@@ -0,0 +1,87 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.db import connection
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .conf import checklists_setting
+from .models import Project
+
+logger = logging.getLogger(__name__)
+
+
+class LastOpenedBuffer:
+    """Write-behind buffer for the "last opened" time of projects (Project.updated_at).
+
+    Opening a project only records the time in memory. Touches are coalesced per project and written
+    back with one ``UPDATE ... CASE`` from a timer thread at most once per flush interval, so reads never
+    wait on a write. The first touch after a flush starts the timer, so buffered times reach the database
+    within one interval even if the process goes idle; a process that is killed loses at most that much.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._in_flight = {}
+        self._timer = None
+        self._last_flush = time.monotonic()
+
+    def touch(self, project_id, when=None):
+        when = when or timezone.now()
+        with self._lock:
+            self._pending[project_id] = when
+            self._schedule()
+
+    def _schedule(self):
+        # called with the lock held; the timer is only cleared once its flush has finished
+        if self._timer is not None or not self._pending:
+            return
+        delay = max(self._last_flush + checklists_setting('LAST_OPENED_FLUSH_SECONDS') - time.monotonic(), 0)
+        self._timer = threading.Timer(delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def latest(self, project_id, stored):
+        """The freshest known "last opened" time: the stored value or a buffered one, whichever is newer."""
+        with self._lock:
+            buffered = self._pending.get(project_id) or self._in_flight.get(project_id)
+        if buffered is None or (stored is not None and stored >= buffered):
+            return stored
+        return buffered
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._in_flight = batch
+        try:
+            if batch:
+                Project.objects.filter(pk__in=batch).update(updated_at=Case(
+                    *[When(pk=project_id, then=Value(when)) for project_id, when in batch.items()],
+                    output_field=DateTimeField(),
+                ))
+        except Exception:
+            logger.exception("Failed to flush %d last opened times", len(batch))
+            with self._lock:
+                for project_id, when in batch.items():
+                    self._pending.setdefault(project_id, when)
+        finally:
+            with self._lock:
+                self._in_flight = {}
+                self._last_flush = time.monotonic()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+            with self._lock:
+                self._timer = None
+                # touches that arrived during the flush, or a failed batch, wait for the next interval
+                self._schedule()
+
+
+last_opened = LastOpenedBuffer()
+atexit.register(last_opened.flush)
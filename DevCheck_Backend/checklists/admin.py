@@ -1,8 +1,12 @@
 from django.contrib import admin
 from .models import Project, Page, ChecklistSection, Task, Issue
 
+class ProjectAdmin(admin.ModelAdmin):
+    # images are stored by the upload worker (checklists.uploads), and Project.save() leaves them alone
+    readonly_fields = ("image", "image_status")
+
 # Register your models here.
-admin.site.register(Project)
+admin.site.register(Project, ProjectAdmin)
 admin.site.register(Page)
 admin.site.register(ChecklistSection)
 admin.site.register(Task)
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ChecklistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'checklists'
\ No newline at end of file
+    name = 'checklists'
+
+    def ready(self):
+        from . import signals  # noqa: F401
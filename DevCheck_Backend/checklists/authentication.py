@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .conf import checklists_setting
+
+
+class UserCache:
+    """Small LRU of authenticated users keyed by (user id, token jti), each entry living for a short TTL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id, jti):
+        key = (str(user_id), jti)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, user_id, jti, user):
+        key = (str(user_id), jti)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + checklists_setting('AUTH_CACHE_SECONDS'), user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > checklists_setting('AUTH_CACHE_SIZE'):
+                self._entries.popitem(last=False)
+
+    def evict_user(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reuses the user loaded for a token instead of querying auth_user on every request.
+
+    Entries are dropped whenever the user is saved or deleted (see checklists.signals), so deactivation and
+    password changes take effect immediately in this process and within AUTH_CACHE_SECONDS in others.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if user_id is None or jti is None:
+            return super().get_user(validated_token)
+
+        user = user_cache.get(user_id, jti)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, jti, user)
+        # views may modify request.user, so never hand out the cached instance itself
+        return copy.copy(user)
+
+    async def aauthenticate(self, request):
+        """``authenticate()`` for async views: a cached user costs no thread hop, a miss loads it in a thread."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        user = user_cache.get(user_id, jti) if user_id is not None and jti is not None else None
+        if user is None:
+            return await sync_to_async(self.get_user)(validated_token)
+        return copy.copy(user)
@@ -0,0 +1,50 @@
+import threading
+
+from django.core.cache import caches
+
+from .conf import checklists_setting
+
+
+class TreeCache:
+    """Rendered ProjectDetailSerializer trees, stored per project together with the version they were built from.
+
+    An entry is only served while its version matches the project's current one, and the signals in
+    checklists.signals drop it as soon as the project changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[checklists_setting('TREE_CACHE')]
+
+    def key(self, project_id):
+        return f"project-tree:{project_id}"
+
+    def get(self, project_id, version):
+        entry = self.cache.get(self.key(project_id))
+        hit = entry is not None and entry[0] == version
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry[1] if hit else None
+
+    def set(self, project_id, version, data):
+        self.cache.set(self.key(project_id), (version, data))
+
+    def invalidate(self, project_ids):
+        self.cache.delete_many([self.key(project_id) for project_id in project_ids])
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else None}
+
+
+tree_cache = TreeCache()
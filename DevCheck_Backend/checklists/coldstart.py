@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+# runs in a fresh interpreter: load the ASGI application and answer one request, the way a worker does
+# after scaling up from zero
+PROBE = """
+import asyncio, json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DevCheck_Backend.settings')
+from DevCheck_Backend.asgi import application
+loaded = time.perf_counter()
+
+async def first_request(path):
+    sent = []
+    body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if body:
+            return body.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await application({
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'https',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 0), 'server': ('localhost', 443),
+    }, receive, send)
+    return sent[0]['status']
+
+status = asyncio.run(first_request(sys.argv[1]))
+done = time.perf_counter()
+print(json.dumps({
+    'status': status,
+    'import_ms': (loaded - start) * 1000,
+    'first_request_ms': (done - loaded) * 1000,
+    'total_ms': (done - start) * 1000,
+}))
+"""
+
+
+def measure_cold_start(path='/checklists/user/', importtime=False):
+    """Time loading the application and serving ``path`` once in a new process.
+
+    Returns the probe's timings in milliseconds, plus ``modules``, a list of
+    ``(module, self_us, cumulative_us, depth)`` from ``-X importtime`` when ``importtime`` is true.
+    """
+    env = dict(os.environ)
+    env['ALLOWED_HOSTS'] = ','.join(filter(None, [env.get('ALLOWED_HOSTS'), 'localhost']))
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', PROBE, path]
+    result = subprocess.run(command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"The cold start probe failed:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['modules'] = parse_importtime(result.stderr) if importtime else []
+    return timings
+
+
+def parse_importtime(output):
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # the header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
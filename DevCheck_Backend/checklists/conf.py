@@ -0,0 +1,39 @@
+from django.conf import settings
+
+# defaults for the CHECKLISTS settings dict
+DEFAULTS = {
+    # how often buffered "last opened" times are written back to Project.updated_at
+    'LAST_OPENED_FLUSH_SECONDS': 30,
+    # cache alias holding rendered project trees
+    'TREE_CACHE': 'default',
+    # lifetime and size of the per-process user cache used by CachedJWTAuthentication
+    'AUTH_CACHE_SECONDS': 60,
+    'AUTH_CACHE_SIZE': 1024,
+    # storage (an alias in STORAGES) uploads wait in, under staging/, until process_image_jobs stores them;
+    # the web and worker processes both need to reach it
+    'UPLOAD_STAGING_STORAGE': 'default',
+    # how long a worker owns a claimed job, and how uploads are retried
+    'UPLOAD_LEASE_SECONDS': 300,
+    'UPLOAD_MAX_ATTEMPTS': 5,
+    'UPLOAD_RETRY_SECONDS': 30,
+    # broker carrying live project events, how many events a slow client may have queued, and how often
+    # an idle event stream sends a keep-alive
+    'EVENT_BROKER': 'checklists.events.InProcessBroker',
+    'EVENT_QUEUE_SIZE': 100,
+    'EVENT_KEEPALIVE_SECONDS': 15,
+    # how long a ticket for an event stream (see events.issue_ticket) can be used to open it
+    'EVENT_TICKET_SECONDS': 30,
+    # most changed rows a delta sync lists before answering with a full snapshot instead
+    'SYNC_MAX_CHANGES': 500,
+    # how long deletions stay listable by delta sync before prune_tombstones removes them
+    'TOMBSTONE_RETENTION_DAYS': 30,
+    # SQLInstrumentationMiddleware warns when one query template runs more often than this in a request
+    'SQL_REPEAT_THRESHOLD': 10,
+    # longest a new process may take to load the application and answer its first request
+    # (see profile_startup)
+    'COLD_START_BUDGET_MS': 2000,
+}
+
+
+def checklists_setting(name):
+    return getattr(settings, 'CHECKLISTS', {}).get(name, DEFAULTS[name])
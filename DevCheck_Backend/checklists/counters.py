@@ -0,0 +1,82 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ChecklistSection, Page, Project, Task
+
+# how the tasks below a row of each counted model are found
+TASK_PARENTS = {ChecklistSection: 'section', Page: 'section__page', Project: 'project'}
+
+
+def _counts(completed):
+    return Counter(task_count=1, completed_count=1 if completed else 0)
+
+
+def record_tasks(tasks, deleted=False):
+    """Apply saves (or deletions) of ``tasks`` to the counters of their sections, pages and projects.
+
+    Like ``stats.record_tasks()`` this works from the tasks' loaded values, so call it after the write
+    but before ``save()`` returns, or after ``bulk_create()`` / ``bulk_update()``.
+    """
+    deltas = defaultdict(Counter)
+    for task in tasks:
+        loaded = getattr(task, '_loaded_values', None)
+        if deleted:
+            deltas[task.section_id].subtract(_counts(task.completed))
+            continue
+        if loaded is not None:
+            deltas[loaded['section_id']].subtract(_counts(loaded['completed']))
+        deltas[task.section_id].update(_counts(task.completed))
+    add_to_sections(deltas)
+
+
+def add_to_sections(deltas):
+    """Add ``{section id: Counter(task_count=..., completed_count=...)}`` to the sections and everything above them."""
+    deltas = {pk: counts for pk, counts in deltas.items() if any(counts.values())}
+    if not deltas:
+        return
+    pages, projects = defaultdict(Counter), defaultdict(Counter)
+    for pk, page_id, project_id in ChecklistSection.objects.filter(pk__in=deltas).values_list('pk', 'page_id', 'project_id'):
+        pages[page_id].update(deltas[pk])
+        projects[project_id].update(deltas[pk])
+    increment(ChecklistSection, deltas)
+    increment(Page, pages)
+    increment(Project, projects)
+
+
+def increment(model, deltas):
+    """Apply ``{pk: Counter}`` with one UPDATE per distinct change rather than one per row."""
+    rows = defaultdict(list)
+    for pk, counts in deltas.items():
+        change = tuple(sorted((field, count) for field, count in counts.items() if count))
+        if change:
+            rows[change].append(pk)
+    for change, pks in rows.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + count for field, count in change})
+
+
+def counts_of(model, pk):
+    """The stored counters of one row, read fresh rather than from a possibly stale instance."""
+    task_count, completed_count = model.objects.values_list('task_count', 'completed_count').get(pk=pk)
+    return Counter(task_count=task_count, completed_count=completed_count)
+
+
+def move(model, counts, old_pk, new_pk=None):
+    """Take ``counts`` off row ``old_pk`` of ``model`` and, unless ``new_pk`` is None, add them to ``new_pk``."""
+    if old_pk == new_pk:
+        return
+    deltas = {old_pk: Counter({field: -count for field, count in counts.items()})}
+    if new_pk is not None:
+        deltas[new_pk] = counts
+    increment(model, deltas)
+
+
+def actual_counts(model):
+    """Expressions counting the tasks below each ``model`` row from the tasks table: (task_count, completed_count)."""
+    parent = TASK_PARENTS[model]
+    tasks = Task.objects.filter(**{parent: OuterRef('pk')}).order_by().values(parent)
+    return (
+        Coalesce(Subquery(tasks.annotate(count=Count('pk')).values('count')), 0),
+        Coalesce(Subquery(tasks.filter(completed=True).annotate(count=Count('pk')).values('count')), 0),
+    )
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.core import signing
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .conf import checklists_setting
+from .trees import project_fields
+
+# sent instead of the queued events when a subscriber falls too far behind; clients refetch the tree
+RESYNC = {'model': 'project', 'action': 'resync'}
+
+
+class Subscription:
+    """One client's queue of events for a project. Created and read on the event loop serving the client."""
+
+    def __init__(self, broker, project_id):
+        self.broker = broker
+        self.project_id = project_id
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(checklists_setting('EVENT_QUEUE_SIZE'))
+
+    def deliver(self, event):
+        # may be called from any thread
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # the loop has shut down
+            self.close()
+
+    def _put(self, event):
+        if self._queue.full():
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            event = RESYNC
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """Return the next event, or None if nothing arrives within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker(ABC):
+    """Delivers project change events to the clients watching that project.
+
+    ``publish`` is called from request threads after the change has been committed; ``subscribe`` is called
+    from the ASGI event loop and returns a ``Subscription``.
+    """
+
+    @abstractmethod
+    def publish(self, project_id, event):
+        ...
+
+    @abstractmethod
+    def subscribe(self, project_id):
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription):
+        ...
+
+
+class InProcessBroker(Broker):
+    """Fans events out to subscribers in this process only.
+
+    Enough for a single web process; deployments running several need a broker shared between them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, project_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(project_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def subscribe(self, project_id):
+        subscription = Subscription(self, project_id)
+        with self._lock:
+            self._subscriptions[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.project_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.project_id]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(checklists_setting('EVENT_BROKER'))()
+    return _broker
+
+
+def change_event(instance, action):
+    """The compact event sent for a created, updated or deleted page, section or task."""
+    model = type(instance).__name__.lower()
+    if model == 'page':
+        data = {'id': instance.pk, 'name': instance.name, 'order': instance.order}
+    elif model == 'checklistsection':
+        model = 'section'
+        data = {'id': instance.pk, 'page': instance.page_id, 'title': instance.title, 'order': instance.order}
+    else:
+        data = {
+            'id': instance.pk,
+            'section': instance.section_id,
+            'title': instance.title,
+            'completed': instance.completed,
+            'order': instance.order,
+        }
+    if action == 'deleted':
+        data = {'id': data['id']}
+    return {'model': model, 'action': action, 'data': data}
+
+
+def project_event(project, action='updated'):
+    """The event sent when a project's own fields change or the project is deleted."""
+    data = project_fields(project) if action != 'deleted' else {'id': project.pk}
+    return {'model': 'project', 'action': action, 'data': data}
+
+
+def publish(project_id, event):
+    """Send ``event`` to the project's subscribers once the current transaction commits."""
+    transaction.on_commit(lambda: get_broker().publish(project_id, event))
+
+
+def publish_changes(instances, action):
+    for instance in instances:
+        publish(instance.project_id, change_event(instance, action))
+
+
+TICKET_SALT = 'checklists.events.ticket'
+
+
+def issue_ticket(user_id, project_id, expires_at):
+    """A signed ticket that opens one project's event stream for EVENT_TICKET_SECONDS.
+
+    EventSource can't send headers, so the stream is authenticated from its URL. A ticket in the URL is
+    what ends up in access logs instead of the access token, and it only opens this project's stream, and
+    only briefly. The stream itself ends at ``expires_at``, when the access token the ticket was issued for
+    expires.
+    """
+    return signing.dumps({'user': user_id, 'project': project_id, 'exp': expires_at}, salt=TICKET_SALT, compress=True)
+
+
+def read_ticket(ticket, project_id):
+    """(user id, stream expiry) from a ticket for ``project_id``; raises ``signing.BadSignature`` otherwise."""
+    claims = signing.loads(ticket, salt=TICKET_SALT, max_age=checklists_setting('EVENT_TICKET_SECONDS'))
+    if claims.get('project') != project_id:
+        raise signing.BadSignature("The ticket is for another project.")
+    return claims['user'], claims['exp']
+
+
+async def event_stream(project_id, expires_at):
+    """Server-sent events for one project until the client's access token expires or the project is deleted."""
+    subscription = get_broker().subscribe(project_id)
+    keepalive = checklists_setting('EVENT_KEEPALIVE_SECONDS')
+    try:
+        yield "retry: 3000\n\n"
+        while time.time() < expires_at:
+            event = await subscription.get(min(keepalive, max(expires_at - time.time(), 0)))
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {json.dumps(event)}\n\n"
+            if event['model'] == 'project' and event['action'] == 'deleted':
+                break
+    finally:
+        subscription.close()
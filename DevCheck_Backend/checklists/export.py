@@ -0,0 +1,109 @@
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import ChecklistSection, Page, Project, Task
+
+# first line of every export, so importers can tell the format apart from other NDJSON
+FORMAT = 'devcheck-export'
+FORMAT_VERSION = 1
+
+# each level is read with one query, sorted so that a row's parent key is a prefix of its own sort key:
+# (type, queryset filter on the owner, sort key, output field -> column, length of the parent key)
+LEVELS = [
+    ('project', 'owner_id', ('id',), {
+        'id': 'id', 'name': 'name', 'description': 'description', 'link': 'link',
+        'project_status': 'project_status', 'created_at': 'created_at',
+    }, 0),
+    ('page', 'project__owner_id', ('project_id', 'order', 'id'), {
+        'id': 'id', 'project': 'project_id', 'name': 'name', 'order': 'order',
+    }, 1),
+    ('section', 'owner_id', ('project_id', 'page__order', 'page_id', 'order', 'id'), {
+        'id': 'id', 'page': 'page_id', 'title': 'title', 'order': 'order',
+    }, 3),
+    ('task', 'owner_id', ('project_id', 'section__page__order', 'section__page_id', 'section__order', 'section_id', 'order', 'id'), {
+        'id': 'id', 'section': 'section_id', 'title': 'title', 'completed': 'completed', 'order': 'order',
+        'created_at': 'created_at', 'completed_at': 'completed_at',
+    }, 5),
+]
+MODELS = {'project': Project, 'page': Page, 'section': ChecklistSection, 'task': Task}
+
+
+def _level(kind, owner_lookup, owner_id, key, fields, chunk_size):
+    columns = list(dict.fromkeys([*key, *fields.values()]))
+    rows = (
+        MODELS[kind].objects.filter(**{owner_lookup: owner_id})
+        .order_by(*key)
+        .values_list(*columns)
+        .iterator(chunk_size=chunk_size)
+    )
+    for values in rows:
+        row = dict(zip(columns, values))
+        yield tuple(row[column] for column in key), {'type': kind, **{name: row[column] for name, column in fields.items()}}
+
+
+class _Children:
+    """One level's rows, handed out a parent at a time while the level above is walked."""
+
+    def __init__(self, rows, parent_length):
+        self.rows = rows
+        self.parent_length = parent_length
+        self.head = next(rows, None)
+
+    def of(self, parent_key):
+        # rows whose parent sorts earlier were added or moved while the export was being read; their
+        # parent isn't in it, so they are left out
+        while self.head is not None and self.head[0][:self.parent_length] < parent_key:
+            self.head = next(self.rows, None)
+        while self.head is not None and self.head[0][:self.parent_length] == parent_key:
+            yield self.head
+            self.head = next(self.rows, None)
+
+
+def _walk(rows, levels):
+    for key, row in rows:
+        yield row
+        if levels:
+            yield from _walk(levels[0].of(key), levels[1:])
+
+
+def export_rows(owner_id, chunk_size=2000):
+    """Everything ``owner_id`` owns as dicts: each project, then each of its pages followed by its sections,
+    each section followed by its tasks, in display order.
+
+    Each level is one query read with a server-side cursor, and the four are merged as they are read, so
+    memory use doesn't grow with the size of the account.
+    """
+    yield {'type': FORMAT, 'version': FORMAT_VERSION, 'exported_at': timezone.now()}
+    levels = [
+        _level(kind, owner_lookup, owner_id, key, fields, chunk_size)
+        for kind, owner_lookup, key, fields, _ in LEVELS
+    ]
+    children = [_Children(rows, level[-1]) for rows, level in zip(levels[1:], LEVELS[1:])]
+    yield from _walk(levels[0], children)
+
+
+def ndjson(rows, buffer_size=64 * 1024):
+    """Encode ``rows`` as NDJSON, yielding about ``buffer_size`` bytes at a time."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    buffer, size = [], 0
+    for row in rows:
+        line = (encoder.encode(row) + '\n').encode()
+        buffer.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+async def aiterate(chunks):
+    """Serve a synchronous iterator that reads the database to the ASGI handler without consuming it first.
+
+    Each chunk is produced in the thread Django runs synchronous code in, which keeps the cursors on one
+    connection.
+    """
+    chunks = iter(chunks)
+    while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+        yield chunk
@@ -0,0 +1,52 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# bounding boxes of the sizes the frontend shows project images at
+VARIANTS = {
+    "thumbnail": (320, 180),
+    "card": (800, 450),
+}
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == "WEBP":
+        image.save(buffer, "WEBP", quality=80, method=4)
+    elif image_format == "PNG":
+        image.save(buffer, "PNG", optimize=True)
+    else:
+        image.convert("RGB").save(buffer, "JPEG", quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_derivatives(project, source):
+    """Store resized WebP + JPEG/PNG copies of a project image and return the URLs of every variant.
+
+    ``source`` is a readable file with the original image, ``project.image`` must already point at the stored
+    original. The result is what ``Project.image_urls`` holds.
+    """
+    storage = project.image.storage
+    stem = os.path.splitext(os.path.basename(project.image.name))[0]
+
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        fallback = "PNG" if has_alpha(original) else "JPEG"
+        if original.mode not in ("RGB", "RGBA"):
+            original = original.convert("RGBA" if fallback == "PNG" else "RGB")
+
+        urls = {"original": project.image.url}
+        for variant, size in VARIANTS.items():
+            resized = original.copy()
+            resized.thumbnail(size, Image.Resampling.LANCZOS)
+            urls[variant] = {}
+            for key, image_format, extension in (("webp", "WEBP", "webp"), ("fallback", fallback, fallback.lower())):
+                name = storage.save(f"projects/derivatives/{stem}-{variant}.{extension}", ContentFile(encode(resized, image_format)))
+                urls[variant][key] = storage.url(name)
+    return urls
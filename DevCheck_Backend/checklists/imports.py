@@ -0,0 +1,285 @@
+import json
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import counters, export, search, stats
+from .models import ChecklistSection, Page, Project, Task, RANK_GAP
+
+# sections given to pages that don't list their own
+DEFAULT_SECTIONS = ["MVP", "DEV", "DEPLOY"]
+# an import stops reading after this many invalid rows
+MAX_ERRORS = 100
+# Figma node types turned into pages, and the container nodes searched for them below each Figma page
+FIGMA_FRAMES = {'FRAME', 'COMPONENT', 'COMPONENT_SET'}
+FIGMA_CONTAINERS = {'SECTION', 'GROUP'}
+
+
+class TreeWriter:
+    """Collects new projects, pages, sections and tasks and writes them with batched ``bulk_create()``.
+
+    Parents are written before their children, so children can be added with unsaved parents. Call
+    ``flush()`` inside a transaction; it also updates the task rollups, counters and search entries,
+    which bulk writes don't do through signals.
+    """
+
+    def __init__(self, owner_id, batch_size=1000):
+        self.owner_id = owner_id
+        self.batch_size = batch_size
+        self.pending = {Project: [], Page: [], ChecklistSection: [], Task: []}
+        # 'projects' / 'pages' / 'sections' / 'tasks' -> rows written so far
+        self.written = Counter()
+
+    def __len__(self):
+        return sum(len(objects) for objects in self.pending.values())
+
+    def add_project(self, **fields):
+        return self._add(Project(owner_id=self.owner_id, **fields))
+
+    def add_page(self, project, **fields):
+        return self._add(Page(project=project, **fields))
+
+    def add_section(self, page, **fields):
+        return self._add(ChecklistSection(page=page, project=page.project, owner_id=self.owner_id, **fields))
+
+    def add_task(self, section, **fields):
+        return self._add(Task(section=section, project=section.project, owner_id=self.owner_id, **fields))
+
+    def _add(self, obj):
+        self.pending[type(obj)].append(obj)
+        return obj
+
+    KINDS = {Project: 'projects', Page: 'pages', ChecklistSection: 'sections', Task: 'tasks'}
+
+    def flush(self):
+        tasks = self.pending[Task]
+        for task in tasks:
+            task.stamp_completion()
+        # created_at is auto_now_add, so bulk_create() stamps every task with the current time; imported
+        # times are put back afterwards
+        created = [(task, task.created_at) for task in tasks if task.created_at is not None]
+        for model, objects in self.pending.items():
+            if objects:
+                model.objects.bulk_create(objects, batch_size=self.batch_size)
+                self.written[self.KINDS[model]] += len(objects)
+        if created:
+            for task, created_at in created:
+                task.created_at = created_at
+            Task.objects.bulk_update([task for task, _ in created], ['created_at'], batch_size=self.batch_size)
+        stats.record_tasks(tasks)
+        counters.record_tasks(tasks)
+        search.index(self.pending[Project] + self.pending[Page] + tasks)
+        self.pending = {model: [] for model in self.pending}
+
+
+class ImportFailed(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} rows are invalid.")
+        self.errors = errors
+
+
+def _is_reference(value):
+    # ids in a file are only used as dict keys, so anything JSON can hold other than a string or a number
+    # is rejected
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def _clean(model, row, names):
+    values, errors = {}, {}
+    for name in names:
+        field = model._meta.get_field(name)
+        if name not in row:
+            if not field.has_default() and not field.blank:
+                errors[name] = ["This field is required."]
+            continue
+        try:
+            values[name] = field.clean(row[name], None)
+        except ValidationError as error:
+            errors[name] = error.messages
+    return values, errors
+
+
+class Importer:
+    """Validates rows in the export format (see checklists.export) and writes them with a ``TreeWriter``.
+
+    Rows refer to their parent by the parent's ``id`` in the file, and every project in the file becomes a
+    new project of the importing user. Rows are written in batches as they arrive. After the first invalid
+    row the rest are only validated, and ``finish()`` raises ``ImportFailed`` so the caller's transaction
+    rolls back.
+    """
+    PARENTS = {'page': 'project', 'section': 'page', 'task': 'section'}
+    FIELDS = {
+        'project': (Project, ('name', 'description', 'link', 'project_status')),
+        'page': (Page, ('name', 'order')),
+        'section': (ChecklistSection, ('title', 'order')),
+        'task': (Task, ('title', 'completed', 'order', 'created_at', 'completed_at')),
+    }
+    # stands in for rows that weren't written, so the rows below them still find their parent
+    UNWRITTEN = object()
+
+    def __init__(self, owner_id, batch_size=1000, progress=None):
+        self.writer = TreeWriter(owner_id, batch_size)
+        self.batch_size = batch_size
+        self.progress = progress
+        # id in the file -> new object
+        self.objects = {'project': {}, 'page': {}, 'section': {}}
+        self.positions = Counter()
+        self.section_titles = set()
+        self.projects = []
+        self.errors = []
+
+    def add(self, ref, row):
+        if not isinstance(row, dict):
+            return self.error(ref, {'row': ["Expected a JSON object."]})
+        kind = row.get('type')
+        if not isinstance(kind, str) or kind not in self.FIELDS:
+            return self.error(ref, {'type': [f"Expected one of: {', '.join(self.FIELDS)}."]})
+
+        model, names = self.FIELDS[kind]
+        values, errors = _clean(model, row, names)
+        row_id = row.get('id')
+        if row_id is not None and not _is_reference(row_id):
+            errors['id'] = ["Expected a string or a number."]
+            row_id = None
+        parent = None
+        if kind in self.PARENTS:
+            parent_kind = self.PARENTS[kind]
+            parent_id = row.get(parent_kind)
+            parent = self.objects[parent_kind].get(parent_id) if _is_reference(parent_id) else None
+            if not _is_reference(parent_id):
+                errors[parent_kind] = ["Expected the id (a string or a number) of an earlier row."]
+                parent_id = None
+            elif parent is None:
+                errors[parent_kind] = [f"No {parent_kind} with id {parent_id!r} comes before this row."]
+            elif kind == 'section' and 'title' in values:
+                if (parent_id, values['title']) in self.section_titles:
+                    errors['title'] = ["A page can only have one section of each type."]
+                self.section_titles.add((parent_id, values['title']))
+            if 'order' not in values:
+                position = self.positions[kind, parent_id]
+                self.positions[kind, parent_id] += 1
+                values['order'] = position if kind == 'section' else (position + 1) * RANK_GAP
+
+        if errors:
+            self.error(ref, errors)
+        if self.errors or parent is self.UNWRITTEN:
+            obj = self.UNWRITTEN
+        elif kind == 'project':
+            obj = self.writer.add_project(**values)
+            self.projects.append(obj)
+        else:
+            obj = getattr(self.writer, f'add_{kind}')(parent, **values)
+
+        if kind in self.objects and row_id is not None:
+            self.objects[kind][row_id] = obj
+        if len(self.writer) >= self.batch_size:
+            self.flush()
+
+    def error(self, ref, errors):
+        self.errors.append({'row': ref, 'errors': errors})
+        if len(self.errors) >= MAX_ERRORS:
+            raise ImportFailed(self.errors)
+
+    def flush(self):
+        if self.errors:
+            return
+        self.writer.flush()
+        if self.progress is not None:
+            self.progress(self.writer.written)
+
+    def finish(self):
+        if self.errors:
+            raise ImportFailed(self.errors)
+        self.flush()
+        return self.projects, self.writer.written
+
+
+def _figma_children(node):
+    children = node.get('children', [])
+    return children if isinstance(children, list) else [children]
+
+
+def _figma_frames(node):
+    # (reference, frame) for the frames below ``node``; anything that isn't a node is passed on as it is,
+    # under the id of its parent, for the importer to report
+    for child in _figma_children(node):
+        if not isinstance(child, dict):
+            yield node.get('id'), child
+        elif child.get('type') in FIGMA_FRAMES:
+            yield child.get('id'), child
+        elif child.get('type') in FIGMA_CONTAINERS:
+            yield from _figma_frames(child)
+
+
+def _figma_name(value, default):
+    # Figma names can be longer than ours; anything that isn't a string is left for validation to report
+    return value[:100] if isinstance(value, str) else value or default
+
+
+def _figma_rows(document):
+    # one project for the file; each top-level frame becomes a page with the default sections
+    name = _figma_name(document.get('name') or "Figma import", "Figma import")
+    yield 'file', {'type': 'project', 'id': 'file', 'name': name, 'description': f'Imported from the Figma file "{name}".'}
+    root = document['document']
+    for canvas in _figma_children(root):
+        frames = _figma_frames(canvas) if isinstance(canvas, dict) else [(root.get('id'), canvas)]
+        for ref, frame in frames:
+            if not isinstance(frame, dict):
+                yield ref, frame
+                continue
+            yield ref, {'type': 'page', 'id': ref, 'project': 'file', 'name': _figma_name(frame.get('name'), "Untitled")}
+            for title in DEFAULT_SECTIONS:
+                yield ref, {'type': 'section', 'id': f'{ref}/{title}', 'page': ref, 'title': title}
+
+
+def _ndjson_rows(lines):
+    for number, line in enumerate(lines, 2):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def read_rows(file):
+    """(reference, row) for each row of ``file``, an export (NDJSON) or a Figma file (JSON), opened in binary.
+
+    Exports are read a line at a time and rows are referred to by line number. A Figma file is a single
+    JSON document, so it is parsed whole; its rows are referred to by Figma node id.
+    """
+    lines = iter(file)
+    first = next(lines, b'')
+    try:
+        header = json.loads(first)
+    except ValueError:
+        header = None
+    if isinstance(header, dict) and header.get('type') == export.FORMAT:
+        version = header.get('version')
+        if not isinstance(version, int) or isinstance(version, bool) or version < 1:
+            raise ImportFailed([{'row': 1, 'errors': {'version': ["Expected a positive integer."]}}])
+        if version > export.FORMAT_VERSION:
+            raise ImportFailed([{'row': 1, 'errors': {'version': [f"Version {version} exports can't be imported yet."]}}])
+        return _ndjson_rows(lines)
+
+    try:
+        document = json.loads(first + b''.join(lines))
+    except ValueError:
+        document = None
+    if not isinstance(document, dict) or not isinstance(document.get('document'), dict):
+        raise ImportFailed([{'row': None, 'errors': {'file': ["Expected an export (NDJSON) or a Figma file (JSON)."]}}])
+    return _figma_rows(document)
+
+
+def import_file(file, owner_id, batch_size=1000, progress=None):
+    """Create the projects in ``file`` (see ``read_rows()``) for ``owner_id`` in one transaction.
+
+    Returns the new projects and the number of rows written of each kind. ``progress`` is called with
+    the running counts after each batch. Raises ``ImportFailed`` with the invalid rows, having written nothing.
+    """
+    importer = Importer(owner_id, batch_size, progress)
+    with transaction.atomic():
+        for ref, row in read_rows(file):
+            importer.add(ref, row)
+        return importer.finish()
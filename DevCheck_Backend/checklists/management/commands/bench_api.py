@@ -0,0 +1,171 @@
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from checklists.models import Project, Task
+
+# endpoint name -> (url name, kwargs built from one user's ids)
+ENDPOINTS = {
+    "project-list": ("project-list", lambda ids: {}),
+    "project-dashboard": ("project-dashboard", lambda ids: {}),
+    "project-detail": ("project-detail", lambda ids: {"pk": random.choice(ids["projects"])}),
+    "project-sync": ("project-sync", lambda ids: {"pk": random.choice(ids["projects"])}),
+    "task-detail": ("task-detail", lambda ids: {"pk": random.choice(ids["tasks"])}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives the checklists URL routes in-process with JWT-authenticated clients and reports throughput, "
+        "latency percentiles and SQL queries per endpoint as JSON. Run seed_checklists first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="load", help="Username prefix of the seeded users to authenticate as.")
+        parser.add_argument("--users", type=int, default=10, help="How many seeded users the clients act as.")
+        parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=["project-list", "project-detail", "task-detail"])
+        parser.add_argument("--requests", type=int, default=500, help="Timed requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Client threads per endpoint.")
+        parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per endpoint before measuring.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for picking users and objects.")
+        parser.add_argument("--output", help="Also write the report to this file.")
+        parser.add_argument("--compare", help="A previous report to print ratios against (e.g. from another commit).")
+
+    def handle(self, *args, **options):
+        # lets the test client's "testserver" host through ALLOWED_HOSTS
+        setup_test_environment()
+        random.seed(options["seed"])
+
+        users = list(User.objects.filter(username__startswith=f"{options['prefix']}-").order_by("pk")[:options["users"]])
+        if not users:
+            raise CommandError(f"No users named {options['prefix']}-<n>; run seed_checklists first.")
+        accounts = [self.account(user) for user in users]
+        accounts = [account for account in accounts if account["ids"]["projects"] and account["ids"]["tasks"]]
+        if not accounts:
+            raise CommandError("The seeded users have no projects or tasks.")
+
+        report = {
+            "commit": self.git("rev-parse", "HEAD"),
+            "dirty": bool(self.git("status", "--porcelain", "--untracked-files=no")),
+            "database": connection.vendor,
+            "options": {name: options[name] for name in ("users", "requests", "concurrency", "warmup", "seed")},
+            "dataset": {
+                "users": len(accounts),
+                "projects_per_user": round(statistics.mean(len(a["ids"]["projects"]) for a in accounts), 1),
+                "tasks_per_user": round(statistics.mean(len(a["ids"]["tasks"]) for a in accounts), 1),
+            },
+            "endpoints": {},
+        }
+        for name in options["endpoints"]:
+            self.run(name, accounts, options["warmup"], options["concurrency"])
+            report["endpoints"][name] = self.run(name, accounts, options["requests"], options["concurrency"])
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        if options["compare"]:
+            self.compare(report, options["compare"])
+
+    def account(self, user):
+        return {
+            "token": str(AccessToken.for_user(user)),
+            "ids": {
+                "projects": list(Project.objects.filter(owner=user).values_list("pk", flat=True)),
+                "tasks": list(Task.objects.filter(owner=user).values_list("pk", flat=True)[:1000]),
+            },
+        }
+
+    def run(self, name, accounts, requests, concurrency):
+        url_name, build_kwargs = ENDPOINTS[name]
+        counts = iter(range(requests))
+        lock = threading.Lock()
+        samples = []
+
+        def worker():
+            client = APIClient()
+            queries = []
+
+            def count(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            try:
+                with connection.execute_wrapper(count):
+                    while True:
+                        with lock:
+                            if next(counts, None) is None:
+                                return
+                        account = random.choice(accounts)
+                        client.credentials(HTTP_AUTHORIZATION=f"Bearer {account['token']}")
+                        url = reverse(url_name, kwargs=build_kwargs(account["ids"]))
+                        queries.clear()
+                        start = time.perf_counter()
+                        response = client.get(url, secure=True)
+                        elapsed = (time.perf_counter() - start) * 1000
+                        with lock:
+                            samples.append((elapsed, len(queries), response.status_code))
+            finally:
+                # each thread opened its own connection
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        duration = time.perf_counter() - start
+        return self.summarize(samples, duration)
+
+    def summarize(self, samples, duration):
+        if not samples:
+            return {"requests": 0}
+        latencies = sorted(sample[0] for sample in samples)
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for sample in samples if sample[2] >= 400),
+            "throughput_rps": round(len(samples) / duration, 1),
+            "mean_ms": round(statistics.mean(latencies), 2),
+            "p50_ms": round(cuts[49], 2),
+            "p95_ms": round(cuts[94], 2),
+            "p99_ms": round(cuts[98], 2),
+            "queries_mean": round(statistics.mean(sample[1] for sample in samples), 2),
+            "queries_max": max(sample[1] for sample in samples),
+        }
+
+    def compare(self, report, path):
+        with open(path) as file:
+            baseline = json.load(file)
+        self.stderr.write(f"Compared with {baseline.get('commit', path)} (new / old):")
+        for name, result in report["endpoints"].items():
+            old = baseline.get("endpoints", {}).get(name)
+            if not old or not old.get("requests"):
+                continue
+            ratios = ", ".join(
+                f"{key} {result[key] / old[key]:.2f}x"
+                for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "queries_mean")
+                if old.get(key)
+            )
+            self.stderr.write(f"  {name}: {ratios}")
+
+    def git(self, *args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,69 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from checklists.models import Project, Page, ChecklistSection, Task
+from checklists.serializers import ProjectDetailSerializer
+from checklists.trees import build_project_tree
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compares ProjectDetailSerializer with the flat tree builder on generated projects. Nothing is kept in the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Task counts to benchmark.")
+        parser.add_argument("--pages", type=int, default=20, help="Pages per generated project.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path and size.")
+
+    def handle(self, *args, **options):
+        results = []
+        try:
+            with transaction.atomic():
+                owner = User.objects.create_user(username=f"bench-{time.time_ns()}")
+                for size in options["sizes"]:
+                    project = self.generate(owner, options["pages"], size)
+                    results.append({
+                        "tasks": size,
+                        "serializer_ms": self.time(options["repeat"], lambda: ProjectDetailSerializer(
+                            Project.objects.prefetch_related("pages__sections__tasks").get(pk=project.pk)
+                        ).data),
+                        "tree_builder_ms": self.time(options["repeat"], lambda: build_project_tree(
+                            Project.objects.get(pk=project.pk)
+                        )),
+                    })
+                raise Rollback
+        except Rollback:
+            pass
+
+        for result in results:
+            result["speedup"] = round(result["serializer_ms"] / result["tree_builder_ms"], 2)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def generate(self, owner, page_count, task_count):
+        project = Project.objects.create(owner=owner, name=f"Benchmark {task_count}", description="")
+        pages = Page.objects.bulk_create([Page(project=project, name=f"Page {i}", order=i) for i in range(page_count)])
+        sections = ChecklistSection.objects.bulk_create([
+            ChecklistSection(page=page, project=project, owner=owner, title=title, order=i)
+            for page in pages for i, title in enumerate(["MVP", "DEV", "DEPLOY"])
+        ])
+        Task.objects.bulk_create([
+            Task(section=sections[i % len(sections)], project=project, owner=owner, title=f"Task {i}", completed=i % 2 == 0, order=i)
+            for i in range(task_count)
+        ])
+        return project
+
+    def time(self, repeat, build):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            build()
+            timings.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(timings), 2)
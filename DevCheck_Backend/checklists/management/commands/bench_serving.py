@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from checklists.models import Project
+
+# server name -> gunicorn arguments; both get the same --workers
+SERVERS = {
+    "sync": ["DevCheck_Backend.wsgi:application", "-k", "sync"],
+    "asgi": ["DevCheck_Backend.asgi:application", "-k", "uvicorn_worker.UvicornWorker"],
+}
+
+# endpoint name -> (url name, kwargs built from one user's project ids)
+ENDPOINTS = {
+    "project-list": ("project-list", lambda projects: {}),
+    "project-detail": ("project-detail", lambda projects: {"pk": random.choice(projects)}),
+    "user-detail": ("user-detail", lambda projects: {}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts the WSGI (sync gunicorn workers) and ASGI (uvicorn workers) deployments with the same number of "
+        "workers and reports how each holds up as concurrent connections grow, as JSON. Run seed_checklists first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+        parser.add_argument("--workers", type=int, default=2, help="gunicorn workers for every server.")
+        parser.add_argument("--connections", type=int, nargs="+", default=[8, 32, 128], help="Concurrent connections to try.")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds to measure at each level.")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds before a request counts as timed out.")
+        parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument("--prefix", default="load", help="Username prefix of the seeded users to authenticate as.")
+        parser.add_argument("--users", type=int, default=10, help="How many seeded users the clients act as.")
+        parser.add_argument("--port", type=int, default=8765, help="Port the servers listen on, one at a time.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Also write the report to this file.")
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        users = list(User.objects.filter(username__startswith=f"{options['prefix']}-").order_by("pk")[:options["users"]])
+        accounts = [
+            (str(AccessToken.for_user(user)), list(Project.objects.filter(owner=user).values_list("pk", flat=True)))
+            for user in users
+        ]
+        accounts = [account for account in accounts if account[1]]
+        if not accounts:
+            raise CommandError(f"No users named {options['prefix']}-<n> with projects; run seed_checklists first.")
+
+        report = {
+            "commit": self.git("rev-parse", "HEAD"),
+            "dirty": bool(self.git("status", "--porcelain", "--untracked-files=no")),
+            "options": {name: options[name] for name in ("workers", "duration", "timeout", "endpoints", "seed")},
+            "servers": {},
+        }
+        for name in options["servers"]:
+            with self.server(name, options["workers"], options["port"]):
+                results = report["servers"][name] = {}
+                for connections in options["connections"]:
+                    self.stderr.write(f"{name}: {connections} connections")
+                    results[str(connections)] = asyncio.run(self.load(
+                        options["port"], accounts, options["endpoints"], connections, options["duration"], options["timeout"],
+                    ))
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+
+    @contextmanager
+    def server(self, name, workers, port):
+        env = dict(os.environ)
+        # the requests come straight from localhost rather than through the production proxy
+        env["ALLOWED_HOSTS"] = ",".join(filter(None, [env.get("ALLOWED_HOSTS"), "127.0.0.1"]))
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", *SERVERS[name], "--workers", str(workers),
+             "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        try:
+            self.wait_for(port, process)
+            yield process
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def wait_for(self, port, process, seconds=30):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"The server exited with status {process.returncode}.")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Nothing listened on port {port} within {seconds} seconds.")
+
+    async def load(self, port, accounts, endpoints, connections, duration, timeout):
+        samples = []
+        deadline = time.monotonic() + duration
+
+        async def client():
+            while time.monotonic() < deadline:
+                token, projects = random.choice(accounts)
+                url_name, build_kwargs = ENDPOINTS[random.choice(endpoints)]
+                path = reverse(url_name, kwargs=build_kwargs(projects))
+                start = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(self.get(port, path, token), timeout)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                except OSError:
+                    status = "error"
+                samples.append(((time.perf_counter() - start) * 1000, status))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(connections)))
+        return self.summarize(samples, time.perf_counter() - start)
+
+    async def get(self, port, path, token):
+        # one connection per request: gunicorn's sync workers don't keep connections alive
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            writer.write((
+                f"GET {path} HTTP/1.1\r\n"
+                f"Host: 127.0.0.1\r\n"
+                f"Authorization: Bearer {token}\r\n"
+                # gunicorn and uvicorn trust this from localhost, which keeps SECURE_SSL_REDIRECT from redirecting
+                f"X-Forwarded-Proto: https\r\n"
+                f"Connection: close\r\n\r\n"
+            ).encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+        finally:
+            writer.close()
+        return int(status_line.split()[1]) if status_line else "error"
+
+    def summarize(self, samples, duration):
+        ok = sorted(elapsed for elapsed, status in samples if isinstance(status, int) and status < 400)
+        summary = {
+            "requests": len(samples),
+            "ok": len(ok),
+            "errors": sum(1 for _, status in samples if status == "error" or isinstance(status, int) and status >= 400),
+            "timeouts": sum(1 for _, status in samples if status == "timeout"),
+            "throughput_rps": round(len(ok) / duration, 1),
+        }
+        if ok:
+            cuts = statistics.quantiles(ok, n=100, method="inclusive") if len(ok) > 1 else ok * 99
+            summary.update({
+                "mean_ms": round(statistics.mean(ok), 2),
+                "p50_ms": round(cuts[49], 2),
+                "p95_ms": round(cuts[94], 2),
+                "p99_ms": round(cuts[98], 2),
+            })
+        return summary
+
+    def git(self, *args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from checklists.images import build_derivatives
+from checklists.models import Project
+from checklists.signals import record_changes
+
+
+class Command(BaseCommand):
+    help = "Generates resized image variants and stored URLs for projects uploaded before they existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild projects that already have variants too.")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.exclude(image="").exclude(image__isnull=True)
+        if not options["all"]:
+            projects = projects.filter(image_urls={})
+
+        built = failed = 0
+        for project in projects.iterator():
+            try:
+                with project.image.open("rb") as original:
+                    image_urls = build_derivatives(project, original)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f"Project {project.pk}: {error}")
+                continue
+            # update() so the "last opened" time stays as it is; the new version makes clients and the tree
+            # cache pick up the new URLs
+            with transaction.atomic():
+                Project.objects.filter(pk=project.pk).update(image_urls=image_urls)
+                record_changes([project.pk])
+            built += 1
+        self.stdout.write(f"{built} projects updated, {failed} failed.")
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from checklists.models import Page, ChecklistSection, Project, Task
+from checklists.signals import record_changes
+
+
+class Command(BaseCommand):
+    help = "Checks the project / owner keys copied onto sections and tasks against their pages and projects."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rewrite the keys of inconsistent rows.")
+
+    def handle(self, *args, **options):
+        sections = ChecklistSection.objects.filter(
+            ~Q(project_id=F("page__project_id")) | ~Q(owner_id=F("page__project__owner_id"))
+        )
+        tasks = Task.objects.filter(
+            ~Q(project_id=F("section__page__project_id")) | ~Q(owner_id=F("section__page__project__owner_id"))
+        )
+
+        section_rows = list(sections.values_list("pk", "project_id", "page__project_id"))
+        task_rows = list(tasks.values_list("pk", "project_id", "section__page__project_id"))
+        section_ids = [row[0] for row in section_rows]
+        task_ids = [row[0] for row in task_rows]
+        self.stdout.write(f"{len(section_ids)} inconsistent sections, {len(task_ids)} inconsistent tasks.")
+
+        if not options["fix"] or not (section_ids or task_ids):
+            return
+
+        with transaction.atomic():
+            pages = Page.objects.filter(pk=OuterRef("page_id"))
+            ChecklistSection.objects.filter(pk__in=section_ids).update(
+                project_id=Subquery(pages.values("project_id")),
+                owner_id=Subquery(pages.values("project__owner_id")),
+            )
+            parents = ChecklistSection.objects.filter(pk=OuterRef("section_id"))
+            Task.objects.filter(pk__in=task_ids).update(
+                project_id=Subquery(parents.values("project_id")),
+                owner_id=Subquery(parents.values("owner_id")),
+            )
+            # the rows leave the projects they were listed under without tombstones, so the clients of every
+            # project involved get a full snapshot next
+            project_ids = {project_id for _, *keys in section_rows + task_rows for project_id in keys}
+            record_changes(project_ids)
+            Project.objects.filter(pk__in=project_ids).update(sync_floor=F("version"))
+        self.stdout.write(self.style.SUCCESS("Fixed."))
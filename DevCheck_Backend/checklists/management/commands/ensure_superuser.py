@@ -0,0 +1,26 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the superuser named by SUPERUSER_USERNAME / SUPERUSER_EMAIL / SUPERUSER_PASSWORD if it doesn't "
+        "exist yet. Does nothing unless CREATE_SUPERUSER=True. Run at build time, not on boot."
+    )
+
+    def handle(self, *args, **options):
+        if os.environ.get("CREATE_SUPERUSER") != "True":
+            return
+
+        User = get_user_model()
+        username = os.environ.get("SUPERUSER_USERNAME", "admin")
+        email = os.environ.get("SUPERUSER_EMAIL", "admin@example.com")
+        password = os.environ.get("SUPERUSER_PASSWORD", "StrongPassword123")
+
+        if not User.objects.filter(username=username).exists():
+            User.objects.create_superuser(username=username, email=email, password=password)
+            self.stdout.write(self.style.SUCCESS(f"Superuser '{username}' created successfully!"))
+        else:
+            self.stdout.write(f"Superuser '{username}' already exists.")
@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from checklists import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates projects for a user from an export (NDJSON, as sent by the export endpoint) or a Figma file "
+        "(JSON, where every top-level frame becomes a page), in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The file to import.")
+        parser.add_argument("--user", required=True, help="Username of the new projects' owner.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk insert.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and write the rows, then roll back.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']}.")
+
+        start = time.perf_counter()
+        try:
+            with open(options["path"], "rb") as file, transaction.atomic():
+                projects, written = imports.import_file(file, user.pk, options["batch_size"], self.report)
+                if options["dry_run"]:
+                    transaction.set_rollback(True)
+        except OSError as error:
+            raise CommandError(f"Can't read {options['path']}: {error}")
+        except imports.ImportFailed as failed:
+            for error in failed.errors:
+                self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+            raise CommandError(f"Nothing was imported: {failed}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Checked' if options['dry_run'] else 'Imported'} {written['projects']} projects, {written['pages']} pages, "
+            f"{written['sections']} sections and {written['tasks']} tasks in {time.perf_counter() - start:.1f}s."
+        ))
+        if not options["dry_run"]:
+            self.stdout.write(f"Project ids: {', '.join(str(project.pk) for project in projects)}")
+
+    def report(self, written):
+        self.stderr.write(f"{written['pages']} pages, {written['sections']} sections, {written['tasks']} tasks written")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from checklists.uploads import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Stores staged project images in media storage, retrying failed uploads with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run the due jobs once and exit.")
+        parser.add_argument("--batch", type=int, default=10, help="Jobs claimed per round.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when there is nothing to do.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            succeeded, failed = run_pending_jobs(options["batch"])
+            if succeeded or failed:
+                self.stdout.write(f"{succeeded} uploaded, {failed} failed.")
+            if options["once"]:
+                return
+            if not (succeeded or failed):
+                time.sleep(options["interval"])
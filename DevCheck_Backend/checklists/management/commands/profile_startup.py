@@ -0,0 +1,70 @@
+import json
+import statistics
+import subprocess
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from checklists.coldstart import measure_cold_start
+from checklists.conf import checklists_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts the application in fresh processes and reports the time to import it, the time to answer the "
+        "first request, and the slowest modules and packages from -X importtime, as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3, help="Cold starts to take the median of.")
+        parser.add_argument("--path", default="/checklists/user/", help="Path of the first request.")
+        parser.add_argument("--limit", type=int, default=20, help="How many modules and packages to list.")
+        parser.add_argument("--output", help="Also write the report to this file.")
+
+    def handle(self, *args, **options):
+        # -X importtime slows imports down, so it only runs once, after the timed starts
+        runs = [measure_cold_start(options["path"]) for _ in range(options["runs"])]
+        modules = measure_cold_start(options["path"], importtime=True)["modules"]
+
+        packages = Counter()
+        for name, self_us, _, _ in modules:
+            packages[name.split(".")[0]] += self_us
+
+        budget = checklists_setting("COLD_START_BUDGET_MS")
+        total = statistics.median(run["total_ms"] for run in runs)
+        report = {
+            "commit": self.git("rev-parse", "HEAD"),
+            "dirty": bool(self.git("status", "--porcelain", "--untracked-files=no")),
+            "path": options["path"],
+            "status": runs[-1]["status"],
+            "runs": len(runs),
+            "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+            "first_request_ms": round(statistics.median(run["first_request_ms"] for run in runs), 1),
+            "total_ms": round(total, 1),
+            "budget_ms": budget,
+            "packages": [
+                {"package": name, "self_ms": round(us / 1000, 1)}
+                for name, us in packages.most_common(options["limit"])
+            ],
+            "modules": [
+                {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative_us / 1000, 1)}
+                for name, self_us, cumulative_us, _ in sorted(modules, key=lambda m: -m[1])[:options["limit"]]
+            ],
+        }
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        if total > budget:
+            self.stderr.write(self.style.WARNING(f"Cold start took {total:.0f} ms, over the {budget} ms budget."))
+
+    def git(self, *args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
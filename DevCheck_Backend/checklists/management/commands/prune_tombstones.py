@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from checklists.conf import checklists_setting
+from checklists.models import Project, Tombstone
+
+
+class Command(BaseCommand):
+    help = "Deletes old tombstones and raises each affected project's sync floor past them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None,
+            help="Keep tombstones younger than this many days (default: TOMBSTONE_RETENTION_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = checklists_setting("TOMBSTONE_RETENTION_DAYS")
+        expired = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days))
+
+        with transaction.atomic():
+            # clients that last synced before a pruned deletion can no longer get a delta
+            newest_pruned = (
+                expired.filter(project=OuterRef("pk"))
+                .values("project")
+                .annotate(seq=Max("change_seq"))
+                .values("seq")
+            )
+            projects = Project.objects.filter(pk__in=expired.values("project_id")).update(
+                sync_floor=Greatest("sync_floor", Subquery(newest_pruned)),
+            )
+            deleted, _ = expired.delete()
+
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones from {projects} projects."))
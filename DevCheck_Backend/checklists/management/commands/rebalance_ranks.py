@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from checklists.models import Page, Task
+from checklists.ranks import rebalance
+
+
+class Command(BaseCommand):
+    help = "Respaces page and task orders within each parent where rows share an order."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Respace every project's pages and every section's tasks.")
+
+    def handle(self, *args, **options):
+        # moves respace a parent themselves once its gaps run out; this catches rows written with colliding
+        # orders (explicit orders, concurrent moves) and can respace everything after bulk loads
+        for model, parent_field in ((Page, "project_id"), (Task, "section_id")):
+            parents = model.objects.values(parent_field)
+            if not options["all"]:
+                parents = parents.annotate(rows=Count("id"), ranks=Count("order", distinct=True)).filter(rows__gt=F("ranks"))
+            parent_ids = list(parents.values_list(parent_field, flat=True).distinct())
+            for parent_id in parent_ids:
+                rebalance(model.objects.filter(**{parent_field: parent_id}))
+            self.stdout.write(f"Respaced {model._meta.verbose_name_plural} in {len(parent_ids)} parents.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from checklists import search
+
+
+class Command(BaseCommand):
+    help = "Rewrites the search entries of every project, page and task, and with them the full-text index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Objects read and written per query.")
+
+    def handle(self, *args, **options):
+        written = search.rebuild(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} projects, pages and tasks."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from checklists import stats
+from checklists.models import DailyProjectStats, DailyUserStats
+
+
+class Command(BaseCommand):
+    help = "Recomputes the daily task rollups from the tasks table, or with --check only compares them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Report rollup rows that differ instead of rewriting them.")
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            projects, users = stats.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {projects} project and {users} user rollup rows."))
+            return
+
+        projects, users = stats.expected_rollups()
+        stored_projects = {
+            (row.project_id, row.stage, row.day): row for row in DailyProjectStats.objects.all()
+        }
+        stored_users = {(row.user_id, row.day): row for row in DailyUserStats.objects.all()}
+
+        differences = 0
+        for label, expected, stored in (("project", projects, stored_projects), ("user", users, stored_users)):
+            for key in expected.keys() | stored.keys():
+                want = expected.get(key, {})
+                row = stored.get(key)
+                have = {"created": row.created, "completed": row.completed} if row else {}
+                if any(want.get(field, 0) != have.get(field, 0) for field in ("created", "completed")):
+                    differences += 1
+                    self.stdout.write(f"{label} {key}: stored {dict(have)}, expected {dict(want)}")
+
+        if differences:
+            raise CommandError(f"{differences} rollup rows differ; run without --check to rebuild them.")
+        self.stdout.write(self.style.SUCCESS("The rollups match the tasks table."))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from checklists.counters import TASK_PARENTS, actual_counts
+from checklists.models import Project
+from checklists.signals import record_changes
+
+
+class Command(BaseCommand):
+    help = "Compares the task counters of sections, pages and projects with the tasks table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Recount the rows that have drifted.")
+
+    def handle(self, *args, **options):
+        drifted = {}
+        for model in TASK_PARENTS:
+            task_count, completed_count = actual_counts(model)
+            rows = list(
+                model.objects.annotate(actual_tasks=task_count, actual_completed=completed_count)
+                .exclude(task_count=F("actual_tasks"), completed_count=F("actual_completed"))
+                .values_list("pk", "task_count", "completed_count", "actual_tasks", "actual_completed")
+            )
+            for pk, tasks, completed, actual_tasks, actual_completed in rows:
+                self.stdout.write(
+                    f"{model._meta.verbose_name} {pk}: {completed}/{tasks} stored, {actual_completed}/{actual_tasks} counted"
+                )
+            drifted[model] = [row[0] for row in rows]
+            self.stdout.write(f"{len(rows)} drifted {model._meta.verbose_name_plural}.")
+
+        if not options["fix"] or not any(drifted.values()):
+            return
+
+        with transaction.atomic():
+            project_ids = set(drifted[Project])
+            for model, pks in drifted.items():
+                if pks:
+                    task_count, completed_count = actual_counts(model)
+                    model.objects.filter(pk__in=pks).update(task_count=task_count, completed_count=completed_count)
+                    if model is not Project:
+                        project_ids.update(model.objects.filter(pk__in=pks).values_list("project_id", flat=True))
+            # new versions, so ETags, cached trees and delta sync all pick up the recounted rows
+            record_changes(project_ids)
+            for model, pks in drifted.items():
+                if pks and model is not Project:
+                    versions = Project.objects.filter(pk=OuterRef("project_id")).values("version")
+                    model.objects.filter(pk__in=pks).update(change_seq=Subquery(versions))
+        self.stdout.write(self.style.SUCCESS("Fixed."))
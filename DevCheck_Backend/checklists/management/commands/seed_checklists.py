@@ -0,0 +1,90 @@
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from checklists import counters, search, stats
+from checklists.models import Project, Page, ChecklistSection, Task, RANK_GAP
+
+SECTION_TITLES = ["MVP", "DEV", "DEPLOY"]
+
+
+class Command(BaseCommand):
+    help = "Generates synthetic users, projects, pages, sections and tasks for load testing (see bench_api)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--projects", type=int, default=5, help="Projects per user.")
+        parser.add_argument("--pages", type=int, default=10, help="Pages per project.")
+        parser.add_argument("--tasks", type=int, default=20, help="Tasks per page, spread over its three sections.")
+        parser.add_argument("--prefix", default="load", help="Username prefix; users are named <prefix>-<n>.")
+        parser.add_argument("--password", default="load-test", help="Password given to every generated user.")
+        parser.add_argument("--clear", action="store_true", help="Delete users with this prefix (and their data) first.")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        prefix, batch_size = options["prefix"], options["batch_size"]
+
+        with transaction.atomic():
+            if options["clear"]:
+                deleted = self.clear(prefix)
+                self.stdout.write(f"Deleted {deleted} existing {prefix} users.")
+
+            start = User.objects.filter(username__startswith=f"{prefix}-").count()
+            # hashing is deliberately slow, so every user shares one hash
+            password = make_password(options["password"])
+            users = User.objects.bulk_create([
+                User(username=f"{prefix}-{start + i}", password=password)
+                for i in range(options["users"])
+            ], batch_size=batch_size)
+
+            projects = Project.objects.bulk_create([
+                Project(owner=user, name=f"Project {i}", description=f"Generated project {i} of {user.username}")
+                for user in users for i in range(options["projects"])
+            ], batch_size=batch_size)
+
+            pages = Page.objects.bulk_create([
+                Page(project=project, name=f"Page {i}", order=(i + 1) * RANK_GAP)
+                for project in projects for i in range(options["pages"])
+            ], batch_size=batch_size)
+
+            sections = ChecklistSection.objects.bulk_create([
+                ChecklistSection(page=page, project_id=page.project_id, owner_id=page.project.owner_id, title=title, order=i)
+                for page in pages for i, title in enumerate(SECTION_TITLES)
+            ], batch_size=batch_size)
+
+            tasks = Task.objects.bulk_create(
+                self.tasks(sections, options["tasks"]),
+                batch_size=batch_size,
+            )
+            stats.record_tasks(tasks)
+            counters.record_tasks(tasks)
+            search.index(projects + pages + tasks)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users, {len(projects)} projects, {len(pages)} pages, "
+            f"{len(sections)} sections and {len(tasks)} tasks. Password: {options['password']}"
+        ))
+
+    def tasks(self, sections, per_page):
+        for page_index in range(0, len(sections), len(SECTION_TITLES)):
+            page_sections = sections[page_index:page_index + len(SECTION_TITLES)]
+            for i in range(per_page):
+                section = page_sections[i % len(page_sections)]
+                task = Task(
+                    section=section, project_id=section.project_id, owner_id=section.owner_id,
+                    title=f"Task {i}", completed=i % 3 == 0, order=(i // len(page_sections) + 1) * RANK_GAP,
+                )
+                task.stamp_completion()
+                yield task
+
+    def clear(self, prefix):
+        users = User.objects.filter(username__startswith=f"{prefix}-")
+        count = users.count()
+        # delete bottom-up with raw deletes; going through the ORM cascade would load every row
+        for model in (Task, ChecklistSection):
+            model.objects.filter(owner__in=users)._raw_delete(model.objects.db)
+        Page.objects.filter(project__owner__in=users)._raw_delete(Page.objects.db)
+        Project.objects.filter(owner__in=users).delete()
+        users.delete()
+        return count
@@ -0,0 +1,206 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import JSONRenderer
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .conf import checklists_setting
+
+logger = logging.getLogger(__name__)
+
+# "IN (%s, %s, ...)" differs by length only, so collapse it
+_IN_LIST = re.compile(r"IN \((?:%s(?:, )?)+\)")
+
+# the QueryStats of the request SQLInstrumentationMiddleware is timing, if any
+_current_stats = ContextVar("sql_instrumentation_stats", default=None)
+
+
+def fingerprint(sql):
+    # queries reach execute_wrapper with their parameters still separate, so the template is the SQL itself
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.templates = Counter()
+        # time in serializing() blocks, less the queries run inside them
+        self.serialize_seconds = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds += elapsed
+            if self.serializing:
+                self.serialize_seconds -= elapsed
+            self.count += 1
+            self.templates[fingerprint(sql)] += 1
+
+
+@contextmanager
+def serializing():
+    """Count the time spent in the block as serialization of the current request, if it is being instrumented.
+
+    Nested blocks are counted once. Queries run inside the block (lazy querysets a serializer evaluates)
+    are counted as db time only.
+    """
+    stats = _current_stats.get()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_seconds += time.perf_counter() - start
+        stats.serializing = False
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer whose encoding counts as serialization; set as the renderer when instrumentation is on."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializing():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def count_queries(execute, sql, params, many, context):
+    # installed on every connection; counts towards the request being instrumented in this context, if any.
+    # Under ASGI queries run on a worker thread's connection, which sees the request's context through
+    # sync_to_async
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def _install(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def _connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+def _request_started(sender, **kwargs):
+    # sent on the thread that runs the request's sync code, so connections opened there before the
+    # middleware was loaded get the wrapper too
+    for alias in connections:
+        _install(connections[alias])
+
+
+class SQLInstrumentationMiddleware:
+    """Times the database work, serialization and total time of each request and reports them in ``Server-Timing``.
+
+    Serialization is the time spent in ``serializing()`` blocks: the output serializers' ``.data``, DRF's
+    JSON rendering (TimedJSONRenderer) and the responses views build by hand. Logs a warning when one
+    query template runs more than SQL_REPEAT_THRESHOLD times in a request, which usually means a loop that
+    should be a join or a prefetch. Enabled with SQL_INSTRUMENTATION=True.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_connection_created, dispatch_uid="checklists.sql_instrumentation")
+        request_started.connect(_request_started, dispatch_uid="checklists.sql_instrumentation")
+        _request_started(None)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, start = QueryStats(), time.perf_counter()
+        with self.instrumented(stats):
+            response = self.get_response(request)
+        return self.report(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats, start = QueryStats(), time.perf_counter()
+        with self.instrumented(stats):
+            response = await self.get_response(request)
+        return self.report(request, response, stats, start)
+
+    @contextmanager
+    def instrumented(self, stats):
+        token = _current_stats.set(stats)
+        try:
+            yield
+        finally:
+            _current_stats.reset(token)
+
+    def report(self, request, response, stats, start):
+        total = (time.perf_counter() - start) * 1000
+        db = stats.seconds * 1000
+        render = stats.serialize_seconds * 1000
+        response['Server-Timing'] = ", ".join([
+            f'db;dur={db:.1f};desc="{stats.count} queries"',
+            f'render;dur={render:.1f};desc="serialization"',
+            f"app;dur={max(total - db - render, 0):.1f}",
+            f"total;dur={total:.1f}",
+        ])
+
+        threshold = checklists_setting('SQL_REPEAT_THRESHOLD')
+        for template, count in stats.templates.most_common():
+            if count <= threshold:
+                break
+            logger.warning(
+                "Query repeated %s times in one request to %s (possible N+1): %s",
+                count, _view_name(request), template,
+            )
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that stays on the event loop under ASGI.
+
+    WhiteNoiseMiddleware is sync only, so Django would run it, and every request behind it, in a thread,
+    and the async views would gain nothing. Finding a static file is a dict lookup, so it is safe to do
+    it on the loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path
+    return match.view_name or match._func_path
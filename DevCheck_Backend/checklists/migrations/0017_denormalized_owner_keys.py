@@ -0,0 +1,73 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    Page = apps.get_model('checklists', 'Page')
+    ChecklistSection = apps.get_model('checklists', 'ChecklistSection')
+    Task = apps.get_model('checklists', 'Task')
+
+    pages = Page.objects.filter(pk=OuterRef('page_id'))
+    ChecklistSection.objects.update(
+        project_id=Subquery(pages.values('project_id')),
+        owner_id=Subquery(pages.values('project__owner_id')),
+    )
+    sections = ChecklistSection.objects.filter(pk=OuterRef('section_id'))
+    Task.objects.update(
+        project_id=Subquery(sections.values('project_id')),
+        owner_id=Subquery(sections.values('owner_id')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0016_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklistsection',
+            name='project',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklists.project'),
+        ),
+        migrations.AddField(
+            model_name='checklistsection',
+            name='owner',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='project',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklists.project'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='owner',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='checklistsection',
+            name='project',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklists.project'),
+        ),
+        migrations.AlterField(
+            model_name='checklistsection',
+            name='owner',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='project',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklists.project'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='owner',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
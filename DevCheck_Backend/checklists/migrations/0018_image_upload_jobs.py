@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_images(apps, schema_editor):
+    Project = apps.get_model('checklists', 'Project')
+    Project.objects.exclude(image='').exclude(image__isnull=True).update(image_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0017_denormalized_owner_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='image_status',
+            field=models.CharField(choices=[('none', 'No image'), ('pending', 'Uploading'), ('ready', 'Ready'), ('failed', 'Upload failed')], default='none', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_images, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ImageUploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('staged_name', models.CharField(max_length=255)),
+                ('filename', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_jobs', to='checklists.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='imagejob_status_run_after_idx')],
+            },
+        ),
+    ]
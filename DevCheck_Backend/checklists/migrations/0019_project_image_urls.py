@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0018_image_upload_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='image_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
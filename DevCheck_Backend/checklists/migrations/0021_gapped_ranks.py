@@ -0,0 +1,37 @@
+from django.db import migrations
+
+RANK_GAP = 1024
+
+
+def respace(apps, schema_editor):
+    # spread the existing dense orders RANK_GAP apart so moves have room between neighbours
+    for model_name, parent_field in (('Page', 'project_id'), ('Task', 'section_id')):
+        model = apps.get_model('checklists', model_name)
+        rows = list(model.objects.order_by(parent_field, 'order', 'id').only('id', parent_field, 'order'))
+        parent, position = None, 0
+        for row in rows:
+            if getattr(row, parent_field) != parent:
+                parent, position = getattr(row, parent_field), 0
+            position += 1
+            row.order = position * RANK_GAP
+        model.objects.bulk_update(rows, ['order'], batch_size=500)
+
+
+def compact(apps, schema_editor):
+    for model_name in ('Page', 'Task'):
+        model = apps.get_model('checklists', model_name)
+        rows = list(model.objects.only('id', 'order'))
+        for row in rows:
+            row.order //= RANK_GAP
+        model.objects.bulk_update(rows, ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0020_delta_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(respace, compact),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:13
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+
+def build_rollups(apps, schema_editor):
+    Task = apps.get_model('checklists', 'Task')
+    DailyProjectStats = apps.get_model('checklists', 'DailyProjectStats')
+    DailyUserStats = apps.get_model('checklists', 'DailyUserStats')
+
+    # when existing tasks were checked off wasn't recorded; count them as done the day they were created
+    Task.objects.filter(completed=True).update(completed_at=F('created_at'))
+
+    projects, users = defaultdict(Counter), defaultdict(Counter)
+    for field in ('created', 'completed'):
+        rows = (
+            Task.objects.filter(**{f'{field}_at__isnull': False})
+            .values('project_id', 'owner_id', stage=F('section__title'), day=TruncDate(f'{field}_at'))
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            projects[row['project_id'], row['stage'], row['day']][field] += row['count']
+            users[row['owner_id'], row['day']][field] += row['count']
+
+    DailyProjectStats.objects.bulk_create([
+        DailyProjectStats(project_id=project_id, stage=stage, day=day, **counts)
+        for (project_id, stage, day), counts in projects.items()
+    ], batch_size=1000)
+    DailyUserStats.objects.bulk_create([
+        DailyUserStats(user_id=user_id, day=day, **counts)
+        for (user_id, day), counts in users.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0021_gapped_ranks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyProjectStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('created', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('stage', models.CharField(max_length=20)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='checklists.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'day', 'stage'), name='project_stats_day_stage_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyUserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('created', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_task_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='user_stats_day_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_tasks(apps, schema_editor):
+    Task = apps.get_model('checklists', 'Task')
+    for model_name, parent in (('ChecklistSection', 'section'), ('Page', 'section__page'), ('Project', 'project')):
+        tasks = Task.objects.filter(**{parent: OuterRef('pk')}).order_by().values(parent)
+        apps.get_model('checklists', model_name).objects.update(
+            task_count=Coalesce(Subquery(tasks.annotate(count=Count('pk')).values('count')), 0),
+            completed_count=Coalesce(Subquery(tasks.filter(completed=True).annotate(count=Count('pk')).values('count')), 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0022_task_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklistsection',
+            name='completed_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='checklistsection',
+            name='task_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='completed_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='task_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='completed_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# the full-text index over checklists_searchentry, per database vendor: (create, drop)
+INDEX_SQL = {
+    # an external content FTS5 table, so the text is stored once, kept current by triggers. owner_id is
+    # indexed as a token, which lets a search match only the rows of one account
+    'sqlite': ([
+        """
+        CREATE VIRTUAL TABLE checklists_searchentry_fts USING fts5(
+            owner_id, title, body,
+            content='checklists_searchentry', content_rowid='id', tokenize='porter unicode61', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER checklists_searchentry_ai AFTER INSERT ON checklists_searchentry BEGIN
+            INSERT INTO checklists_searchentry_fts (rowid, owner_id, title, body)
+            VALUES (new.id, new.owner_id, new.title, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER checklists_searchentry_ad AFTER DELETE ON checklists_searchentry BEGIN
+            INSERT INTO checklists_searchentry_fts (checklists_searchentry_fts, rowid, owner_id, title, body)
+            VALUES ('delete', old.id, old.owner_id, old.title, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER checklists_searchentry_au AFTER UPDATE ON checklists_searchentry BEGIN
+            INSERT INTO checklists_searchentry_fts (checklists_searchentry_fts, rowid, owner_id, title, body)
+            VALUES ('delete', old.id, old.owner_id, old.title, old.body);
+            INSERT INTO checklists_searchentry_fts (rowid, owner_id, title, body)
+            VALUES (new.id, new.owner_id, new.title, new.body);
+        END
+        """,
+    ], [
+        "DROP TRIGGER checklists_searchentry_au",
+        "DROP TRIGGER checklists_searchentry_ad",
+        "DROP TRIGGER checklists_searchentry_ai",
+        "DROP TABLE checklists_searchentry_fts",
+    ]),
+    # a generated tsvector column; btree_gin lets one GIN index cover the owner and the text
+    'postgresql': ([
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        """
+        ALTER TABLE checklists_searchentry ADD COLUMN document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX search_entry_document_idx ON checklists_searchentry USING gin (owner_id, document)",
+    ], [
+        "DROP INDEX search_entry_document_idx",
+        "ALTER TABLE checklists_searchentry DROP COLUMN document",
+    ]),
+}
+
+
+def create_index(apps, schema_editor):
+    for statement in INDEX_SQL.get(schema_editor.connection.vendor, ([], []))[0]:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    for statement in INDEX_SQL.get(schema_editor.connection.vendor, ([], []))[1]:
+        schema_editor.execute(statement)
+
+
+def index_existing(apps, schema_editor):
+    SearchEntry = apps.get_model('checklists', 'SearchEntry')
+    Project = apps.get_model('checklists', 'Project')
+    Page = apps.get_model('checklists', 'Page')
+    Task = apps.get_model('checklists', 'Task')
+
+    def entries():
+        for pk, owner_id, name, description in Project.objects.values_list('pk', 'owner_id', 'name', 'description').iterator():
+            yield SearchEntry(kind='project', object_id=pk, owner_id=owner_id, project_id=pk, title=name, body=description)
+        pages = Page.objects.values_list('pk', 'project__owner_id', 'project_id', 'name')
+        for pk, owner_id, project_id, name in pages.iterator():
+            yield SearchEntry(kind='page', object_id=pk, owner_id=owner_id, project_id=project_id, page_id=pk, title=name)
+        tasks = Task.objects.values_list('pk', 'owner_id', 'project_id', 'section__page_id', 'title')
+        for pk, owner_id, project_id, page_id, title in tasks.iterator():
+            yield SearchEntry(
+                kind='task', object_id=pk, owner_id=owner_id, project_id=project_id, page_id=page_id, task_id=pk, title=title,
+            )
+
+    batch = []
+    for entry in entries():
+        batch.append(entry)
+        if len(batch) == 1000:
+            SearchEntry.objects.bulk_create(batch)
+            batch = []
+    SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0023_task_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('page', 'Page'), ('task', 'Task')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('page', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklists.page')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklists.project')),
+                ('task', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklists.task')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_entry_object_uniq')],
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0024_search_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageuploadjob',
+            name='stored_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
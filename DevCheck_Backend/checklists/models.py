@@ -1,8 +1,60 @@
-from django.db import models
+from django.db import connections, models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
-from django.conf import settings
-print(settings.DEFAULT_FILE_STORAGE)
+class LoadedValuesMixin:
+    """Remembers the database values of ``tracked_fields`` so ``save()`` can tell what changed."""
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {name: instance.__dict__.get(name) for name in cls.tracked_fields}
+        return instance
+
+    def has_changed(self, name):
+        loaded = getattr(self, '_loaded_values', None)
+        return loaded is None or loaded.get(name) != getattr(self, name)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {name: getattr(self, name) for name in self.tracked_fields}
+
+# pages and tasks are ordered RANK_GAP apart so a move can take the midpoint of its new neighbours
+# (see checklists.ranks)
+RANK_GAP = 1024
+
+class ChangeSeqMixin:
+    """Makes partial saves of delta-synced rows also write ``change_seq``, which checklists.signals stamps in pre_save."""
+
+    def save(self, *args, **kwargs):
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "change_seq"}
+        super().save(*args, **kwargs)
+
+class TaskCounts(models.Model):
+    """How many tasks sit below a section, page or project, and how many of them are completed.
+
+    Only ever changed with F() updates (see checklists.counters), so saving a loaded row leaves them out
+    rather than writing back values that may have moved on since it was read. Subclasses add their own
+    such fields to ``write_only_by_update``.
+    """
+    task_count = models.IntegerField(default=0, editable=False)
+    completed_count = models.IntegerField(default=0, editable=False)
+
+    COUNT_FIELDS = ("task_count", "completed_count")
+    write_only_by_update = COUNT_FIELDS
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.write_only_by_update
+            ]
+        super().save(*args, **kwargs)
 
 class Issue(models.Model):
     """A issue form for superusers to check suggestions / live issues in development"""
@@ -10,31 +62,109 @@ class Issue(models.Model):
     description = models.TextField()
     date_submitted = models.DateTimeField(auto_now_add=True)
 
-class Project(models.Model):
+    class Meta:
+        indexes = [models.Index(fields=["date_submitted"], name="issue_submitted_idx")]
+
+class ProjectManager(models.Manager):
+    def bump_versions(self, project_ids):
+        """Increment the version of the given projects and return {project id: new version}.
+
+        Call inside a transaction when the new versions are written anywhere else.
+        """
+        project_ids = sorted(set(project_ids))
+        if not project_ids:
+            return {}
+        connection = connections[self.db]
+        if connection.vendor not in ("postgresql", "sqlite"):
+            self.filter(pk__in=project_ids).update(version=models.F("version") + 1)
+            return dict(self.filter(pk__in=project_ids).values_list("pk", "version"))
+
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ", ".join(["%s"] * len(project_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET version = version + 1 WHERE id IN ({placeholders}) RETURNING id, version",
+                project_ids,
+            )
+            return dict(cursor.fetchall())
+
+
+class Project(LoadedValuesMixin, TaskCounts):
     """A project groups related website pages together."""
+    IMAGE_STATUS_CHOICES = [
+        ("none", "No image"),
+        ("pending", "Uploading"),
+        ("ready", "Ready"),
+        ("failed", "Upload failed"),
+    ]
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="projects")
     name = models.CharField(max_length=100)
     description = models.TextField()
     link = models.URLField(blank=True, null=True)
     image = models.ImageField(blank=True, null=True, upload_to='projects/')
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default="none")
+    # stored URLs of the original image and its resized variants (see checklists.images)
+    image_urls = models.JSONField(default=dict, blank=True, editable=False)
     project_status = models.CharField(max_length=20, default="MVP")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True)
+    # bumped whenever the project or any of its pages, sections or tasks change (see checklists.signals)
+    version = models.PositiveBigIntegerField(default=1, editable=False)
+    # oldest version delta sync can still answer from; raised when tombstones are pruned
+    sync_floor = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = ProjectManager()
+
+    tracked_fields = ("owner_id", "name", "description")
+    # bumped with F() by record_changes() and written by the upload worker; a full save of a loaded
+    # project would otherwise put back the values it read
+    write_only_by_update = TaskCounts.COUNT_FIELDS + ("version", "sync_floor", "image", "image_status", "image_urls")
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "updated_at"], name="project_owner_updated_idx")]
 
     def __str__(self):
         return self.name
 
-class Page(models.Model):
+    def save(self, *args, **kwargs):
+        moved = self.pk is not None and self.has_changed("owner_id")
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                ChecklistSection.objects.filter(project=self).update(owner_id=self.owner_id)
+                Task.objects.filter(project=self).update(owner_id=self.owner_id)
+
+class Page(ChangeSeqMixin, LoadedValuesMixin, TaskCounts):
     """Each page belongs to a project and has its own checklists."""
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="pages")
     name = models.CharField(max_length=100)
     order = models.PositiveIntegerField(default=0)
+    # project version this row was last written at (see checklists.signals)
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
+
+    tracked_fields = ("project_id", "name")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "order", "id"], name="page_project_order_idx"),
+            models.Index(fields=["project", "change_seq"], name="page_project_seq_idx"),
+        ]
 
     def __str__(self):
         return f"{self.project.name} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        moved = self.pk is not None and self.has_changed("project_id")
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                owner_id = Project.objects.values_list("owner_id", flat=True).get(pk=self.project_id)
+                fields = dict(project_id=self.project_id, owner_id=owner_id, change_seq=self.change_seq)
+                ChecklistSection.objects.filter(page=self).update(**fields)
+                Task.objects.filter(section__page=self).update(**fields)
 
-class ChecklistSection(models.Model):
+
+class ChecklistSection(ChangeSeqMixin, LoadedValuesMixin, TaskCounts):
     """Sections organize tasks by development stage."""
     SECTION_CHOICES = [
         ("MVP", "MVP"),
@@ -44,21 +174,187 @@ class ChecklistSection(models.Model):
     page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="sections")
     title = models.CharField(max_length=20, choices=SECTION_CHOICES)
     order = models.IntegerField(default=0)
+    # copied from the page so ownership checks don't need joins; kept in sync by save()
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="+", editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", editable=False)
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
+
+    tracked_fields = ("page_id", "project_id", "title")
 
     class Meta:
         unique_together = ("page", "title")  # One section of each type per page
+        indexes = [models.Index(fields=["project", "change_seq"], name="section_project_seq_idx")]
 
     def __str__(self):
         return f"{self.page.name} - {self.get_title_display()}"
 
+    def save(self, *args, **kwargs):
+        moved = self.pk is not None and self.has_changed("page_id")
+        if self.project_id is None or self.owner_id is None or moved:
+            self.project_id, self.owner_id = Page.objects.values_list("project_id", "project__owner_id").get(pk=self.page_id)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                Task.objects.filter(section=self).update(
+                    project_id=self.project_id, owner_id=self.owner_id, change_seq=self.change_seq,
+                )
 
-class Task(models.Model):
+
+class Task(ChangeSeqMixin, LoadedValuesMixin, models.Model):
     """Individual tasks within a checklist section."""
     section = models.ForeignKey(ChecklistSection, on_delete=models.CASCADE, related_name="tasks")
     title = models.CharField(max_length=200)
     completed = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # set when the task is checked off, cleared when it is reopened
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # copied from the section so ownership checks don't need joins; kept in sync by save()
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="+", editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", editable=False)
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
+
+    tracked_fields = ("section_id", "project_id", "owner_id", "completed", "completed_at", "title")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["section", "order", "id"], name="task_section_order_idx"),
+            models.Index(fields=["project", "change_seq"], name="task_project_seq_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({'done' if self.completed else 'pending'})"
+
+    def stamp_completion(self):
+        """Keep ``completed_at`` in step with ``completed``. Bulk writes call this themselves."""
+        if self.completed and self.completed_at is None:
+            self.completed_at = timezone.now()
+        elif not self.completed:
+            self.completed_at = None
+
+    def save(self, *args, **kwargs):
+        if self.project_id is None or self.owner_id is None or (self.pk is not None and self.has_changed("section_id")):
+            self.project_id, self.owner_id = self.section.project_id, self.section.owner_id
+        self.stamp_completion()
+        if kwargs.get("update_fields") is not None and "completed" in kwargs["update_fields"]:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "completed_at"}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Tombstone(models.Model):
+    """Marks a deleted page, section or task so delta sync can tell clients to drop it."""
+    MODEL_CHOICES = [
+        ("page", "Page"),
+        ("section", "Section"),
+        ("task", "Task"),
+    ]
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="tombstones")
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    change_seq = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "change_seq"], name="tombstone_project_seq_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} (v{self.change_seq})"
+
+
+class DailyStats(models.Model):
+    """How many tasks were created and completed on ``day``.
+
+    Counts only tasks that still exist and, for ``completed``, are still checked off, so deleting or
+    reopening a task takes it back out of its day. Kept up to date by checklists.stats.
+    """
+    day = models.DateField()
+    created = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailyProjectStats(DailyStats):
+    """Daily task rollup of one stage (section title) of a project."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="daily_stats")
+    stage = models.CharField(max_length=20)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["project", "day", "stage"], name="project_stats_day_stage_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} {self.stage} {self.day}: +{self.created} / {self.completed} done"
+
+
+class DailyUserStats(DailyStats):
+    """Daily task rollup of everything a user owns."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_task_stats")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "day"], name="user_stats_day_uniq")]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: +{self.created} / {self.completed} done"
+
+
+class SearchEntry(models.Model):
+    """The searchable text of a project, page or task, copied here for the full-text index.
+
+    The index itself is database specific and lives outside the model: an FTS5 table kept current by
+    triggers on SQLite, a generated tsvector column with a GIN index on PostgreSQL (see migration 0024).
+    Rows are written by checklists.search and go away with the object they describe.
+    """
+    KIND_CHOICES = [
+        ("project", "Project"),
+        ("page", "Page"),
+        ("task", "Task"),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="+")
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="+", null=True)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="+", null=True)
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["kind", "object_id"], name="search_entry_object_uniq")]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+
+class ImageUploadJob(models.Model):
+    """A project image staged on local disk, waiting for the process_image_jobs worker to store it."""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+        ("cancelled", "Cancelled"),
+    ]
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="image_jobs")
+    staged_name = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    # name of the original in media storage once an attempt has stored it, so retries don't upload it again
+    stored_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # earliest time the job may run; while running it is the end of the worker's lease
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"], name="imagejob_status_run_after_idx")]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
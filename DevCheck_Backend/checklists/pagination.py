@@ -0,0 +1,133 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """Opt-in cursor pagination over a unique ordering, e.g. ``('order', 'id')``.
+
+    Lists are returned whole unless the client asks for a page: ``?limit=N`` returns the first N rows
+    and a ``next`` cursor, ``?cursor=...`` continues from it and ``?limit=all`` explicitly asks for
+    everything. Each page is a range query on the ordering columns, so page N costs the same as page 1.
+    Views set ``keyset_ordering``; prefix a field with ``-`` for descending order.
+    """
+    default_limit = 20
+    max_limit = 200
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = request.query_params.get('limit')
+        cursor = request.query_params.get('cursor')
+        if (limit is None and cursor is None) or limit == 'all':
+            return None
+
+        self.ordering = [
+            (name.lstrip('-'), name.startswith('-'), queryset.model._meta.get_field(name.lstrip('-')))
+            for name in view.keyset_ordering
+        ]
+        position = None
+        if cursor is not None:
+            position, cursor_limit = self.decode_cursor(cursor)
+            limit = limit or cursor_limit
+        self.limit = self.get_limit(limit)
+
+        queryset = queryset.order_by(*[self.order_expression(name, descending, field) for name, descending, field in self.ordering])
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        next_cursor = None
+        if self.has_next:
+            last = self.page[-1]
+            next_cursor = self.encode_cursor([field.value_to_string(last) if getattr(last, field.attname) is not None else None
+                                              for _, _, field in self.ordering])
+        return Response({'next': next_cursor, 'results': data})
+
+    def get_limit(self, limit):
+        try:
+            limit = int(limit) if limit is not None else self.default_limit
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def order_expression(self, name, descending, field):
+        expression = F(name)
+        if field.null:
+            return expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True)
+        return expression.desc() if descending else expression.asc()
+
+    def after(self, position):
+        # (a, b) > (x, y) in the view's ordering, with NULLs sorting last
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, field), value in zip(self.ordering, position):
+            if value is None:
+                beyond, same = Q(pk__in=[]), Q(**{f'{name}__isnull': True})
+            else:
+                beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if field.null:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & beyond
+            equal &= same
+        return condition
+
+    def encode_cursor(self, position):
+        payload = json.dumps({'p': position, 'l': self.limit}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position = [
+                field.to_python(value) if value is not None else None
+                for (_, _, field), value in zip(self.ordering, payload['p'], strict=True)
+            ]
+            return position, payload.get('l')
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class SearchPagination(KeysetPagination):
+    """Pages of ranked search results, with the ``?limit`` and ``?cursor`` parameters of KeysetPagination.
+
+    Relevance isn't a column a page can be keyed on, so the cursor holds an offset instead, and results are
+    always paged. Views call ``paginate_search()`` with a function returning ``limit`` results from ``offset``.
+    """
+    def paginate_search(self, find, request):
+        limit = request.query_params.get('limit')
+        cursor = request.query_params.get('cursor')
+        self.offset = 0
+        if cursor is not None:
+            self.offset, cursor_limit = self.decode_cursor(cursor)
+            limit = limit or cursor_limit
+        self.limit = self.get_limit(limit)
+
+        rows = find(self.limit + 1, self.offset)
+        self.has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        next_cursor = self.encode_cursor(self.offset + self.limit) if self.has_next else None
+        return Response({'next': next_cursor, 'results': data})
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            offset = int(payload['p'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if offset < 0:
+            raise NotFound(self.invalid_cursor_message)
+        return offset, payload.get('l')
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .events import publish_changes
+from .models import RANK_GAP as GAP
+from .signals import coalesced_version_bumps, record_changes
+
+MAX_RANK = 2 ** 31 - 1
+
+
+def append_rank(siblings):
+    """The order that puts a new row after every row in ``siblings``."""
+    top = siblings.aggregate(top=Max('order'))['top']
+    return GAP if top is None else top + GAP
+
+
+def assign_append_ranks(instances, parent_field, queryset):
+    """Give unsaved ``instances`` orders after the existing rows of their parents, keeping their list order."""
+    tops = {}
+    for instance in instances:
+        parent_id = getattr(instance, f'{parent_field}_id')
+        if parent_id not in tops:
+            tops[parent_id] = append_rank(queryset.filter(**{f'{parent_field}_id': parent_id})) - GAP
+        tops[parent_id] += GAP
+        instance.order = tops[parent_id]
+
+
+def _free_rank(siblings, before, after):
+    if before is not None:
+        hi = before.order
+        lo = (
+            siblings.filter(Q(order__lt=before.order) | Q(order=before.order, id__lt=before.pk))
+            .order_by('-order', '-id').values_list('order', flat=True).first()
+        )
+        lo = -1 if lo is None else lo
+    elif after is not None:
+        lo = after.order
+        hi = (
+            siblings.filter(Q(order__gt=after.order) | Q(order=after.order, id__gt=after.pk))
+            .order_by('order', 'id').values_list('order', flat=True).first()
+        )
+        hi = lo + 2 * GAP if hi is None else hi
+    else:
+        rank = append_rank(siblings)
+        return rank if rank <= MAX_RANK else None
+
+    if hi - lo < 2 or (lo + hi) // 2 > MAX_RANK:
+        return None
+    return (lo + hi) // 2
+
+
+def rebalance(siblings):
+    """Respace ``siblings`` GAP apart in their current order. Returns {pk: new order}."""
+    rows = list(siblings.order_by('order', 'id'))
+    if not rows:
+        return {}
+    with transaction.atomic(), coalesced_version_bumps():
+        versions = record_changes({row.project_id for row in rows})
+        for index, row in enumerate(rows, start=1):
+            row.order = index * GAP
+            row.change_seq = versions[row.project_id]
+        type(rows[0]).objects.bulk_update(rows, ['order', 'change_seq'], batch_size=500)
+        publish_changes(rows, 'updated')
+    return {row.pk: row.order for row in rows}
+
+
+def move(instance, parent_field, before=None, after=None):
+    """Save ``instance`` directly before ``before``, after ``after``, or at the end of its parent.
+
+    Only ``instance`` is written, unless its new neighbours have no gap left between them; then its
+    siblings are respaced first.
+    """
+    anchor = before if before is not None else after
+    if anchor is not None:
+        setattr(instance, f'{parent_field}_id', getattr(anchor, f'{parent_field}_id'))
+    moved = instance.has_changed(f'{parent_field}_id')
+    siblings = type(instance).objects.filter(
+        **{f'{parent_field}_id': getattr(instance, f'{parent_field}_id')}
+    ).exclude(pk=instance.pk)
+
+    with transaction.atomic(), coalesced_version_bumps():
+        rank = _free_rank(siblings, before, after)
+        if rank is None:
+            orders = rebalance(siblings)
+            if anchor is not None:
+                anchor.order = orders[anchor.pk]
+            rank = _free_rank(siblings, before, after)
+        instance.order = rank
+        if moved:
+            instance.save()
+        else:
+            instance.save(update_fields=['order'])
+    return instance
@@ -0,0 +1,155 @@
+import re
+
+from django.db import connections, transaction
+from django.db.models import F, Q, Value
+
+from .models import ChecklistSection, Page, Project, SearchEntry, Task
+
+# the fields an object's search entry is built from; the entry is rewritten when one of them changes
+INDEXED_FIELDS = {
+    Project: ('name', 'description', 'owner_id'),
+    Page: ('name', 'project_id'),
+    Task: ('title', 'section_id'),
+}
+# words of a query beyond this many are ignored
+MAX_TERMS = 8
+
+SQLITE_SEARCH = """
+    SELECT e.id, e.kind, e.object_id, e.project_id, e.page_id, e.title, p.name AS project_name,
+           -bm25(checklists_searchentry_fts, 0.0, 10.0, 1.0) AS score
+    FROM checklists_searchentry_fts
+    JOIN checklists_searchentry e ON e.id = checklists_searchentry_fts.rowid
+    JOIN checklists_project p ON p.id = e.project_id
+    WHERE checklists_searchentry_fts MATCH %s
+    ORDER BY score DESC, e.id
+    LIMIT %s OFFSET %s
+"""
+
+POSTGRESQL_SEARCH = """
+    SELECT e.id, e.kind, e.object_id, e.project_id, e.page_id, e.title, p.name AS project_name,
+           ts_rank(e.document, query) AS score
+    FROM checklists_searchentry e
+    JOIN checklists_project p ON p.id = e.project_id
+    CROSS JOIN to_tsquery('english', %s) query
+    WHERE e.owner_id = %s AND e.document @@ query
+    ORDER BY score DESC, e.id
+    LIMIT %s OFFSET %s
+"""
+
+
+def _entry(obj, owners, pages):
+    if isinstance(obj, Project):
+        return SearchEntry(
+            kind='project', object_id=obj.pk, owner_id=obj.owner_id, project_id=obj.pk,
+            title=obj.name, body=obj.description,
+        )
+    if isinstance(obj, Page):
+        return SearchEntry(
+            kind='page', object_id=obj.pk, owner_id=owners[obj.project_id], project_id=obj.project_id, page_id=obj.pk,
+            title=obj.name,
+        )
+    return SearchEntry(
+        kind='task', object_id=obj.pk, owner_id=obj.owner_id, project_id=obj.project_id, page_id=pages[obj.section_id],
+        task_id=obj.pk, title=obj.title,
+    )
+
+
+def index(objects, changed_only=True):
+    """Write the search entries of new projects, pages and tasks, and of those whose text or place changed.
+
+    Like ``stats.record_tasks()`` this compares against the objects' loaded values, so call it after the
+    write but before ``save()`` returns, or after ``bulk_create()`` / ``bulk_update()``.
+    """
+    objects = [
+        obj for obj in objects
+        if not changed_only or any(obj.has_changed(name) for name in INDEXED_FIELDS[type(obj)])
+    ]
+    if not objects:
+        return 0
+
+    owners, pages = {}, {}
+    for obj in objects:
+        if isinstance(obj, Page) and Page.project.is_cached(obj):
+            owners[obj.project_id] = obj.project.owner_id
+        elif isinstance(obj, Task) and Task.section.is_cached(obj):
+            pages[obj.section_id] = obj.section.page_id
+    missing = {obj.project_id for obj in objects if isinstance(obj, Page)} - owners.keys()
+    if missing:
+        owners.update(Project.objects.filter(pk__in=missing).values_list('pk', 'owner_id'))
+    missing = {obj.section_id for obj in objects if isinstance(obj, Task)} - pages.keys()
+    if missing:
+        pages.update(ChecklistSection.objects.filter(pk__in=missing).values_list('pk', 'page_id'))
+
+    SearchEntry.objects.bulk_create(
+        [_entry(obj, owners, pages) for obj in objects], batch_size=500,
+        update_conflicts=True, unique_fields=['kind', 'object_id'],
+        update_fields=['owner', 'project', 'page', 'task', 'title', 'body'],
+    )
+    return len(objects)
+
+
+def move_below(obj):
+    """Re-file the entries below ``obj`` after it moved to another owner, project or page. Call after the save."""
+    if isinstance(obj, Project) and obj.has_changed('owner_id'):
+        SearchEntry.objects.filter(project=obj).exclude(kind='project').update(owner_id=obj.owner_id)
+    elif isinstance(obj, Page) and obj.has_changed('project_id'):
+        owner_id = Project.objects.values_list('owner_id', flat=True).get(pk=obj.project_id)
+        SearchEntry.objects.filter(page=obj, kind='task').update(project_id=obj.project_id, owner_id=owner_id)
+    elif isinstance(obj, ChecklistSection) and obj.has_changed('page_id'):
+        SearchEntry.objects.filter(task__section=obj).update(
+            page_id=obj.page_id, project_id=obj.project_id, owner_id=obj.owner_id,
+        )
+
+
+def terms(text):
+    return re.findall(r'[^\W_]+', text.lower())[:MAX_TERMS]
+
+
+def find(owner_id, text, limit, offset=0):
+    """The entries of ``owner_id`` matching every word of ``text``, best first.
+
+    The last word also matches as a prefix, so results follow the user as they type. Each entry carries
+    ``score`` (higher is better) and ``project_name``. The index is scoped by owner, so the cost follows
+    the number of matches in one account rather than the size of the table.
+    """
+    words = terms(text)
+    if not words:
+        return []
+    connection = connections[SearchEntry.objects.db]
+
+    if connection.vendor == 'sqlite':
+        phrases = [f'"{word}"' for word in words[:-1]] + [f'("{words[-1]}" OR "{words[-1]}"*)']
+        match = ' AND '.join([f'owner_id : "{owner_id}"', *(f'{{title body}} : {phrase}' for phrase in phrases)])
+        return list(SearchEntry.objects.raw(SQLITE_SEARCH, [match, limit, offset]))
+
+    if connection.vendor == 'postgresql':
+        query = ' & '.join([*words[:-1], f'{words[-1]}:*'])
+        return list(SearchEntry.objects.raw(POSTGRESQL_SEARCH, [query, owner_id, limit, offset]))
+
+    entries = SearchEntry.objects.filter(owner_id=owner_id)
+    for word in words:
+        entries = entries.filter(Q(title__icontains=word) | Q(body__icontains=word))
+    entries = entries.annotate(project_name=F('project__name'), score=Value(0.0)).order_by('id')
+    return list(entries[offset:offset + limit])
+
+
+def rebuild(batch_size=1000):
+    """Rewrite every search entry from the projects, pages and tasks tables; returns how many were written."""
+    written = 0
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for model, related in ((Project, ()), (Page, ('project',)), (Task, ('section',))):
+            batch = []
+            for obj in model.objects.select_related(*related).order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) == batch_size:
+                    written += index(batch, changed_only=False)
+                    batch = []
+            written += index(batch, changed_only=False)
+
+    connection = connections[SearchEntry.objects.db]
+    if connection.vendor == 'sqlite':
+        # merge the index segments the rewrite left behind
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO checklists_searchentry_fts (checklists_searchentry_fts) VALUES ('optimize')")
+    return written
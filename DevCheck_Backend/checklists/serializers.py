@@ -1,9 +1,35 @@
+import json
+
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import serializers
 
-from .models import Project, Page, ChecklistSection, Task, Issue
+from .activity import last_opened
+from .imports import DEFAULT_SECTIONS, TreeWriter
+from .middleware import serializing
+from .models import Project, Page, ChecklistSection, Task, Issue, SearchEntry, RANK_GAP, TaskCounts
+
+class TimedDataMixin:
+    """Counts reading ``.data`` as serialization when the request is instrumented (see middleware.serializing)."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = cls.__dict__.get('Meta')
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with serializing():
+            return super().data
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+class ModelSerializer(TimedDataMixin, serializers.ModelSerializer):
+    pass
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'password', 'date_joined'] # fields to be serialized on input / return 
@@ -13,21 +39,27 @@ class UserSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         return user
 
-class ChecklistTaskSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        password = validated_data.pop('password', None)
+        if password is not None:
+            instance.set_password(password)
+        return super().update(instance, validated_data)
+
+class ChecklistTaskSerializer(ModelSerializer):
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ['project', 'owner']
         read_only_fields = ['section']
 
-class ChecklistSectionSerializer(serializers.ModelSerializer):
+class ChecklistSectionSerializer(ModelSerializer):
     class Meta:
         model = ChecklistSection
-        fields = '__all__'
+        exclude = ['project', 'owner']
         extra_kwargs = {
             'page': {'read_only': True}
         }
 
-class PageSerializer(serializers.ModelSerializer):
+class PageSerializer(ModelSerializer):
     class Meta:
         model = Page
         fields = '__all__'
@@ -36,56 +68,197 @@ class PageSerializer(serializers.ModelSerializer):
             'project': {'read_only': True} 
         }
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(ModelSerializer):
     image = serializers.SerializerMethodField()
     class Meta:
         model = Project
         fields = '__all__'
+        # counters, versions and the image state are written by the app and the upload worker only
+        read_only_fields = Project.write_only_by_update
         extra_kwargs = {
             'owner': {'read_only': True},
         }
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # opens that haven't been written back yet still count
+        updated_at = last_opened.latest(instance.pk, instance.updated_at)
+        if updated_at != instance.updated_at:
+            data['updated_at'] = self.fields['updated_at'].to_representation(updated_at)
+        return data
+
     def get_image(self, obj):
+        if obj.image_urls:
+            return obj.image_urls['original']
         if obj.image:
             return obj.image.url
         return "https://res.cloudinary.com/dpodsvx94/image/upload/v1769448461/copyLogo_tni1wh.png"
 
-class ChecklistTaskNestedSerializer(serializers.ModelSerializer):
+class ImageUploadSerializer(serializers.Serializer):
+    image = serializers.ImageField()
+
+class TaskSeedSerializer(ModelSerializer):
     class Meta:
         model = Task
-        fields = ['id', 'title', 'completed']
+        fields = ['title', 'completed', 'order']
+
+class SectionTreeSerializer(ModelSerializer):
+    tasks = TaskSeedSerializer(many=True, required=False)
+
+    class Meta:
+        model = ChecklistSection
+        fields = ['title', 'order', 'tasks']
+
+class PageTreeSerializer(ModelSerializer):
+    sections = SectionTreeSerializer(many=True, required=False)
+
+    class Meta:
+        model = Page
+        fields = ['name', 'order', 'sections']
+
+    def validate_sections(self, value):
+        titles = [section['title'] for section in value]
+        if len(titles) != len(set(titles)):
+            raise serializers.ValidationError("A page can only have one section of each type.")
+        return value
+
+class ProjectTreeSerializer(ProjectSerializer):
+    """Creates a project together with its pages, sections and seed tasks in one transaction.
+
+    Pages that don't list their sections get the default MVP / DEV / DEPLOY sections.
+    In multipart requests (image uploads) ``pages`` is sent as a JSON encoded string.
+    """
+    image = serializers.ImageField(required=False, allow_null=True, write_only=True)
+    pages = PageTreeSerializer(many=True, required=False, write_only=True)
 
+    def to_internal_value(self, data):
+        if hasattr(data, 'getlist') and isinstance(data.get('pages'), str):
+            data = data.dict()
+            try:
+                data['pages'] = json.loads(data['pages'])
+            except ValueError:
+                raise serializers.ValidationError({'pages': ["Must be a JSON encoded list of pages."]})
+        return super().to_internal_value(data)
 
-class ChecklistSectionNestedSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        pages_data = validated_data.pop('pages', [])
+
+        with transaction.atomic():
+            project = super().create(validated_data)
+
+            tree = TreeWriter(project.owner_id)
+            for page_index, page_data in enumerate(pages_data):
+                page = tree.add_page(project, name=page_data['name'], order=page_data.get('order', (page_index + 1) * RANK_GAP))
+                sections_data = page_data.get('sections')
+                if sections_data is None:
+                    sections_data = [{'title': title} for title in DEFAULT_SECTIONS]
+                for section_index, section_data in enumerate(sections_data):
+                    section = tree.add_section(page, title=section_data['title'], order=section_data.get('order', section_index))
+                    for task_index, task in enumerate(section_data.get('tasks', [])):
+                        tree.add_task(
+                            section, title=task['title'], completed=task.get('completed', False),
+                            order=task.get('order', (task_index + 1) * RANK_GAP),
+                        )
+            tree.flush()
+            project.refresh_from_db(fields=TaskCounts.COUNT_FIELDS)
+
+        return project
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['image'] = self.get_image(instance)
+        return data
+
+class ProjectDashboardSerializer(ProjectSerializer):
+    """Project list entry with the task progress of its pages and sections (see ProjectDashboardView)."""
+    total_tasks = serializers.IntegerField(source='task_count', read_only=True)
+    completed_tasks = serializers.IntegerField(source='completed_count', read_only=True)
+    pages = serializers.SerializerMethodField()
+
+    def get_pages(self, obj):
+        return self.context['progress'].get(obj.id, {'pages': []})['pages']
+
+class ChecklistTaskNestedSerializer(ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ['id', 'title', 'completed', 'order']
+
+
+class ChecklistSectionNestedSerializer(ModelSerializer):
     tasks = ChecklistTaskNestedSerializer(many=True, read_only=True)
 
     class Meta:
         model = ChecklistSection
-        fields = ['id', 'title', 'tasks']
+        fields = ['id', 'title', 'order', 'tasks']
 
 
-class PageNestedSerializer(serializers.ModelSerializer):
+class PageNestedSerializer(ModelSerializer):
     sections = ChecklistSectionNestedSerializer(many=True, read_only=True)
 
     class Meta:
         model = Page
-        fields = ['id', 'name', 'sections']
+        fields = ['id', 'name', 'order', 'sections']
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(ModelSerializer):
     image = serializers.SerializerMethodField()
     pages = PageNestedSerializer(many=True, read_only=True)
 
     class Meta:
         model = Project
-        fields = ['id', 'name', 'description', 'link', 'pages', 'project_status', 'image']
+        fields = ['id', 'name', 'description', 'link', 'pages', 'project_status', 'image', 'image_status']
+        read_only_fields = Project.write_only_by_update
 
     def get_image(self, obj):
+        if obj.image_urls:
+            return obj.image_urls['original']
         if obj.image:
             return obj.image.url
         return "https://res.cloudinary.com/dpodsvx94/image/upload/v1769448461/copyLogo_tni1wh.png"
 
-class IssueSerializer(serializers.ModelSerializer):
+class MoveSerializer(serializers.Serializer):
+    """Where to move a page or task: directly before or after a sibling (by id), or else to the end."""
+    before = serializers.IntegerField(required=False)
+    after = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if 'before' in attrs and 'after' in attrs:
+            raise serializers.ValidationError("Give either before or after, not both.")
+        return attrs
+
+class TaskMoveSerializer(MoveSerializer):
+    """Tasks can also move to the end of another section."""
+    section = serializers.IntegerField(required=False)
+
+class BatchOperationSerializer(serializers.Serializer):
+    """A single create / update / delete in a batch. Creates name their parent (project, page or section) id."""
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    model = serializers.ChoiceField(choices=['page', 'section', 'task'])
+    id = serializers.IntegerField(required=False)
+    parent = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'create' and 'parent' not in attrs:
+            raise serializers.ValidationError({'parent': "This field is required to create an object."})
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError({'id': f"This field is required to {attrs['op']} an object."})
+        return attrs
+
+class BatchSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(many=True, allow_empty=False, max_length=500)
+
+class SearchResultSerializer(ModelSerializer):
+    """A project, page or task matching a search, with the project and page it belongs to (see checklists.search)."""
+    id = serializers.IntegerField(source='object_id')
+    project_name = serializers.CharField()
+    score = serializers.FloatField()
+
+    class Meta:
+        model = SearchEntry
+        fields = ['kind', 'id', 'title', 'project', 'project_name', 'page', 'score']
+
+class IssueSerializer(ModelSerializer):
     user = serializers.ReadOnlyField(source="user.id")
     class Meta:
         model = Issue
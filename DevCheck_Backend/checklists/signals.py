@@ -0,0 +1,188 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .cache import tree_cache
+from .events import change_event, project_event, publish
+from . import counters, search, stats
+from .models import Project, Page, ChecklistSection, Task, Tombstone
+
+_coalesced = threading.local()
+
+TOMBSTONE_MODELS = {Page: 'page', ChecklistSection: 'section', Task: 'task'}
+
+
+def record_changes(project_ids):
+    """Bump the version of the given projects and return {project id: new version}.
+
+    Inside ``coalesced_version_bumps()`` each project is bumped once, the first time it changes, and later
+    changes in the block share that version.
+    """
+    project_ids = set(project_ids)
+    bumped = getattr(_coalesced, 'bumped', None)
+    if bumped is None:
+        versions = Project.objects.bump_versions(project_ids)
+        tree_cache.invalidate(project_ids)
+        return versions
+
+    bumped.update(Project.objects.bump_versions(project_ids - bumped.keys()))
+    return {pk: bumped[pk] for pk in project_ids if pk in bumped}
+
+
+@contextmanager
+def coalesced_version_bumps():
+    """Give every change made inside the block one new version per project. Use inside ``transaction.atomic()``."""
+    if getattr(_coalesced, 'bumped', None) is not None:
+        yield
+        return
+
+    _coalesced.bumped = bumped = {}
+    try:
+        yield
+    finally:
+        _coalesced.bumped = None
+        tree_cache.invalidate(bumped)
+
+
+def _is_cascade(sender, origin):
+    # rows removed because their parent was deleted; the parent's own signal records the change
+    return origin is not None and getattr(origin, 'model', type(origin)) is not sender
+
+
+def _add_tombstone(sender, pk, project_id):
+    version = record_changes([project_id]).get(project_id)
+    if version is not None:
+        Tombstone.objects.create(project_id=project_id, model=TOMBSTONE_MODELS[sender], object_id=pk, change_seq=version)
+
+
+@receiver(pre_save, sender=Page)
+@receiver(pre_save, sender=ChecklistSection)
+@receiver(pre_save, sender=Task)
+def stamp_change(sender, instance, **kwargs):
+    # the models' save() runs this and the write in one transaction, so the row is never visible with
+    # a change_seq its project's version doesn't cover yet
+    instance.change_seq = record_changes([instance.project_id])[instance.project_id]
+    loaded = getattr(instance, '_loaded_values', {})
+    if loaded.get('project_id') not in (None, instance.project_id):
+        # moved to another project: it is gone as far as the old project's clients are concerned
+        _add_tombstone(sender, instance.pk, loaded['project_id'])
+
+
+def _child_changed(sender, instance, signal, created, origin):
+    if _is_cascade(sender, origin):
+        return
+    if signal is post_delete:
+        action = 'deleted'
+        _add_tombstone(sender, instance.pk, instance.project_id)
+    else:
+        action = 'created' if created else 'updated'
+    publish(instance.project_id, change_event(instance, action))
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and set(update_fields) <= {'updated_at'}):
+        return
+    record_changes([instance.pk])
+    publish(instance.pk, project_event(instance))
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    tree_cache.invalidate([instance.pk])
+    publish(instance.pk, project_event(instance, 'deleted'))
+
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+def page_changed(sender, instance, signal, created=False, origin=None, **kwargs):
+    _child_changed(sender, instance, signal, created, origin)
+
+
+@receiver(post_save, sender=ChecklistSection)
+@receiver(post_delete, sender=ChecklistSection)
+def section_changed(sender, instance, signal, created=False, origin=None, **kwargs):
+    _child_changed(sender, instance, signal, created, origin)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, signal, created=False, origin=None, **kwargs):
+    _child_changed(sender, instance, signal, created, origin)
+    if not _is_cascade(sender, origin):
+        stats.record_tasks([instance], deleted=signal is post_delete)
+        counters.record_tasks([instance], deleted=signal is post_delete)
+
+
+# the daily task rollups (checklists.stats) and the task counters (checklists.counters) are updated in
+# the same transaction as the change. Changes that carry tasks along with them are applied here, while
+# the rows still hold their old values
+
+@receiver(pre_save, sender=Project)
+def project_owner_changing(sender, instance, **kwargs):
+    if instance.pk is not None and instance.has_changed('owner_id'):
+        stats.move_tasks(Task.objects.filter(project=instance), owner_id=instance.owner_id)
+
+
+@receiver(pre_save, sender=Page)
+def page_moving(sender, instance, **kwargs):
+    if instance.pk is not None and instance.has_changed('project_id'):
+        owner_id = Project.objects.values_list('owner_id', flat=True).get(pk=instance.project_id)
+        stats.move_tasks(Task.objects.filter(section__page=instance), project_id=instance.project_id, owner_id=owner_id)
+        old_project_id = getattr(instance, '_loaded_values', {}).get('project_id')
+        if old_project_id is not None:
+            counters.move(Project, counters.counts_of(Page, instance.pk), old_project_id, instance.project_id)
+
+
+@receiver(pre_save, sender=ChecklistSection)
+def section_moving(sender, instance, **kwargs):
+    if instance.pk is not None and (instance.has_changed('project_id') or instance.has_changed('title')):
+        stats.move_tasks(
+            Task.objects.filter(section=instance),
+            project_id=instance.project_id, owner_id=instance.owner_id, stage=instance.title,
+        )
+    loaded = getattr(instance, '_loaded_values', {})
+    if loaded.get('page_id') not in (None, instance.page_id):
+        counts = counters.counts_of(ChecklistSection, instance.pk)
+        counters.move(Page, counts, loaded['page_id'], instance.page_id)
+        counters.move(Project, counts, loaded['project_id'], instance.project_id)
+
+
+@receiver(pre_delete, sender=Project)
+@receiver(pre_delete, sender=Page)
+@receiver(pre_delete, sender=ChecklistSection)
+def tasks_deleting(sender, instance, origin=None, **kwargs):
+    if _is_cascade(sender, origin):
+        return
+    lookup = {Project: 'project', Page: 'section__page', ChecklistSection: 'section'}[sender]
+    stats.remove_tasks(Task.objects.filter(**{lookup: instance}))
+    if sender is not Project:
+        counts = counters.counts_of(sender, instance.pk)
+        counters.move(Project, counts, instance.project_id)
+        if sender is ChecklistSection:
+            counters.move(Page, counts, instance.page_id)
+
+
+# search entries (checklists.search) are written with the object; entries of deleted objects go with them
+# through their foreign keys
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Page)
+@receiver(post_save, sender=ChecklistSection)
+@receiver(post_save, sender=Task)
+def search_entry_changed(sender, instance, created, **kwargs):
+    if sender is not ChecklistSection:
+        search.index([instance])
+    if not created:
+        search.move_below(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # covers deactivation and password changes, including those made through UserDetailView
+    user_cache.evict_user(instance.pk)
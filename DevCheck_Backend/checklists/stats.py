@@ -0,0 +1,204 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ChecklistSection, DailyProjectStats, DailyUserStats, Task
+
+# a rollup delta is keyed by (project id, owner id, stage, day, "created" | "completed")
+
+# the task fields the rollups depend on
+ROLLUP_FIELDS = ('section_id', 'project_id', 'owner_id', 'completed', 'completed_at')
+
+
+def _add_task(deltas, sign, project_id, owner_id, stage, created_at, completed_at):
+    for field, moment in (('created', created_at), ('completed', completed_at)):
+        if moment is not None:
+            deltas[project_id, owner_id, stage, timezone.localdate(moment), field] += sign
+
+
+def _stages(section_ids, tasks):
+    titles = {}
+    for task in tasks:
+        if Task.section.is_cached(task):
+            titles[task.section.pk] = task.section.title
+    missing = section_ids - titles.keys()
+    if missing:
+        titles.update(ChecklistSection.objects.filter(pk__in=missing).values_list('pk', 'title'))
+    return titles
+
+
+def record_tasks(tasks, deleted=False):
+    """Apply saves (or deletions) of ``tasks`` to the rollups.
+
+    Works from each task's loaded values (see LoadedValuesMixin), so call it after the write but before
+    ``save()`` returns, as the post_save receiver does, or after ``bulk_create()`` / ``bulk_update()``.
+    """
+    changes = []
+    for task in tasks:
+        loaded = getattr(task, '_loaded_values', None)
+        if deleted:
+            old, new = vars(task), None
+        elif loaded is None:
+            old, new = None, vars(task)
+        elif any(loaded[name] != getattr(task, name) for name in ROLLUP_FIELDS):
+            old, new = loaded, vars(task)
+        else:
+            continue
+        changes.append((task, old, new))
+    if not changes:
+        return
+
+    section_ids = {values['section_id'] for _, old, new in changes for values in (old, new) if values is not None}
+    stages = _stages(section_ids, [task for task, _, _ in changes])
+    deltas = Counter()
+    for task, old, new in changes:
+        for sign, values in ((-1, old), (1, new)):
+            if values is not None:
+                _add_task(
+                    deltas, sign, values['project_id'], values['owner_id'], stages.get(values['section_id'], ''),
+                    task.created_at, values['completed_at'],
+                )
+    apply(deltas)
+
+
+def _queryset_deltas(tasks, sign, **changes):
+    deltas = Counter()
+    for field in ('created', 'completed'):
+        rows = (
+            tasks.filter(**{f'{field}_at__isnull': False})
+            .values('project_id', 'owner_id', stage=F('section__title'), day=TruncDate(f'{field}_at'))
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            row.update(changes)
+            deltas[row['project_id'], row['owner_id'], row['stage'], row['day'], field] += sign * row['count']
+    return deltas
+
+
+def add_tasks(tasks):
+    """Count the tasks in the queryset ``tasks`` into the rollups, with one grouped query per field."""
+    apply(_queryset_deltas(tasks, 1))
+
+
+def remove_tasks(tasks):
+    """Take the tasks in ``tasks`` out of the rollups. Call before they are deleted."""
+    apply(_queryset_deltas(tasks, -1))
+
+
+def move_tasks(tasks, **changes):
+    """Re-file ``tasks`` under a new ``project_id``, ``owner_id`` and/or ``stage``. Call before the rows change."""
+    deltas = _queryset_deltas(tasks, -1)
+    deltas.update(_queryset_deltas(tasks, 1, **changes))
+    apply(deltas)
+
+
+def apply(deltas):
+    projects = defaultdict(Counter)
+    users = defaultdict(Counter)
+    for (project_id, owner_id, stage, day, field), count in deltas.items():
+        projects[project_id, stage, day][field] += count
+        users[owner_id, day][field] += count
+
+    for (project_id, stage, day), counts in projects.items():
+        _upsert(DailyProjectStats, {'project_id': project_id, 'stage': stage, 'day': day}, counts)
+    for (user_id, day), counts in users.items():
+        _upsert(DailyUserStats, {'user_id': user_id, 'day': day}, counts)
+
+
+def _upsert(model, key, counts):
+    counts = {field: count for field, count in counts.items() if count}
+    if not counts:
+        return
+    increments = {field: F(field) + count for field, count in counts.items()}
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **counts)
+    except IntegrityError:
+        # another transaction created the row first
+        model.objects.filter(**key).update(**increments)
+
+
+def expected_rollups():
+    """The rollups recomputed from the tasks table: ({(project id, stage, day): counts}, {(user id, day): counts})."""
+    projects = defaultdict(Counter)
+    users = defaultdict(Counter)
+    for (project_id, owner_id, stage, day, field), count in _queryset_deltas(Task.objects.all(), 1).items():
+        projects[project_id, stage, day][field] += count
+        users[owner_id, day][field] += count
+    return projects, users
+
+
+def rebuild():
+    projects, users = expected_rollups()
+    with transaction.atomic():
+        DailyProjectStats.objects.all().delete()
+        DailyUserStats.objects.all().delete()
+        DailyProjectStats.objects.bulk_create([
+            DailyProjectStats(project_id=project_id, stage=stage, day=day, **counts)
+            for (project_id, stage, day), counts in projects.items()
+        ], batch_size=1000)
+        DailyUserStats.objects.bulk_create([
+            DailyUserStats(user_id=user_id, day=day, **counts)
+            for (user_id, day), counts in users.items()
+        ], batch_size=1000)
+    return len(projects), len(users)
+
+
+def summarize(daily, stages, days):
+    """Burn-down, velocity and per-stage throughput over the last ``days`` days.
+
+    ``daily`` is a queryset of rollup rows for the whole scope (a user or a project), ``stages`` the
+    DailyProjectStats rows to break completions down by stage. Only rollup rows are read, so the cost
+    depends on the number of days and stages, not on the number of tasks.
+    """
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+
+    before = daily.filter(day__lt=start).aggregate(created=Sum('created'), completed=Sum('completed'))
+    remaining = (before['created'] or 0) - (before['completed'] or 0)
+    rows = {
+        row['day']: row
+        for row in daily.filter(day__gte=start).values('day').annotate(created=Sum('created'), completed=Sum('completed')).order_by()
+    }
+
+    burndown = []
+    created = completed = 0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {'created': 0, 'completed': 0})
+        remaining += row['created'] - row['completed']
+        created += row['created']
+        completed += row['completed']
+        burndown.append({'day': day, 'created': row['created'], 'completed': row['completed'], 'remaining': remaining})
+
+    order = [title for title, _ in ChecklistSection.SECTION_CHOICES]
+    stage_rows = (
+        stages.filter(day__gte=start)
+        .values('stage')
+        .annotate(created=Sum('created'), completed=Sum('completed'))
+        .order_by()
+    )
+
+    return {
+        'start': start,
+        'end': end,
+        'remaining': remaining,
+        'burndown': burndown,
+        'velocity': {
+            'completed': completed,
+            'created': created,
+            'completed_per_day': round(completed / days, 2),
+            'completed_last_7_days': sum(day['completed'] for day in burndown[-7:]),
+        },
+        'stages': sorted(
+            (row for row in stage_rows if row['created'] or row['completed']),
+            key=lambda row: (order.index(row['stage']) if row['stage'] in order else len(order), row['stage']),
+        ),
+    }
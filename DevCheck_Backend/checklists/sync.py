@@ -0,0 +1,46 @@
+from .conf import checklists_setting
+from .models import Page, ChecklistSection, Task, Tombstone
+
+# name in the response -> (model, tombstone model name, fields of each upserted row)
+SYNCED_MODELS = {
+    'pages': (Page, 'page', ('id', 'name', 'order')),
+    'sections': (ChecklistSection, 'section', ('id', 'page', 'title', 'order')),
+    'tasks': (Task, 'task', ('id', 'section', 'title', 'completed', 'order')),
+}
+
+
+def project_changes(project, since):
+    """Pages, sections and tasks written and deleted after version ``since`` of ``project``.
+
+    Returns None when the changes can't be listed exactly (``since`` is older than the project's sync floor
+    or newer than its version) or there are more than SYNC_MAX_CHANGES of them; the caller sends a
+    snapshot instead. Rows removed by a cascade get no tombstone of their own: deleting a page or section
+    drops everything under it.
+    """
+    if since < max(project.sync_floor, 1) or since > project.version:
+        return None
+
+    limit = checklists_setting('SYNC_MAX_CHANGES')
+    changes = {'deleted': {name: [] for name in SYNCED_MODELS}}
+    remaining = limit
+    for name, (model, _, fields) in SYNCED_MODELS.items():
+        rows = list(
+            model.objects.filter(project=project, change_seq__gt=since)
+            .order_by('order', 'id')
+            .values(*fields)[:remaining + 1]
+        )
+        remaining -= len(rows)
+        if remaining < 0:
+            return None
+        changes[name] = rows
+
+    names = {model_name: name for name, (_, model_name, _) in SYNCED_MODELS.items()}
+    tombstones = list(
+        Tombstone.objects.filter(project=project, change_seq__gt=since)
+        .values_list('model', 'object_id')[:remaining + 1]
+    )
+    if len(tombstones) > remaining:
+        return None
+    for model_name, object_id in tombstones:
+        changes['deleted'][names[model_name]].append(object_id)
+    return changes
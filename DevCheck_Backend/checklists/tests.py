@@ -1,3 +1,1610 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from importlib import import_module
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.signing import BadSignature
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import TruncDate
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from django.urls import reverse
+from PIL import Image
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import counters, search, uploads, views
+from .coldstart import measure_cold_start
+from .activity import LastOpenedBuffer
+from .authentication import user_cache
+from .cache import tree_cache
+from .conf import checklists_setting
+from .events import Broker, read_ticket
+from .middleware import SQLInstrumentationMiddleware
+from .ranks import MAX_RANK
+from .serializers import TimedDataMixin
+from .sync import project_changes
+from .serializers import ProjectDetailSerializer
+from .signals import coalesced_version_bumps
+from .trees import abuild_project_tree, build_project_tree
+from .models import (
+    Project, Page, ChecklistSection, Task, Issue, ImageUploadJob, DailyProjectStats, DailyUserStats, Tombstone, RANK_GAP,
+)
+
+
+def create_tree(owner, name="Project", tasks=("Task 1", "Task 2")):
+    """A project with one page, its MVP section and ``tasks``, created through the models so signals run."""
+    project = Project.objects.create(owner=owner, name=name, description="")
+    page = Page.objects.create(project=project, name="Page", order=1024)
+    section = ChecklistSection.objects.create(page=page, title="MVP")
+    for order, title in enumerate(tasks, 1):
+        Task.objects.create(section=section, title=title, order=order * 1024)
+    return project, page, section
+
+
+def outline(project_id, completed=False):
+    """The project's pages, sections and task titles (with their ``completed`` flags, if asked) in display order."""
+    return [
+        (page.name, [
+            (section.title, [(task.title, task.completed) if completed else task.title for task in section.tasks.order_by("order")])
+            for section in page.sections.order_by("order")
+        ])
+        for page in Page.objects.filter(project_id=project_id).order_by("order")
+    ]
+
+
+class TokenClient(APIClient):
+    """APIClient whose force_authenticate() sends an access token for the user, so the async views, which
+    don't go through DRF, authenticate the request too. The user is put in the auth cache, so this costs
+    no more queries than DRF's forced authentication.
+    """
+
+    def force_authenticate(self, user=None, token=None):
+        if user is None:
+            self.credentials()
+            return
+        token = token or AccessToken.for_user(user)
+        user_cache.set(user.pk, token["jti"], user)
+        self.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="owner")
+        self.other = User.objects.create(username="other")
+        self.client = TokenClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, name, *args, **kwargs):
+        return self.client.get(reverse(name, args=args), secure=True, **kwargs)
+
+    def post(self, name, data, *args, **kwargs):
+        return self.client.post(reverse(name, args=args), data, format="json", secure=True, **kwargs)
+
+
+class HotPathQueryPlanTests(TestCase):
+    """Runs EXPLAIN on the queries behind the busiest endpoints and fails if any of them scans a whole table."""
+    USERS = 10
+    PROJECTS = 5
+    PAGES = 6
+    TASKS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(username=f"user{i}") for i in range(cls.USERS)])
+        projects = Project.objects.bulk_create([
+            Project(owner=user, name=f"Project {i}", description="")
+            for user in users for i in range(cls.PROJECTS)
+        ])
+        pages = Page.objects.bulk_create([
+            Page(project=project, name=f"Page {i}", order=i)
+            for project in projects for i in range(cls.PAGES)
+        ])
+        sections = ChecklistSection.objects.bulk_create([
+            ChecklistSection(page=page, project=page.project, owner=page.project.owner, title=title, order=i)
+            for page in pages for i, title in enumerate(["MVP", "DEV", "DEPLOY"])
+        ])
+        Task.objects.bulk_create([
+            Task(section=section, project=section.project, owner=section.owner, title=f"Task {i}", order=i)
+            for section in sections for i in range(cls.TASKS)
+        ])
+        Issue.objects.bulk_create([Issue(user=users[0], description=f"Issue {i}") for i in range(50)])
+        search.rebuild()
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.user = users[0]
+        cls.project = projects[0]
+        cls.page = pages[0]
+        cls.section = sections[0]
+        cls.task = Task.objects.filter(section=cls.section).first()
+
+    def view_queryset(self, view_class, **kwargs):
+        view = view_class()
+        view.request = SimpleNamespace(user=self.user)
+        view.kwargs = kwargs
+        return view.get_queryset()
+
+    def full_scans(self, plan):
+        if connection.vendor == "postgresql":
+            return re.findall(r"Seq Scan on (\w+)", plan)
+        if connection.vendor == "sqlite":
+            # "SCAN table" without "USING (COVERING) INDEX" reads every row; full-text indexes are virtual tables
+            return re.findall(r"SCAN (\w+)(?! USING| VIRTUAL TABLE)(?:\s|$)", plan)
+        self.skipTest(f"No query plan check for {connection.vendor}")
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(("EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN ") + sql)
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertIndexed(self, queryset):
+        plan = queryset.explain()
+        self.assertEqual(self.full_scans(plan), [], plan)
+
+    def assertQueriesIndexed(self, function, *args, **kwargs):
+        """EXPLAIN every SELECT that ``function(*args, **kwargs)`` issues."""
+        with CaptureQueriesContext(connection) as captured:
+            function(*args, **kwargs)
+        selects = [query["sql"] for query in captured if query["sql"].lstrip().upper().startswith("SELECT")]
+        self.assertTrue(selects)
+        for sql in selects:
+            plan = self.explain(sql)
+            self.assertEqual(self.full_scans(plan), [], f"{sql}\n{plan}")
+
+    def client_get(self, name, *args, **params):
+        client = TokenClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse(name, args=args), params, secure=True)
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_project_list(self):
+        self.assertIndexed(self.view_queryset(views.ProjectListCreate).order_by("-updated_at", "-id"))
+
+    def test_project_detail(self):
+        self.assertIndexed(self.view_queryset(views.ProjectDetailView, pk=self.project.pk).filter(pk=self.project.pk))
+        # GET detail is served from the tree
+        self.assertQueriesIndexed(build_project_tree, self.project)
+
+    def test_project_sync(self):
+        self.assertQueriesIndexed(project_changes, Project.objects.get(pk=self.project.pk), 1)
+        self.assertQueriesIndexed(self.client_get, "project-sync", self.project.pk, since=1)
+
+    def test_dashboard(self):
+        self.assertQueriesIndexed(self.client_get, "project-dashboard")
+
+    def test_search(self):
+        self.assertQueriesIndexed(self.client_get, "search", q="task 1")
+
+    def test_page_list(self):
+        self.assertIndexed(self.view_queryset(views.PageListCreate, project_id=self.project.pk).order_by("order", "id"))
+
+    def test_page_detail(self):
+        self.assertIndexed(self.view_queryset(views.PageDetail).filter(pk=self.page.pk))
+
+    def test_section_list(self):
+        self.assertIndexed(self.view_queryset(views.ChecklistSectionListCreate, page_id=self.page.pk).order_by("order", "id"))
+
+    def test_task_list(self):
+        self.assertIndexed(self.view_queryset(views.TaskListCreate, section_id=self.section.pk).order_by("order", "id"))
+
+    def test_task_detail(self):
+        self.assertIndexed(self.view_queryset(views.TaskDetail).filter(pk=self.task.pk))
+
+    def test_recent_issues(self):
+        self.assertIndexed(Issue.objects.order_by("-date_submitted")[:20])
+
+
+class ColdStartBudgetTests(SimpleTestCase):
+    """Starts the application in a new process and fails if its first response takes longer than COLD_START_BUDGET_MS."""
+
+    def test_cold_start(self):
+        budget = checklists_setting("COLD_START_BUDGET_MS")
+        # the first start warms the filesystem and bytecode caches, which a deployed image already has
+        measure_cold_start()
+        total = measure_cold_start()["total_ms"]
+        if total > budget:
+            slowest = sorted(measure_cold_start(importtime=True)["modules"], key=lambda module: -module[1])[:10]
+            self.fail("\n".join(
+                [f"Cold start took {total:.0f} ms, over the {budget} ms budget; slowest imports (self ms):"]
+                + [f"  {name} {self_us / 1000:.1f}" for name, self_us, _, _ in slowest]
+            ))
+
+
+class DashboardTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user, tasks=("Task 1", "Task 2", "Task 3"))
+        self.dev = ChecklistSection.objects.create(page=self.page, title="DEV", order=1)
+        for task in (Task.objects.create(section=self.dev, title="Dev task"), Task.objects.filter(section=self.section).first()):
+            task.completed = True
+            task.save()
+        self.empty_page = Page.objects.create(project=self.project, name="Empty", order=2048)
+        self.second, _, _ = create_tree(self.user, name="Second", tasks=())
+        create_tree(self.other, name="Not mine")
+
+    def test_counts(self):
+        response = self.get("project-dashboard")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["user"]["id"], self.user.pk)
+        projects = {project["name"]: project for project in data["projects"]}
+        self.assertEqual(set(projects), {"Project", "Second"})
+        project = projects["Project"]
+        self.assertEqual((project["total_tasks"], project["completed_tasks"]), (4, 2))
+        self.assertEqual(project["pages"], [
+            {"id": self.page.pk, "name": "Page", "total_tasks": 4, "completed_tasks": 2, "sections": [
+                {"id": self.section.pk, "title": "MVP", "total_tasks": 3, "completed_tasks": 1},
+                {"id": self.dev.pk, "title": "DEV", "total_tasks": 1, "completed_tasks": 1},
+            ]},
+            {"id": self.empty_page.pk, "name": "Empty", "total_tasks": 0, "completed_tasks": 0, "sections": []},
+        ])
+        self.assertEqual((projects["Second"]["total_tasks"], projects["Second"]["pages"][0]["sections"][0]["total_tasks"]), (0, 0))
+
+    def test_query_count(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get("project-dashboard").status_code, 200)
+        for index in range(3):
+            create_tree(self.user, name=f"More {index}")
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.get("project-dashboard").json()["projects"]), 5)
+
+
+class MoveTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user, tasks=("Task 1", "Task 2", "Task 3"))
+        self.tasks = list(Task.objects.filter(section=self.section).order_by("order"))
+
+    def move(self, name, pk, data, status=200):
+        response = self.post(name, data, pk)
+        self.assertEqual(response.status_code, status, response.content)
+        return response
+
+    def orders(self, section):
+        return list(Task.objects.filter(section=section).order_by("order", "id").values_list("title", "order"))
+
+    def test_move_writes_only_the_moved_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.move("task-move", self.tasks[2].pk, {"before": self.tasks[0].pk})
+        task_writes = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "checklists_task"')]
+        self.assertEqual(len(task_writes), 1, task_writes)
+        [(title, order), *rest] = self.orders(self.section)
+        self.assertEqual((title, rest), ("Task 3", [("Task 1", RANK_GAP), ("Task 2", 2 * RANK_GAP)]))
+        self.assertLess(order, RANK_GAP)
+
+    def test_rebalances_when_the_gap_runs_out(self):
+        for order, task in enumerate(self.tasks, 1):
+            Task.objects.filter(pk=task.pk).update(order=order)
+        self.move("task-move", self.tasks[2].pk, {"after": self.tasks[0].pk})
+        [first, moved, last] = self.orders(self.section)
+        self.assertEqual((first, last), (("Task 1", RANK_GAP), ("Task 2", 2 * RANK_GAP)))
+        self.assertEqual(moved[0], "Task 3")
+        self.assertTrue(RANK_GAP < moved[1] < 2 * RANK_GAP)
+
+    def test_rebalances_instead_of_passing_max_rank(self):
+        Task.objects.filter(pk=self.tasks[2].pk).update(order=MAX_RANK)
+        # to the end of the section
+        self.move("task-move", self.tasks[0].pk, {})
+        self.assertEqual(self.orders(self.section), [("Task 2", RANK_GAP), ("Task 3", 2 * RANK_GAP), ("Task 1", 3 * RANK_GAP)])
+
+        Task.objects.filter(pk=self.tasks[0].pk).update(order=MAX_RANK)
+        self.move("task-move", self.tasks[1].pk, {"after": self.tasks[0].pk})
+        self.assertEqual([title for title, _ in self.orders(self.section)], ["Task 3", "Task 1", "Task 2"])
+        self.assertLessEqual(max(order for _, order in self.orders(self.section)), MAX_RANK)
+
+    def test_move_into_another_section_updates_its_counters(self):
+        self.client.patch(reverse("task-detail", args=[self.tasks[0].pk]), {"completed": True}, format="json", secure=True)
+        dev = ChecklistSection.objects.create(page=self.page, title="DEV", order=2048)
+        target = Task.objects.create(section=dev, title="Dev task", order=RANK_GAP)
+
+        self.move("task-move", self.tasks[0].pk, {"before": target.pk})
+        task = Task.objects.get(pk=self.tasks[0].pk)
+        self.assertEqual((task.section_id, task.project_id, task.owner_id), (dev.pk, self.project.pk, self.user.pk))
+        self.assertEqual([title for title, _ in self.orders(dev)], ["Task 1", "Dev task"])
+        counts = lambda model, pk: model.objects.values_list("task_count", "completed_count").get(pk=pk)
+        self.assertEqual(counts(ChecklistSection, self.section.pk), (2, 0))
+        self.assertEqual(counts(ChecklistSection, dev.pk), (2, 1))
+        self.assertEqual(counts(Project, self.project.pk), (4, 1))
+
+    def test_anchor_from_another_project_is_rejected(self):
+        _, other_page, _ = create_tree(self.user, name="Other")
+        response = self.move("page-move", self.page.pk, {"before": other_page.pk}, status=400)
+        self.assertEqual(response.json(), {"before": ["Not found."]})
+        self.assertEqual(Page.objects.get(pk=self.page.pk).project_id, self.project.pk)
+
+        _, _, strangers = create_tree(self.other)
+        self.move("task-move", self.tasks[0].pk, {"after": Task.objects.filter(section=strangers).first().pk}, status=400)
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).section_id, self.section.pk)
+
+    def test_respace_migration(self):
+        migration = import_module("checklists.migrations.0021_gapped_ranks")
+        apps = MigrationLoader(connection).project_state(("checklists", "0021_gapped_ranks")).apps
+        dev = ChecklistSection.objects.create(page=self.page, title="DEV", order=2)
+        Task.objects.create(section=dev, title="Dev task", order=0)
+        Page.objects.create(project=self.project, name="Second", order=5)
+        for order, task in enumerate(self.tasks, 1):
+            Task.objects.filter(pk=task.pk).update(order=order)
+        Page.objects.filter(pk=self.page.pk).update(order=1)
+
+        migration.respace(apps, None)
+        self.assertEqual(self.orders(self.section), [("Task 1", RANK_GAP), ("Task 2", 2 * RANK_GAP), ("Task 3", 3 * RANK_GAP)])
+        self.assertEqual(self.orders(dev), [("Dev task", RANK_GAP)])
+        pages = Page.objects.filter(project=self.project).order_by("order").values_list("name", "order")
+        self.assertEqual(list(pages), [("Page", RANK_GAP), ("Second", 2 * RANK_GAP)])
+
+        migration.compact(apps, None)
+        self.assertEqual(self.orders(self.section), [("Task 1", 1), ("Task 2", 2), ("Task 3", 3)])
+
+
+class BatchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user)
+        self.task = Task.objects.filter(section=self.section).first()
+
+    def batch(self, *operations):
+        return self.post("batch", {"operations": list(operations)})
+
+    def test_results_follow_operation_order(self):
+        response = self.batch(
+            {"op": "create", "model": "task", "parent": self.section.pk, "data": {"title": "New"}},
+            {"op": "update", "model": "task", "id": self.task.pk, "data": {"completed": True}},
+            {"op": "delete", "model": "section", "id": self.section.pk},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        created, updated, deleted = response.data["results"]
+        # the section's delete took the new and the updated task with it
+        self.assertEqual((created["id"], created["deleted"]), (None, True))
+        self.assertEqual((updated["id"], updated["deleted"]), (self.task.pk, True))
+        self.assertNotIn("data", created)
+        self.assertEqual(deleted["id"], self.section.pk)
+        self.assertFalse(Task.objects.filter(section_id=self.section.pk).exists())
+
+    def test_created_rows_are_returned(self):
+        response = self.batch({"op": "create", "model": "task", "parent": self.section.pk, "data": {"title": "New"}})
+        self.assertEqual(response.status_code, 200, response.content)
+        result = response.data["results"][0]
+        self.assertEqual(Task.objects.get(pk=result["id"]).title, "New")
+        self.assertEqual(result["data"]["title"], "New")
+
+    def test_invalid_operation_rejects_whole_batch(self):
+        response = self.batch(
+            {"op": "update", "model": "task", "id": self.task.pk, "data": {"title": "Renamed"}},
+            {"op": "create", "model": "task", "parent": self.section.pk, "data": {"title": ""}},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["index"], 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Task 1")
+
+    def test_conflicting_write_rolls_back_earlier_operations(self):
+        response = self.batch(
+            {"op": "update", "model": "task", "id": self.task.pk, "data": {"title": "Renamed"}},
+            {"op": "create", "model": "section", "parent": self.page.pk, "data": {"title": "MVP"}},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Task 1")
+        self.assertEqual(ChecklistSection.objects.filter(page=self.page).count(), 1)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.task_count, Task.objects.filter(project=self.project).count()), (2, 2))
+
+    def test_other_users_rows_are_not_found(self):
+        _, other_page, other_section = create_tree(self.other, tasks=("Theirs",))
+        theirs = Task.objects.get(section=other_section)
+        response = self.batch(
+            {"op": "update", "model": "task", "id": theirs.pk, "data": {"title": "Mine"}},
+            {"op": "create", "model": "task", "parent": other_section.pk, "data": {"title": "Mine"}},
+            {"op": "delete", "model": "page", "id": other_page.pk},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [0, 1, 2])
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.title, "Theirs")
+        self.assertTrue(Page.objects.filter(pk=other_page.pk).exists())
+
+
+class ProjectSaveTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, _, self.section = create_tree(self.user)
+
+    def test_patch_does_not_restore_version_bumped_meanwhile(self):
+        self.project.refresh_from_db()
+        versions = [self.project.version]
+
+        def task_saved_meanwhile(request):
+            # runs after the view loaded the project and before it saves it
+            Task.objects.create(section=self.section, title="Meanwhile")
+            versions.append(Project.objects.get(pk=self.project.pk).version)
+            return None
+
+        with mock.patch.object(views, "uploaded_image", task_saved_meanwhile):
+            response = self.client.patch(
+                reverse("project-detail", args=[self.project.pk]), {"name": "Renamed"}, format="multipart", secure=True,
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.project.refresh_from_db()
+        versions.append(self.project.version)
+        self.assertEqual(self.project.name, "Renamed")
+        self.assertEqual(versions, [versions[0], versions[0] + 1, versions[0] + 2])
+
+    def test_full_save_leaves_worker_fields_alone(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        Project.objects.filter(pk=self.project.pk).update(
+            image_status="ready", image_urls={"original": "https://example.com/a.png"}, sync_floor=3,
+        )
+        stale.name = "Renamed"
+        stale.save()
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.name, self.project.image_status, self.project.image_urls, self.project.sync_floor),
+            ("Renamed", "ready", {"original": "https://example.com/a.png"}, 3),
+        )
+
+    def test_clients_cannot_write_worker_fields(self):
+        worker_fields = {"image_status": "ready", "image_urls": '{"original": "https://example.com/a.png"}', "task_count": 9}
+        response = self.client.patch(
+            reverse("project-detail", args=[self.project.pk]), {"name": "Renamed", **worker_fields}, format="multipart", secure=True,
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["image_status"], "none")
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.name, self.project.image_status, self.project.image_urls), ("Renamed", "none", {}))
+
+        response = self.client.post(
+            reverse("project-list"), {"name": "New", "description": "New", **worker_fields}, format="multipart", secure=True,
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((response.json()["image_status"], response.json()["task_count"]), ("none", 0))
+
+
+class ImageUploadTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = os.path.join(directory.name, "media")
+        self.staging = os.path.join(self.media, "staging")
+        settings = self.settings(MEDIA_ROOT=self.media, CHECKLISTS={"UPLOAD_MAX_ATTEMPTS": 2})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.project = Project.objects.create(owner=User.objects.create(username="owner"), name="Project", description="")
+        self.failures = []
+
+    def build_derivatives(self, project, source):
+        if self.failures:
+            raise self.failures.pop()
+        return {"original": project.image.url}
+
+    def stage(self, name="a.png"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return uploads.stage_image(self.project, SimpleUploadedFile(name, b"image bytes"))
+
+    def run_jobs(self):
+        with mock.patch("checklists.images.build_derivatives", self.build_derivatives):
+            if not self.failures:
+                return uploads.run_pending_jobs()
+            with self.assertLogs("checklists.uploads", "ERROR"):
+                return uploads.run_pending_jobs()
+
+    def files(self, root):
+        # media files, not counting the staged ones
+        names = (os.path.relpath(os.path.join(path, name), root) for path, _, names in os.walk(root) for name in names)
+        return sorted(name for name in names if not name.startswith("staging/"))
+
+    def png(self, name="a.png"):
+        content = io.BytesIO()
+        Image.new("RGB", (1, 1)).save(content, "PNG")
+        return SimpleUploadedFile(name, content.getvalue(), content_type="image/png")
+
+    def test_job_stores_image_and_marks_project_ready(self):
+        self.stage()
+        self.assertEqual(Project.objects.get(pk=self.project.pk).image_status, "pending")
+        self.assertEqual(self.run_jobs(), (1, 0))
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual((project.image_status, project.image.name), ("ready", "projects/a.png"))
+        self.assertEqual(self.files(self.media), ["projects/a.png"])
+        self.assertEqual(self.files(self.staging), [])
+
+    def test_claimed_job_is_not_claimed_again_until_its_lease_runs_out(self):
+        self.stage()
+        self.assertEqual(len(uploads.claim_jobs(10)), 1)
+        self.assertEqual(uploads.claim_jobs(10), [])
+        ImageUploadJob.objects.update(run_after=timezone.now() - timedelta(seconds=1))
+        [job] = uploads.claim_jobs(10)
+        self.assertEqual((job.status, job.attempts), ("running", 2))
+
+    def test_retry_reuses_the_stored_original(self):
+        job = self.stage()
+        self.failures.append(OSError("derivatives failed"))
+        self.assertEqual(self.run_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.stored_name, job.last_error), ("pending", "projects/a.png", "derivatives failed"))
+
+        ImageUploadJob.objects.update(run_after=timezone.now())
+        self.assertEqual(self.run_jobs(), (1, 0))
+        self.assertEqual(Project.objects.get(pk=self.project.pk).image.name, "projects/a.png")
+        self.assertEqual(self.files(self.media), ["projects/a.png"])
+
+    def test_last_failed_attempt_marks_project_failed_and_removes_files(self):
+        self.stage()
+        self.failures += [OSError("derivatives failed")] * 2
+        self.run_jobs()
+        ImageUploadJob.objects.update(run_after=timezone.now())
+        self.assertEqual(self.run_jobs(), (0, 1))
+        self.assertEqual(ImageUploadJob.objects.get().status, "failed")
+        self.assertEqual(Project.objects.get(pk=self.project.pk).image_status, "failed")
+        self.assertEqual((self.files(self.media), self.files(self.staging)), ([], []))
+
+    def test_newer_upload_supersedes_pending_job(self):
+        first = self.stage("a.png")
+        self.stage("b.png")
+        first.refresh_from_db()
+        self.assertEqual(first.status, "cancelled")
+        self.assertEqual(self.run_jobs(), (1, 0))
+        self.assertEqual(Project.objects.get(pk=self.project.pk).image.name, "projects/b.png")
+        self.assertEqual(self.files(self.staging), [])
+
+    def test_newer_upload_supersedes_running_job(self):
+        self.stage("a.png")
+        [running] = uploads.claim_jobs(10)
+        self.stage("b.png")
+        with mock.patch("checklists.images.build_derivatives", self.build_derivatives):
+            uploads.run_job(running)
+        running.refresh_from_db()
+        self.assertEqual(running.status, "cancelled")
+        self.assertEqual(Project.objects.get(pk=self.project.pk).image_status, "pending")
+        self.assertEqual(self.files(self.media), [])
+
+        self.assertEqual(self.run_jobs(), (1, 0))
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual((project.image_status, project.image.name), ("ready", "projects/b.png"))
+        self.assertEqual(self.files(self.staging), [])
+
+    def test_backfilled_derivatives_bump_the_version(self):
+        Project.objects.filter(pk=self.project.pk).update(image=default_storage.save("projects/a.png", self.png()))
+        version = Project.objects.get(pk=self.project.pk).version
+        with mock.patch("checklists.management.commands.build_image_derivatives.build_derivatives", self.build_derivatives):
+            call_command("build_image_derivatives", stdout=io.StringIO())
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual((project.image_urls, project.version), ({"original": "/media/projects/a.png"}, version + 1))
+
+    def test_job_is_created_in_the_project_write(self):
+        client = TokenClient()
+        client.force_authenticate(self.project.owner)
+        with mock.patch.object(ImageUploadJob.objects, "create", side_effect=OSError("queue unavailable")):
+            with self.assertRaises(OSError):
+                client.post(reverse("project-list"), {"name": "New", "description": "New", "image": self.png()}, secure=True)
+            with self.assertRaises(OSError):
+                client.patch(
+                    reverse("project-detail", args=[self.project.pk]), {"name": "Renamed", "image": self.png()}, secure=True,
+                )
+        self.assertEqual(list(Project.objects.values_list("name", "image_status")), [("Project", "none")])
+        self.assertEqual(self.files(self.staging), [])
+
+        response = client.post(reverse("project-list"), {"name": "New", "description": "New", "image": self.png()}, secure=True)
+        self.assertEqual(response.status_code, 201, response.content)
+        job = ImageUploadJob.objects.get(project=response.json()["id"])
+        self.assertEqual((job.status, job.staged_name), ("pending", f"staging/{job.project_id}/a.png"))
+
+
+class SlowSerializer(TimedDataMixin, serializers.Serializer):
+    def to_representation(self, instance):
+        time.sleep(0.02)
+        return {}
+
+
+class SQLInstrumentationMiddlewareTests(TestCase):
+    def render_time(self, response):
+        return float(re.search(r"render;dur=([\d.]+)", response["Server-Timing"]).group(1))
+
+    def query_count(self, response):
+        return int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response["Server-Timing"]).group(1))
+
+    def test_times_serializer_data_in_sync_views(self):
+        def view(request):
+            SlowSerializer(object()).data
+            return HttpResponse()
+
+        middleware = SQLInstrumentationMiddleware(view)
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertGreaterEqual(self.render_time(middleware(RequestFactory().get("/"))), 20)
+
+    def test_stays_async_for_async_views(self):
+        async def view(request):
+            SlowSerializer(object()).data
+            return HttpResponse()
+
+        middleware = SQLInstrumentationMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+        self.assertGreaterEqual(self.render_time(response), 20)
+
+    def test_leaves_drf_alone(self):
+        SQLInstrumentationMiddleware(lambda request: HttpResponse())
+        self.assertEqual(serializers.Serializer.__dict__["data"].fget.__module__, "rest_framework.serializers")
+        self.assertEqual(JSONRenderer.render.__module__, "rest_framework.renderers")
+
+    def test_counts_queries_of_sync_views(self):
+        def view(request):
+            list(User.objects.all())
+            return HttpResponse()
+
+        response = SQLInstrumentationMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(self.query_count(response), 1, response["Server-Timing"])
+
+    async def test_counts_queries_run_on_another_thread_under_asgi(self):
+        user = await User.objects.acreate_user(username="owner", password="password")
+        await sync_to_async(create_tree)(user)
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+        middleware = ["checklists.middleware.SQLInstrumentationMiddleware", *settings.MIDDLEWARE]
+        with self.settings(MIDDLEWARE=middleware):
+            client = AsyncClient()
+            for name in ("project-list", "project-dashboard", "user-statistics"):
+                with self.subTest(name):
+                    response = await client.get(reverse(name), headers=headers, secure=True)
+                    self.assertEqual(response.status_code, 200, response.content)
+                    self.assertGreater(self.query_count(response), 0)
+
+
+class EventStreamTicketTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, _, _ = create_tree(self.user)
+        self.token = AccessToken.for_user(self.user)
+        self.client.force_authenticate(self.user, token=self.token)
+
+    def ticket(self, project):
+        response = self.post("project-events-ticket", {}, project.pk)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["ticket"]
+
+    def test_ticket_opens_only_its_project_until_it_expires(self):
+        ticket = self.ticket(self.project)
+        self.assertEqual(read_ticket(ticket, self.project.pk), (self.user.pk, self.token["exp"]))
+        with self.assertRaises(BadSignature):
+            read_ticket(ticket, self.project.pk + 1)
+        later = time.time() + checklists_setting("EVENT_TICKET_SECONDS") + 1
+        with mock.patch("time.time", return_value=later), self.assertRaises(BadSignature):
+            read_ticket(ticket, self.project.pk)
+
+    def test_no_ticket_for_other_users_projects(self):
+        project, _, _ = create_tree(self.other)
+        self.assertEqual(self.post("project-events-ticket", {}, project.pk).status_code, 404)
+
+    async def test_stream_needs_a_ticket_not_a_token(self):
+        url = reverse("project-events", args=[self.project.pk])
+        response = await AsyncClient().get(url, {"token": str(self.token)}, secure=True)
+        self.assertEqual(response.status_code, 401)
+
+        ticket = await sync_to_async(self.ticket)(self.project)
+        response = await AsyncClient().get(url, {"ticket": ticket}, secure=True)
+        self.assertEqual((response.status_code, response["Content-Type"]), (200, "text/event-stream"))
+        self.assertEqual(await anext(aiter(response.streaming_content)), b"retry: 3000\n\n")
+        await response.streaming_content.aclose()
+
+    def test_broker_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Broker()
+
+
+class ImportTests(ApiTestCase):
+    HEADER = {"type": "devcheck-export", "version": 1}
+
+    def upload(self, content, name="import.ndjson"):
+        if not isinstance(content, bytes):
+            content = "".join(json.dumps(row) + "\n" for row in content).encode()
+        file = SimpleUploadedFile(name, content)
+        return self.client.post(reverse("import"), {"file": file}, format="multipart", secure=True)
+
+    def test_export_rows(self):
+        response = self.upload([
+            self.HEADER,
+            {"type": "project", "id": 1, "name": "Imported", "description": "Imported"},
+            {"type": "page", "id": 2, "project": 1, "name": "Home"},
+            {"type": "section", "id": 3, "page": 2, "title": "MVP"},
+            {"type": "task", "section": 3, "title": "Header", "completed": True},
+            {"type": "task", "section": 3, "title": "Footer"},
+        ])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["created"], {"projects": 1, "pages": 1, "sections": 1, "tasks": 2})
+        [project_id] = response.json()["projects"]
+        project = Project.objects.get(pk=project_id)
+        self.assertEqual((project.owner, project.task_count, project.completed_count), (self.user, 2, 1))
+        self.assertEqual(outline(project_id), [("Home", [("MVP", ["Header", "Footer"])])])
+
+    def test_malformed_header_is_a_row_error(self):
+        for version in ("1", None, [1], 2):
+            with self.subTest(version=version):
+                response = self.upload([{**self.HEADER, "version": version}])
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual([error["row"] for error in response.json()["errors"]], [1])
+
+    def test_malformed_rows_are_reported_and_nothing_is_written(self):
+        response = self.upload([
+            self.HEADER,
+            {"type": "project", "id": [1], "name": "Project", "description": "Imported"},
+            {"type": "project", "id": 1, "name": "Project", "description": "Imported"},
+            {"type": "page", "id": 2, "project": {"id": 1}, "name": "Page"},
+            {"type": ["page"], "id": 3},
+            {"type": "task", "section": 99, "title": "Orphan"},
+            ["not", "an", "object"],
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = {error["row"]: set(error["errors"]) for error in response.json()["errors"]}
+        self.assertEqual(errors, {2: {"id"}, 4: {"project"}, 5: {"type"}, 6: {"section"}, 7: {"row"}})
+        self.assertFalse(Project.objects.exists())
+
+    def test_figma_frames_become_pages(self):
+        document = {"name": "Design", "document": {"id": "0:0", "children": [
+            {"id": "0:1", "type": "CANVAS", "children": [
+                {"id": "1:1", "type": "FRAME", "name": "Login"},
+                {"id": "1:2", "type": "GROUP", "children": [{"id": "1:3", "type": "COMPONENT", "name": "Button"}]},
+                {"id": "1:4", "type": "TEXT", "name": "Note"},
+            ]},
+        ]}}
+        response = self.upload(json.dumps(document).encode(), "design.fig.json")
+        self.assertEqual(response.status_code, 201, response.content)
+        [project_id] = response.json()["projects"]
+        self.assertEqual(Project.objects.get(pk=project_id).name, "Design")
+        sections = [("MVP", []), ("DEV", []), ("DEPLOY", [])]
+        self.assertEqual(outline(project_id), [("Login", sections), ("Button", sections)])
+
+    def test_malformed_figma_nodes_are_row_errors(self):
+        document = {"name": 5, "document": {"id": "0:0", "children": [
+            "canvas",
+            {"id": "0:1", "type": "CANVAS", "children": [
+                7, {"id": ["1:1"], "type": "FRAME", "name": "Login"}, {"id": "1:2", "type": "FRAME", "name": {"en": "Home"}},
+            ]},
+            {"id": "0:2", "type": "CANVAS", "children": {"id": "1:3"}},
+        ]}}
+        response = self.upload(json.dumps(document).encode(), "design.fig.json")
+        self.assertEqual(response.status_code, 400, response.content)
+        rows = [error["row"] for error in response.json()["errors"]]
+        self.assertIn("0:0", rows)
+        self.assertIn("0:1", rows)
+        self.assertIn(["1:1"], rows)
+        self.assertFalse(Project.objects.exists())
+
+
+class LastOpenedBufferTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(owner=User.objects.create(username="owner"), name="Project", description="")
+        self.buffer = LastOpenedBuffer()
+        self.addCleanup(lambda: self.buffer._timer and self.buffer._timer.cancel())
+
+    def test_flush_writes_the_latest_touch(self):
+        first, second = timezone.now() + timedelta(minutes=1), timezone.now() + timedelta(minutes=2)
+        with self.settings(CHECKLISTS={"LAST_OPENED_FLUSH_SECONDS": 3600}):
+            self.buffer.touch(self.project.pk, first)
+            self.buffer.touch(self.project.pk, second)
+        self.assertEqual(self.buffer.latest(self.project.pk, self.project.updated_at), second)
+        self.buffer.flush()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.updated_at, second)
+        self.assertEqual(self.buffer.latest(self.project.pk, self.project.updated_at), second)
+
+    def test_idle_buffer_flushes_without_another_touch(self):
+        flushed = threading.Event()
+
+        def flush():
+            self.buffer._pending.clear()
+            flushed.set()
+
+        with self.settings(CHECKLISTS={"LAST_OPENED_FLUSH_SECONDS": 0.05}), mock.patch.object(self.buffer, "flush", flush):
+            self.buffer.touch(self.project.pk)
+            self.assertTrue(flushed.wait(5))
+
+
+class OwnerKeyTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user)
+        self.others_project, self.others_page, _ = create_tree(self.other, name="Not mine")
+
+    def keys(self, model, **filters):
+        return set(model.objects.filter(**filters).values_list("project_id", "owner_id"))
+
+    def test_moved_section_takes_its_tasks_along(self):
+        second_project, _, _ = create_tree(self.user, name="Second")
+        self.section.page = Page.objects.create(project=second_project, name="Empty", order=2048)
+        self.section.save()
+        self.assertEqual(self.keys(ChecklistSection, pk=self.section.pk), {(second_project.pk, self.user.pk)})
+        self.assertEqual(self.keys(Task, section=self.section), {(second_project.pk, self.user.pk)})
+
+    def test_moved_page_takes_its_sections_and_tasks_along(self):
+        self.page.project = self.others_project
+        self.page.save()
+        keys = {(self.others_project.pk, self.other.pk)}
+        self.assertEqual(self.keys(ChecklistSection, page=self.page), keys)
+        self.assertEqual(self.keys(Task, section__page=self.page), keys)
+
+    def test_check_owner_keys_finds_and_fixes_drift(self):
+        task = Task.objects.filter(section=self.section).first()
+        Task.objects.filter(pk=task.pk).update(project=self.others_project)
+        ChecklistSection.objects.filter(pk=self.section.pk).update(owner=self.other)
+        versions = dict(Project.objects.values_list("pk", "version"))
+
+        output = io.StringIO()
+        call_command("check_owner_keys", stdout=output)
+        self.assertIn("1 inconsistent sections, 1 inconsistent tasks.", output.getvalue())
+        self.assertEqual(self.keys(Task, pk=task.pk), {(self.others_project.pk, self.user.pk)})
+
+        call_command("check_owner_keys", "--fix", stdout=io.StringIO())
+        self.assertEqual(self.keys(ChecklistSection, pk=self.section.pk), {(self.project.pk, self.user.pk)})
+        self.assertEqual(self.keys(Task, pk=task.pk), {(self.project.pk, self.user.pk)})
+        # both projects the task was listed under change, and their clients resync from a snapshot
+        for project in (self.project, self.others_project):
+            project.refresh_from_db()
+            self.assertEqual((project.version, project.sync_floor), (versions[project.pk] + 1, project.version))
+
+        output = io.StringIO()
+        call_command("check_owner_keys", stdout=output)
+        self.assertIn("0 inconsistent sections, 0 inconsistent tasks.", output.getvalue())
+
+
+class TaskCounterTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user, tasks=("Task 1", "Task 2", "Task 3"))
+        self.dev = ChecklistSection.objects.create(page=self.page, title="DEV", order=1)
+        self.other_project, self.other_page, self.other_section = create_tree(self.user, name="Other")
+        self.tasks = list(Task.objects.filter(section=self.section).order_by("order"))
+
+    def assertCountersMatch(self):
+        for model, parent in counters.TASK_PARENTS.items():
+            for row in model.objects.all():
+                counted = Task.objects.filter(**{parent: row}).aggregate(
+                    tasks=Count("pk"), completed=Count("pk", filter=Q(completed=True)),
+                )
+                self.assertEqual(
+                    (row.task_count, row.completed_count), (counted["tasks"], counted["completed"]),
+                    f"{model.__name__} {row.pk}",
+                )
+
+    def patch(self, name, pk, data):
+        response = self.client.patch(reverse(name, args=[pk]), data, format="json", secure=True)
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def delete(self, name, pk):
+        response = self.client.delete(reverse(name, args=[pk]), secure=True)
+        self.assertEqual(response.status_code, 204, response.content)
+
+    def test_create(self):
+        self.assertCountersMatch()
+        self.assertEqual(self.post("task-list-create", {"title": "Task 4"}, self.dev.pk).status_code, 201)
+        self.assertCountersMatch()
+
+    def test_toggle(self):
+        self.patch("task-detail", self.tasks[0].pk, {"completed": True})
+        self.patch("task-detail", self.tasks[1].pk, {"completed": True})
+        self.assertCountersMatch()
+        self.patch("task-detail", self.tasks[0].pk, {"completed": False})
+        self.assertCountersMatch()
+        self.assertEqual(Project.objects.get(pk=self.project.pk).completed_count, 1)
+
+    def test_move_task(self):
+        self.patch("task-detail", self.tasks[0].pk, {"completed": True})
+        for section in (self.dev, self.other_section):
+            response = self.post("task-move", {"section": section.pk}, self.tasks[0].pk)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertCountersMatch()
+
+    def test_move_section_and_page(self):
+        self.patch("task-detail", self.tasks[0].pk, {"completed": True})
+        other_page = Page.objects.create(project=self.other_project, name="Second", order=2048)
+        self.section.page = other_page
+        self.section.save()
+        self.assertCountersMatch()
+        self.page.project = self.other_project
+        self.page.save()
+        self.assertCountersMatch()
+
+    def test_delete(self):
+        self.patch("task-detail", self.tasks[0].pk, {"completed": True})
+        self.delete("task-detail", self.tasks[1].pk)
+        self.assertCountersMatch()
+        # cascades
+        self.delete("section-detail", self.section.pk)
+        self.assertCountersMatch()
+        self.delete("page-detail", self.other_page.pk)
+        self.assertCountersMatch()
+
+    def test_batch(self):
+        response = self.post("batch", {"operations": [
+            {"op": "create", "model": "task", "parent": self.dev.pk, "data": {"title": "New", "completed": True}},
+            {"op": "update", "model": "task", "id": self.tasks[0].pk, "data": {"completed": True}},
+            {"op": "delete", "model": "task", "id": self.tasks[1].pk},
+        ]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertCountersMatch()
+
+    def test_reconcile_fixes_drift(self):
+        Page.objects.filter(pk=self.page.pk).update(task_count=99)
+        ChecklistSection.objects.filter(pk=self.section.pk).update(completed_count=5)
+        versions = dict(Project.objects.values_list("pk", "version"))
+        call_command("reconcile_task_counts", stdout=io.StringIO())
+        self.assertEqual(Page.objects.get(pk=self.page.pk).task_count, 99)
+        output = io.StringIO()
+        call_command("reconcile_task_counts", "--fix", stdout=output)
+        self.assertIn("1 drifted pages.", output.getvalue())
+        self.assertCountersMatch()
+        version = Project.objects.get(pk=self.project.pk).version
+        self.assertEqual(version, versions[self.project.pk] + 1)
+        self.assertEqual(Project.objects.get(pk=self.other_project.pk).version, versions[self.other_project.pk])
+        # delta sync lists the recounted rows
+        changes = project_changes(Project.objects.get(pk=self.project.pk), version - 1)
+        self.assertEqual({page["id"] for page in changes["pages"]}, {self.page.pk})
+        self.assertEqual({section["id"] for section in changes["sections"]}, {self.section.pk})
+
+
+class TaskStatsTests(ApiTestCase):
+    """The daily rollups must match what grouping the tasks table by day would give."""
+
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.now()
+        with self.on_day(2):
+            self.project, self.page, self.mvp = create_tree(self.user, tasks=("A", "B", "C"))
+            self.dev = ChecklistSection.objects.create(page=self.page, title="DEV", order=1)
+        self.a, self.b, self.c = Task.objects.filter(section=self.mvp).order_by("order")
+
+    def on_day(self, days_ago):
+        return mock.patch("django.utils.timezone.now", return_value=self.today - timedelta(days=days_ago))
+
+    def set_completed(self, task, completed):
+        task.completed = completed
+        task.save()
+
+    def aggregated(self, field, *group_by):
+        rows = (
+            Task.objects.filter(**{f"{field}_at__isnull": False})
+            .values(*group_by, day=TruncDate(f"{field}_at"))
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+        return {tuple(row[name] for name in (*group_by, "day")): row["count"] for row in rows}
+
+    def stored(self, model, field, *key):
+        return {
+            tuple(row[:-1]): row[-1]
+            for row in model.objects.filter(**{f"{field}__gt": 0}).values_list(*key, "day", field)
+        }
+
+    def assertRollupsMatch(self):
+        for field in ("created", "completed"):
+            self.assertEqual(self.stored(DailyUserStats, field, "user_id"), self.aggregated(field, "owner_id"), field)
+            self.assertEqual(
+                self.stored(DailyProjectStats, field, "project_id", "stage"),
+                self.aggregated(field, "project_id", "section__title"), field,
+            )
+        # nothing left over below zero either
+        self.assertFalse(DailyUserStats.objects.filter(Q(created__lt=0) | Q(completed__lt=0)).exists())
+        self.assertFalse(DailyProjectStats.objects.filter(Q(created__lt=0) | Q(completed__lt=0)).exists())
+
+    def test_completion_goes_into_the_day_it_happened(self):
+        with self.on_day(2):
+            self.set_completed(self.a, True)
+        with self.on_day(1):
+            self.set_completed(self.b, True)
+        self.assertRollupsMatch()
+        burndown = self.get("user-statistics", data={"days": 3}).json()["burndown"]
+        self.assertEqual(
+            [(day["created"], day["completed"], day["remaining"]) for day in burndown],
+            [(3, 1, 2), (0, 1, 1), (0, 0, 1)],
+        )
+
+    def test_uncompletion_takes_the_completion_out_of_its_original_day(self):
+        with self.on_day(2):
+            self.set_completed(self.a, True)
+        with self.on_day(1):
+            self.set_completed(self.a, False)
+        self.assertRollupsMatch()
+        self.assertEqual(DailyUserStats.objects.get(day=(self.today - timedelta(days=2)).date()).completed, 0)
+        with self.on_day(0):
+            self.set_completed(self.a, True)
+        self.assertRollupsMatch()
+        self.assertEqual(DailyUserStats.objects.get(day=self.today.date()).completed, 1)
+
+    def test_moves_and_deletes(self):
+        with self.on_day(1):
+            self.set_completed(self.b, True)
+        self.b.section = self.dev
+        self.b.save()
+        self.assertRollupsMatch()
+        self.mvp.title = "DEPLOY"
+        self.mvp.save()
+        self.assertRollupsMatch()
+        self.c.delete()
+        self.assertRollupsMatch()
+        self.dev.delete()
+        self.assertRollupsMatch()
+
+    def test_rebuild_matches_the_incremental_rollups(self):
+        with self.on_day(1):
+            self.set_completed(self.a, True)
+        call_command("rebuild_task_stats", "--check", stdout=io.StringIO())
+        DailyUserStats.objects.update(completed=7)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_task_stats", "--check", stdout=io.StringIO())
+        call_command("rebuild_task_stats", stdout=io.StringIO())
+        self.assertRollupsMatch()
+
+
+class SearchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(owner=self.user, name="Launch checklist", description="Everything before the launch")
+        self.page = Page.objects.create(project=self.project, name="Landing page", order=1024)
+        self.section = ChecklistSection.objects.create(page=self.page, title="MVP")
+        self.task = Task.objects.create(section=self.section, title="Write the launch post", order=1024)
+        self.others_project = Project.objects.create(owner=self.other, name="Launch plans", description="")
+
+    def search(self, text, **params):
+        response = self.get("search", data={"q": text, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def found(self, text):
+        return [(result["kind"], result["id"]) for result in self.search(text)["results"]]
+
+    def test_finds_matches_of_every_word(self):
+        self.assertEqual(set(self.found("launch")), {("project", self.project.pk), ("task", self.task.pk)})
+        self.assertEqual(self.found("launch post"), [("task", self.task.pk)])
+        self.assertEqual(self.found("landing"), [("page", self.page.pk)])
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.found("land"), [("page", self.page.pk)])
+        self.assertEqual(self.found("lan page"), [])
+
+    def test_title_matches_rank_above_body_matches(self):
+        body_only = Project.objects.create(owner=self.user, name="Notes", description="launch launch launch")
+        results = self.search("launch")["results"]
+        kinds = [(result["kind"], result["id"]) for result in results]
+        self.assertLess(kinds.index(("project", self.project.pk)), kinds.index(("project", body_only.pk)))
+        self.assertEqual([result["score"] for result in results], sorted((result["score"] for result in results), reverse=True))
+
+    def test_only_the_users_own_entries(self):
+        self.assertNotIn(("project", self.others_project.pk), self.found("plans launch"))
+        self.assertEqual(self.found("plans"), [])
+
+    def test_rename_updates_the_index(self):
+        self.task.title = "Record the demo video"
+        self.task.save()
+        self.assertEqual(self.found("launch post"), [])
+        [result] = self.search("demo")["results"]
+        self.assertEqual((result["kind"], result["id"], result["title"]), ("task", self.task.pk, "Record the demo video"))
+
+    def test_deletes_leave_the_index(self):
+        self.page.delete()
+        self.assertEqual(self.found("launch"), [("project", self.project.pk)])
+        self.project.delete()
+        self.assertEqual(self.found("launch"), [])
+
+    def test_moved_project_is_found_by_its_new_owner(self):
+        self.project.owner = self.other
+        self.project.save()
+        self.assertEqual(self.found("launch"), [])
+        self.client.force_authenticate(self.other)
+        self.assertEqual(
+            set(self.found("launch")),
+            {("project", self.project.pk), ("task", self.task.pk), ("project", self.others_project.pk)},
+        )
+
+    def test_results_are_paged(self):
+        for i in range(3):
+            Task.objects.create(section=self.section, title=f"Launch step {i}", order=(i + 2) * 1024)
+        first = self.search("launch", limit=3)
+        second = self.search("launch", cursor=first["next"])
+        ids = [(result["kind"], result["id"]) for result in first["results"] + second["results"]]
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+        self.assertIsNone(second["next"])
+
+    def test_rebuild_restores_the_index(self):
+        search.rebuild()
+        self.assertEqual(set(self.found("launch")), {("project", self.project.pk), ("task", self.task.pk)})
+
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user, tasks=("Task 1", "Task 2"))
+        self.project.description = "Exported"
+        self.project.save()
+        task = Task.objects.get(section=self.section, title="Task 1")
+        task.completed = True
+        task.save()
+        second_page = Page.objects.create(project=self.project, name="Second", order=512)
+        ChecklistSection.objects.create(page=second_page, title="DEV")
+        self.others_project, _, _ = create_tree(self.other, name="Not mine")
+
+    def export(self, **headers):
+        response = self.client.get(reverse("export"), secure=True, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return response, b"".join(response.streaming_content)
+
+    def test_format_and_owner_scoping(self):
+        _, content = self.export()
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual((rows[0]["type"], rows[0]["version"]), ("devcheck-export", 1))
+        self.assertEqual(
+            [(row["type"], row.get("name") or row.get("title")) for row in rows[1:]],
+            [
+                ("project", "Project"),
+                ("page", "Second"), ("section", "DEV"),
+                ("page", "Page"), ("section", "MVP"), ("task", "Task 1"), ("task", "Task 2"),
+            ],
+        )
+        self.assertEqual([row["id"] for row in rows if row["type"] == "project"], [self.project.pk])
+
+    def test_gzip(self):
+        response, content = self.export(HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        # the header holds the export time; the rows after it must be the same
+        self.assertEqual(gzip.decompress(content).split(b"\n")[1:], self.export()[1].split(b"\n")[1:])
+
+    def test_round_trip_through_import(self):
+        # whole seconds, as the export keeps times to the millisecond
+        now = timezone.now().replace(microsecond=0)
+        Task.objects.filter(section=self.section).update(created_at=now - timedelta(days=3))
+        Task.objects.filter(section=self.section, completed=True).update(completed_at=now - timedelta(days=1))
+        _, content = self.export()
+        response = self.client.post(
+            reverse("import"), {"file": SimpleUploadedFile("export.ndjson", content)}, format="multipart", secure=True,
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        [project_id] = response.json()["projects"]
+        self.assertNotEqual(project_id, self.project.pk)
+        imported = Project.objects.get(pk=project_id)
+        self.assertEqual(
+            (imported.owner, imported.name, imported.description, imported.task_count, imported.completed_count),
+            (self.user, self.project.name, self.project.description, 2, 1),
+        )
+        self.assertEqual(outline(project_id, completed=True), outline(self.project.pk, completed=True))
+        times = lambda project_id: list(
+            Task.objects.filter(project_id=project_id).order_by("order").values_list("title", "created_at", "completed_at")
+        )
+        self.assertEqual(times(project_id), times(self.project.pk))
+
+
+class ProjectTreeCreateTests(ApiTestCase):
+    def tree(self, pages=2, tasks=3):
+        return {"name": "Project", "description": "Nested", "pages": [
+            {"name": f"Page {page}", "sections": [
+                {"title": "MVP", "tasks": [{"title": f"Task {task}", "completed": task == 0} for task in range(tasks)]},
+                {"title": "DEV"},
+            ]}
+            for page in range(pages)
+        ] + [{"name": "Defaults"}]}
+
+    def create(self, data, format="json"):
+        return self.client.post(reverse("project-tree-create"), data, format=format, secure=True)
+
+    def test_nested_create(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create(self.tree())
+        self.assertEqual(response.status_code, 201, response.content)
+        project = Project.objects.get(pk=response.json()["id"])
+        tasks = ["Task 0", "Task 1", "Task 2"]
+        self.assertEqual(outline(project.pk), [
+            ("Page 0", [("MVP", tasks), ("DEV", [])]),
+            ("Page 1", [("MVP", tasks), ("DEV", [])]),
+            ("Defaults", [("MVP", []), ("DEV", []), ("DEPLOY", [])]),
+        ])
+        self.assertEqual((project.owner, project.task_count, project.completed_count), (self.user, 6, 2))
+
+        with CaptureQueriesContext(connection) as bigger:
+            self.assertEqual(self.create(self.tree(pages=5, tasks=10)).status_code, 201)
+        self.assertEqual(len(queries), 25, "\n".join(query["sql"] for query in queries))
+        # rows are written in bulk, so a bigger tree takes no more queries (fewer, as today's stats rows exist now)
+        self.assertLessEqual(len(bigger), len(queries))
+
+    def test_invalid_nested_row_writes_nothing(self):
+        data = self.tree()
+        data["pages"][1]["sections"][0]["tasks"][2]["title"] = "x" * 201
+        response = self.create(data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pages", response.json())
+        self.assertFalse(Project.objects.exists())
+
+    def test_failed_write_rolls_back_the_whole_tree(self):
+        with mock.patch.object(search, "index", side_effect=IntegrityError("search index unavailable")):
+            with self.assertRaises(IntegrityError):
+                self.create(self.tree())
+        self.assertEqual((Project.objects.count(), Page.objects.count(), Task.objects.count()), (0, 0, 0))
+
+    def test_malformed_multipart_pages(self):
+        for pages in ("not json", "[{", "5", '{"name": "Page"}', "[1]", "null"):
+            with self.subTest(pages=pages):
+                response = self.create({"name": "Project", "description": "Nested", "pages": pages}, format="multipart")
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn("pages", response.json())
+        self.assertFalse(Project.objects.exists())
+
+        response = self.create({"name": "Project", "description": "Nested", "pages": json.dumps([{"name": "Home"}])}, format="multipart")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual([name for name, _ in outline(response.json()["id"])], ["Home"])
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create_user(username="owner", password="old password")
+        self.token = AccessToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def cached(self):
+        return user_cache.get(self.user.pk, self.token["jti"])
+
+    def get_user(self):
+        return self.client.get(reverse("user-detail"), secure=True)
+
+    def test_password_change_evicts_the_cached_user(self):
+        self.assertEqual(self.get_user().status_code, 200)
+        self.assertTrue(self.cached().check_password("old password"))
+        response = self.client.patch(reverse("user-detail"), {"password": "new password"}, format="json", secure=True)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIsNone(self.cached())
+        self.assertEqual(self.get_user().status_code, 200)
+        self.assertTrue(self.cached().check_password("new password"))
+
+    def test_deactivation_evicts_the_cached_user(self):
+        self.assertEqual(self.get_user().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.cached())
+        self.assertEqual(self.get_user().status_code, 401)
+
+    def test_size_limit(self):
+        users = [SimpleNamespace(pk=pk) for pk in range(3)]
+        with self.settings(CHECKLISTS={"AUTH_CACHE_SIZE": 2}):
+            user_cache.set(0, "a", users[0])
+            user_cache.set(1, "a", users[1])
+            # a hit makes an entry the most recently used
+            self.assertIs(user_cache.get(0, "a"), users[0])
+            user_cache.set(2, "a", users[2])
+        self.assertEqual([user_cache.get(pk, "a") for pk in range(3)], [users[0], None, users[2]])
+
+
+class TreeCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        tree_cache.cache.clear()
+        self.project, self.page, self.section = create_tree(self.user)
+        self.task = Task.objects.filter(section=self.section).first()
+
+    def tree(self):
+        return views.project_tree(Project.objects.get(pk=self.project.pk))
+
+    def cached(self):
+        return tree_cache.cache.get(tree_cache.key(self.project.pk)) is not None
+
+    def test_hit_and_miss(self):
+        before = tree_cache.stats()
+        data, hit = self.tree()
+        self.assertFalse(hit)
+        self.assertEqual(self.tree(), (data, True))
+        stats = tree_cache.stats()
+        self.assertEqual((stats["hits"] - before["hits"], stats["misses"] - before["misses"]), (1, 1))
+        # an entry built from an older version is never served
+        self.assertIsNone(tree_cache.get(self.project.pk, Project.objects.get(pk=self.project.pk).version - 1))
+
+        response = self.get("project-detail", self.project.pk)
+        self.assertEqual((response["X-Cache"], response.json()), ("HIT", data))
+
+    def test_writes_invalidate(self):
+        writes = {
+            "task": lambda: Task.objects.create(section=self.section, title="New"),
+            "task update": lambda: self.client.patch(
+                reverse("task-detail", args=[self.task.pk]), {"completed": True}, format="json", secure=True,
+            ),
+            "section": lambda: ChecklistSection.objects.create(page=self.page, title="DEV", order=1),
+            "page": lambda: Page.objects.create(project=self.project, name="Second", order=2048),
+            "project": lambda: self.client.patch(
+                reverse("project-detail", args=[self.project.pk]), {"name": "Renamed"}, format="multipart", secure=True,
+            ),
+            "task delete": lambda: self.client.delete(reverse("task-detail", args=[self.task.pk]), secure=True),
+        }
+        for name, write in writes.items():
+            with self.subTest(name):
+                self.tree()
+                self.assertTrue(self.cached())
+                write()
+                self.assertFalse(self.cached())
+                data, hit = self.tree()
+                self.assertFalse(hit)
+                self.assertEqual(data, build_project_tree(Project.objects.get(pk=self.project.pk)))
+
+    def test_coalesced_writes_invalidate_once_at_the_end(self):
+        self.tree()
+        with mock.patch.object(tree_cache, "invalidate", wraps=tree_cache.invalidate) as invalidate:
+            with transaction.atomic(), coalesced_version_bumps():
+                Task.objects.create(section=self.section, title="New")
+                ChecklistSection.objects.create(page=self.page, title="DEV", order=1)
+                Page.objects.create(project=self.project, name="Second", order=2048)
+                self.assertEqual(invalidate.call_count, 0)
+                self.assertTrue(self.cached())
+            invalidate.assert_called_once_with({self.project.pk: mock.ANY})
+        self.assertFalse(self.cached())
+
+
+class BuildProjectTreeTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user, tasks=("Task 1", "Task 2", "Task 3"))
+        # orders that disagree with ids, ties broken by id, and an empty page and section
+        Page.objects.create(project=self.project, name="First", order=512)
+        Page.objects.create(project=self.project, name="Empty", order=4096)
+        dev = ChecklistSection.objects.create(page=self.page, title="DEV", order=1)
+        ChecklistSection.objects.create(page=self.page, title="DEPLOY", order=1)
+        Task.objects.create(section=dev, title="Done", completed=True, order=RANK_GAP)
+        Task.objects.create(section=dev, title="Tied", order=RANK_GAP)
+        Task.objects.filter(section=self.section, title="Task 3").update(order=1)
+        create_tree(self.user, name="Other")
+
+    def serialized(self):
+        project = Project.objects.prefetch_related(
+            Prefetch("pages", queryset=Page.objects.order_by("order", "id")),
+            Prefetch("pages__sections", queryset=ChecklistSection.objects.order_by("order", "id")),
+            Prefetch("pages__sections__tasks", queryset=Task.objects.order_by("order", "id")),
+        ).get(pk=self.project.pk)
+        return json.loads(json.dumps(ProjectDetailSerializer(project).data))
+
+    def test_matches_the_detail_serializer(self):
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual(build_project_tree(project), self.serialized())
+        self.assertEqual(async_to_sync(abuild_project_tree)(project), self.serialized())
+        self.assertEqual([page["name"] for page in build_project_tree(project)["pages"]], ["First", "Page", "Empty"])
+
+
+class AsyncGetTests(TestCase):
+    """The project list, project detail and user GETs, served by the async views under ASGI."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="owner")
+        self.project, _, _ = create_tree(self.user)
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def get(self, name, *args, headers=None):
+        return await AsyncClient().get(reverse(name, args=args), headers=headers or self.headers, secure=True)
+
+    async def test_ok_and_not_modified(self):
+        for name, args in (("project-list", ()), ("project-detail", (self.project.pk,))):
+            with self.subTest(name):
+                response = await self.get(name, *args)
+                self.assertEqual(response.status_code, 200, response.content)
+                response = await self.get(name, *args, headers={**self.headers, "If-None-Match": response["ETag"]})
+                self.assertEqual(response.status_code, 304)
+        response = await self.get("user-detail")
+        self.assertEqual((response.status_code, response.json()["username"]), (200, "owner"))
+
+    async def test_unauthenticated(self):
+        for name, args in (("project-list", ()), ("project-detail", (self.project.pk,)), ("user-detail", ())):
+            for headers in ({"Accept": "application/json"}, {"Authorization": "Bearer not-a-token"}):
+                with self.subTest(name, headers=headers):
+                    response = await self.get(name, *args, headers=headers)
+                    self.assertEqual(response.status_code, 401)
+                    self.assertIn("Bearer", response["WWW-Authenticate"])
+
+    async def test_other_users_project_is_not_found(self):
+        other = await User.objects.acreate(username="other")
+        project, _, _ = await sync_to_async(create_tree)(other)
+        self.assertEqual((await self.get("project-detail", project.pk)).status_code, 404)
+
+
+class ConditionalGetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, _, self.section = create_tree(self.user)
+
+    def assertNotModified(self, name, etag, *args, if_none_match=None, **kwargs):
+        response = self.get(name, *args, HTTP_IF_NONE_MATCH=if_none_match or etag, **kwargs)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((response["ETag"], response.content), (etag, b""))
+
+    def assertModified(self, name, etag, *args, **kwargs):
+        response = self.get(name, *args, HTTP_IF_NONE_MATCH=etag, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        return response["ETag"]
+
+    def test_project_detail(self):
+        response = self.get("project-detail", self.project.pk)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertNotModified("project-detail", etag, self.project.pk)
+        self.assertNotModified("project-detail", etag, self.project.pk, if_none_match=f'"other", {etag}')
+
+        Task.objects.create(section=self.section, title="Task 3", order=3 * 1024)
+        etag = self.assertModified("project-detail", etag, self.project.pk)
+        [page] = self.get("project-detail", self.project.pk).json()["pages"]
+        self.assertEqual([task["title"] for task in page["sections"][0]["tasks"]], ["Task 1", "Task 2", "Task 3"])
+        self.assertNotModified("project-detail", etag, self.project.pk)
+
+    def test_other_users_project_is_not_found_whatever_the_etag(self):
+        project, _, _ = create_tree(self.other)
+        self.assertEqual(self.get("project-detail", project.pk, HTTP_IF_NONE_MATCH="*").status_code, 404)
+
+    def test_project_list(self):
+        response = self.get("project-list")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertNotModified("project-list", etag)
+
+        # other users' changes don't touch this user's list
+        create_tree(self.other)
+        self.assertNotModified("project-list", etag)
+
+        self.project.name = "Renamed"
+        self.project.save()
+        etag = self.assertModified("project-list", etag)
+        create_tree(self.user, name="Second")
+        self.assertModified("project-list", etag)
+
+    def test_paginated_list_has_its_own_etag(self):
+        etag = self.get("project-list")["ETag"]
+        response = self.get("project-list", data={"limit": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotModified("project-list", response["ETag"], data={"limit": 1})
+
+
+class KeysetPaginationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user, tasks=[f"Task {i}" for i in range(1, 8)])
+
+    def pages(self, name, *args, limit):
+        """Every page of a list, following the cursors."""
+        response = self.get(name, *args, data={"limit": limit})
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            pages.append(body["results"])
+            if body["next"] is None:
+                return pages
+            response = self.get(name, *args, data={"cursor": body["next"]})
+
+    def titles(self, rows):
+        return [row.get("title") or row.get("name") for row in rows]
+
+    def test_pages_cover_the_list_once_in_order(self):
+        pages = self.pages("task-list-create", self.section.pk, limit=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(self.titles(sum(pages, [])), [f"Task {i}" for i in range(1, 8)])
+
+    def test_unpaged_unless_asked(self):
+        self.assertEqual(len(self.get("task-list-create", self.section.pk).json()), 7)
+        self.assertEqual(len(self.get("task-list-create", self.section.pk, data={"limit": "all"}).json()), 7)
+
+    def test_cursor_is_stable_under_inserts_and_deletes(self):
+        first = self.get("task-list-create", self.section.pk, data={"limit": 3}).json()
+        self.assertEqual(self.titles(first["results"]), ["Task 1", "Task 2", "Task 3"])
+        # rows added before the cursor and the row it points at going away don't shift the next page
+        Task.objects.create(section=self.section, title="Task 0", order=1)
+        Task.objects.get(section=self.section, title="Task 3").delete()
+        Task.objects.create(section=self.section, title="Task 4.5", order=4 * 1024 + 512)
+        second = self.get("task-list-create", self.section.pk, data={"cursor": first["next"]}).json()
+        self.assertEqual(self.titles(second["results"]), ["Task 4", "Task 4.5", "Task 5"])
+
+    def test_ties_and_nulls_in_descending_order(self):
+        now = timezone.now()
+        projects = [self.project] + [create_tree(self.user, name=f"Project {i}")[0] for i in range(2, 7)]
+        opened = dict(zip((project.pk for project in projects), [now, now, None, now - timedelta(hours=1), None, now]))
+        for pk, updated_at in opened.items():
+            Project.objects.filter(pk=pk).update(updated_at=updated_at)
+        # -updated_at, -id with never-opened projects last
+        expected = sorted(opened, key=lambda pk: (opened[pk] is None, -(opened[pk] or now).timestamp(), -pk))
+        pages = self.pages("project-list", limit=2)
+        self.assertEqual([row["id"] for row in sum(pages, [])], expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.get("task-list-create", self.section.pk, data={"cursor": "not a cursor"}).status_code, 404)
+
+
+class SyncTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project, self.page, self.section = create_tree(self.user, tasks=("Task 1", "Task 2", "Task 3"))
+        self.task1, self.task2, self.task3 = Task.objects.filter(section=self.section).order_by("order")
+        # deleting an instance clears its pk
+        self.ids = [self.section.pk, self.task1.pk, self.task2.pk, self.task3.pk]
+
+    def version(self):
+        return Project.objects.get(pk=self.project.pk).version
+
+    def sync(self, since):
+        response = self.get("project-sync", self.project.pk, data={"since": since})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_delta_lists_writes_and_deletions_since_a_version(self):
+        since = self.version()
+        self.task1.title = "Renamed"
+        self.task1.save()
+        added = Task.objects.create(section=self.section, title="Task 4", order=4 * 1024)
+        self.task2.delete()
+
+        delta = self.sync(since)
+        self.assertEqual((delta["snapshot"], delta["version"]), (False, self.version()))
+        self.assertEqual([task["id"] for task in delta["tasks"]], [self.task1.pk, added.pk])
+        self.assertEqual((delta["pages"], delta["sections"]), ([], []))
+        self.assertEqual(delta["deleted"], {"pages": [], "sections": [], "tasks": [self.ids[2]]})
+
+        delta = self.sync(self.version())
+        self.assertEqual((delta["tasks"], delta["deleted"]["tasks"]), ([], []))
+
+    def test_cascade_leaves_one_tombstone(self):
+        since = self.version()
+        self.section.delete()
+        delta = self.sync(since)
+        self.assertEqual(delta["deleted"], {"pages": [], "sections": [self.ids[0]], "tasks": []})
+
+    def test_task_moved_to_another_project_is_deleted_from_the_old_one(self):
+        since = self.version()
+        _, _, other_section = create_tree(self.user, name="Other", tasks=())
+        self.task3.section = other_section
+        self.task3.save()
+        self.assertEqual(self.sync(since)["deleted"]["tasks"], [self.task3.pk])
+
+    def test_snapshot_when_a_delta_cannot_be_listed(self):
+        for since in (0, self.version() + 1):
+            with self.subTest(since=since):
+                body = self.sync(since)
+                self.assertTrue(body["snapshot"])
+                self.assertEqual(len(body["project"]["pages"][0]["sections"][0]["tasks"]), 3)
+
+        since = self.version()
+        self.task1.title = "Renamed"
+        self.task1.save()
+        self.task2.delete()
+        with self.settings(CHECKLISTS={"SYNC_MAX_CHANGES": 1}):
+            self.assertTrue(self.sync(since)["snapshot"])
+        with self.settings(CHECKLISTS={"SYNC_MAX_CHANGES": 2}):
+            self.assertFalse(self.sync(since)["snapshot"])
+
+    def test_invalid_since(self):
+        self.assertEqual(self.get("project-sync", self.project.pk, data={"since": "yesterday"}).status_code, 400)
+
+    def test_pruning_raises_the_sync_floor(self):
+        before_delete = self.version()
+        self.task1.delete()
+        between = self.version()
+        self.task2.delete()
+        Tombstone.objects.filter(object_id=self.ids[1]).update(deleted_at=timezone.now() - timedelta(days=31))
+
+        call_command("prune_tombstones", stdout=io.StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [self.ids[2]])
+        self.assertEqual(Project.objects.get(pk=self.project.pk).sync_floor, between)
+        # a client that never saw the pruned deletion has to start over; later ones still get a delta
+        self.assertTrue(self.sync(before_delete)["snapshot"])
+        delta = self.sync(between)
+        self.assertEqual((delta["snapshot"], delta["deleted"]["tasks"]), (False, [self.ids[2]]))
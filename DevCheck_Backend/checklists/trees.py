@@ -0,0 +1,77 @@
+from .middleware import serializing
+from .models import Page, ChecklistSection, Task
+from .serializers import ProjectDetailSerializer
+
+
+def project_fields(project):
+    """The project's own fields from ``ProjectDetailSerializer``, without its pages."""
+    return {
+        'id': project.id,
+        'name': project.name,
+        'description': project.description,
+        'link': project.link,
+        'project_status': project.project_status,
+        'image': ProjectDetailSerializer().get_image(project),
+        'image_status': project.image_status,
+    }
+
+
+def _tree_queries(project):
+    return (
+        Page.objects.filter(project=project).order_by('order', 'id').values_list('id', 'name', 'order'),
+        ChecklistSection.objects.filter(project=project)
+        .order_by('order', 'id')
+        .values_list('id', 'page_id', 'title', 'order'),
+        Task.objects.filter(project=project)
+        .order_by('order', 'id')
+        .values_list('id', 'section_id', 'title', 'completed', 'order'),
+    )
+
+
+def _assemble_tree(project, page_rows, section_rows, task_rows):
+    pages = []
+    pages_by_id = {}
+    for page_id, name, order in page_rows:
+        pages_by_id[page_id] = {'id': page_id, 'name': name, 'order': order, 'sections': []}
+        pages.append(pages_by_id[page_id])
+
+    sections_by_id = {}
+    for section_id, page_id, title, order in section_rows:
+        sections_by_id[section_id] = {'id': section_id, 'title': title, 'order': order, 'tasks': []}
+        pages_by_id[page_id]['sections'].append(sections_by_id[section_id])
+
+    for task_id, section_id, title, completed, order in task_rows:
+        sections_by_id[section_id]['tasks'].append(
+            {'id': task_id, 'title': title, 'completed': completed, 'order': order}
+        )
+
+    return {
+        'id': project.id,
+        'name': project.name,
+        'description': project.description,
+        'link': project.link,
+        'pages': pages,
+        'project_status': project.project_status,
+        'image': ProjectDetailSerializer().get_image(project),
+        'image_status': project.image_status,
+    }
+
+
+def build_project_tree(project):
+    """Read-only equivalent of ``ProjectDetailSerializer(project).data``.
+
+    Pages, sections and tasks are read with one flat ``values_list`` query each and assembled into
+    plain dicts and lists, skipping model instantiation and DRF field handling per row.
+    """
+    queries = _tree_queries(project)
+    with serializing():
+        return _assemble_tree(project, *queries)
+
+
+async def abuild_project_tree(project):
+    """``build_project_tree()`` using the async ORM."""
+    rows = []
+    for query in _tree_queries(project):
+        rows.append([row async for row in query])
+    with serializing():
+        return _assemble_tree(project, *rows)
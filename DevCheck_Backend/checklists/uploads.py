@@ -0,0 +1,145 @@
+import logging
+import os
+from datetime import timedelta
+from functools import partial
+
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .conf import checklists_setting
+from .events import project_event, publish
+from .models import Project, ImageUploadJob
+from .signals import record_changes
+
+logger = logging.getLogger(__name__)
+
+
+def staging_storage():
+    # the worker usually runs on another host than the web process, so not local disk (see UPLOAD_STAGING_STORAGE)
+    return storages[checklists_setting('UPLOAD_STAGING_STORAGE')]
+
+
+def stage_image(project, uploaded_file):
+    """Stage an uploaded image and queue it for the worker; the project shows as "pending" meanwhile.
+
+    Call it in the transaction that writes the project, so a failure leaves neither a project waiting for
+    a job that doesn't exist nor a job for a project write that was rolled back. Earlier jobs of the
+    project are cancelled. A running one is left to its worker, which sees the cancellation when it
+    finishes and throws its result away.
+    """
+    filename = os.path.basename(uploaded_file.name)
+    staging = staging_storage()
+    staged_name = staging.save(f"staging/{project.pk}/{filename}", uploaded_file)
+
+    try:
+        with transaction.atomic():
+            # the row locks make a worker's claim of one of these jobs wait, and then miss it
+            earlier = ImageUploadJob.objects.select_for_update().filter(project=project, status__in=["pending", "running"])
+            for job in earlier:
+                if job.status == "pending":
+                    # not before the cancellation is committed: a rollback would leave the job pending
+                    transaction.on_commit(partial(discard_files, job))
+                job.status = "cancelled"
+                job.save(update_fields=["status"])
+            job = ImageUploadJob.objects.create(project=project, staged_name=staged_name, filename=filename)
+            Project.objects.filter(pk=project.pk).update(image_status="pending")
+            project.image_status = "pending"
+            record_changes([project.pk])
+    except Exception:
+        staging.delete(staged_name)
+        raise
+    return job
+
+
+def discard_files(job):
+    """Delete the staged file of a job that won't run again, and the original it stored, if any."""
+    staging_storage().delete(job.staged_name)
+    if job.stored_name:
+        Project._meta.get_field("image").storage.delete(job.stored_name)
+
+
+def claim_jobs(limit):
+    """Take up to ``limit`` due jobs, including running ones whose worker lease ran out."""
+    now = timezone.now()
+    lease = now + timedelta(seconds=checklists_setting('UPLOAD_LEASE_SECONDS'))
+    due = (
+        ImageUploadJob.objects.filter(Q(status="pending") | Q(status="running"), run_after__lte=now)
+        .order_by("run_after", "pk")[:limit]
+    )
+    claimed = []
+    for job in due:
+        # only one worker wins the conditional update for a job
+        won = ImageUploadJob.objects.filter(pk=job.pk, status=job.status, run_after=job.run_after).update(
+            status="running", run_after=lease, attempts=job.attempts + 1,
+        )
+        if won:
+            job.status, job.run_after, job.attempts = "running", lease, job.attempts + 1
+            claimed.append(job)
+    return claimed
+
+
+def run_job(job):
+    # Pillow is only needed here, in the worker, so web processes don't pay for importing it
+    from .images import build_derivatives
+
+    staging = staging_storage()
+    # every write checks that the job is still ours: a newer upload may have cancelled it, or another
+    # worker may have claimed it again after our lease ran out
+    ours = ImageUploadJob.objects.filter(pk=job.pk, status="running", run_after=job.run_after)
+    try:
+        project = Project.objects.get(pk=job.project_id)
+        with staging.open(job.staged_name, "rb") as staged:
+            if job.stored_name:
+                # an earlier attempt already stored the original
+                project.image.name = job.stored_name
+            else:
+                project.image.save(job.filename, File(staged), save=False)
+                job.stored_name = project.image.name
+                ours.update(stored_name=job.stored_name)
+                staged.seek(0)
+            image_urls = build_derivatives(project, staged)
+    except Exception as error:
+        logger.exception("Image upload job %s failed (attempt %s)", job.pk, job.attempts)
+        retry = job.attempts < checklists_setting('UPLOAD_MAX_ATTEMPTS')
+        job.status = "pending" if retry else "failed"
+        job.last_error = str(error)
+        job.run_after = timezone.now() + timedelta(seconds=checklists_setting('UPLOAD_RETRY_SECONDS') * 2 ** (job.attempts - 1))
+        if not ours.update(status=job.status, last_error=job.last_error, run_after=job.run_after, stored_name=job.stored_name):
+            _let_go(job)
+        elif not retry:
+            Project.objects.filter(pk=job.project_id).update(image_status="failed")
+            discard_files(job)
+        return False
+
+    with transaction.atomic():
+        finished = ours.update(status="done")
+        if finished:
+            Project.objects.filter(pk=project.pk).update(image=project.image.name, image_urls=image_urls, image_status="ready")
+            record_changes([project.pk])
+            project.image_urls, project.image_status = image_urls, "ready"
+            publish(project.pk, project_event(project))
+    if finished:
+        staging.delete(job.staged_name)
+    else:
+        _let_go(job)
+    return True
+
+
+def _let_go(job):
+    # a job taken over by another worker is that worker's to finish; a cancelled one is nobody's
+    if ImageUploadJob.objects.filter(pk=job.pk, status="cancelled").exists():
+        discard_files(job)
+
+
+def run_pending_jobs(limit=10):
+    """Run due jobs once; returns (succeeded, failed) counts."""
+    succeeded = failed = 0
+    for job in claim_jobs(limit):
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -4,13 +4,20 @@ from .import views
 urlpatterns = [
 
     # PROJECTS
-    path('projects/', views.ProjectListCreate.as_view(), name='project-list'),
+    path('projects/', views.project_list, name='project-list'),
+    path('projects/tree/', views.ProjectTreeCreate.as_view(), name='project-tree-create'),
+    path('projects/dashboard/', views.ProjectDashboardView.as_view(), name='project-dashboard'),
     path('projects/delete/<int:pk>/', views.ProjectDelete.as_view(), name='project-delete'),
-    path('projects/<int:pk>/detail/', views.ProjectDetailView.as_view(), name='project-detail'),
+    path('projects/<int:pk>/detail/', views.project_detail, name='project-detail'),
+    path('projects/<int:pk>/sync/', views.ProjectSyncView.as_view(), name='project-sync'),
+    path('projects/<int:pk>/events/', views.project_events, name='project-events'),
+    path('projects/<int:pk>/events/ticket/', views.ProjectEventsTicketView.as_view(), name='project-events-ticket'),
+    path('projects/<int:pk>/statistics/', views.ProjectStatisticsView.as_view(), name='project-statistics'),
 
     # PAGES
     path('projects/<int:project_id>/pages/', views.PageListCreate.as_view(), name='page-list-create'),
     path('pages/<int:pk>/', views.PageDetail.as_view(), name='page-detail'),
+    path('pages/<int:pk>/move/', views.PageMove.as_view(), name='page-move'),
 
     # SECTIONS
     path('projects/<int:page_id>/sections/', views.ChecklistSectionListCreate.as_view(), name='section-list-create'),
@@ -19,6 +26,23 @@ urlpatterns = [
     # TASKS
     path('projects/<int:section_id>/tasks/', views.TaskListCreate.as_view(), name='task-list-create'),
     path('tasks/<int:pk>/', views.TaskDetail.as_view(), name='task-detail'),
+    path('tasks/<int:pk>/move/', views.TaskMove.as_view(), name='task-move'),
+
+    # BATCHED PAGE / SECTION / TASK CHANGES
+    path('batch/', views.BatchView.as_view(), name='batch'),
+
+    # TASK STATISTICS
+    path('statistics/', views.StatisticsView.as_view(), name='user-statistics'),
+
+    # EXPORT / IMPORT
+    path('export/', views.ExportView.as_view(), name='export'),
+    path('import/', views.ImportView.as_view(), name='import'),
+
+    # SEARCH
+    path('search/', views.SearchView.as_view(), name='search'),
+
+    # CACHE STATS (staff only)
+    path('cache/stats/', views.TreeCacheStatsView.as_view(), name='tree-cache-stats'),
 
     # ISSUES / COMPLAINTS
     path('issues/', views.CreateIssueView.as_view(), name='create-issue'),
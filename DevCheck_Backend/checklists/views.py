@@ -1,12 +1,85 @@
+import hashlib
+import re
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from django.utils.text import compress_sequence
+from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.models import User
+from django.core.signing import BadSignature
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, ValidationError
+from rest_framework_simplejwt.exceptions import InvalidToken
 from .serializers import * 
-from .models import Project, Page, ChecklistSection, Task, Issue
+from . import counters, export, imports, search, stats
+from .activity import last_opened
+from .authentication import CachedJWTAuthentication
+from .cache import tree_cache
+from .conf import checklists_setting
+from .events import event_stream, issue_ticket, publish_changes, read_ticket
+from .middleware import serializing
+from .models import Project, Page, ChecklistSection, Task, Issue, DailyProjectStats, DailyUserStats
+from .pagination import KeysetPagination, SearchPagination
+from .ranks import append_rank, assign_append_ranks, move
+from .signals import coalesced_version_bumps, record_changes
+from .sync import project_changes
+from .trees import abuild_project_tree, build_project_tree, project_fields
+from .uploads import stage_image
+
+
+def uploaded_image(request):
+    # the image is validated with the request but stored later by the process_image_jobs worker
+    if 'image' not in request.FILES:
+        return None
+    serializer = ImageUploadSerializer(data=request.FILES)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data['image']
+
+def project_tree(project):
+    # the project's full tree from this process's cache, and whether it was a hit
+    data = tree_cache.get(project.pk, project.version)
+    if data is not None:
+        return data, True
+    data = build_project_tree(project)
+    tree_cache.set(project.pk, project.version, data)
+    return data, False
+
+async def aproject_tree(project):
+    data = tree_cache.get(project.pk, project.version)
+    if data is not None:
+        return data, True
+    data = await abuild_project_tree(project)
+    tree_cache.set(project.pk, project.version, data)
+    return data, False
+
+def project_list_etag(request, versions):
+    # versions: (pk, version, updated_at) of each of the user's projects, ordered by pk
+    versions = [(pk, version, last_opened.latest(pk, updated_at)) for pk, version, updated_at in versions]
+    return quote_etag(hashlib.md5(repr((request.get_full_path(), versions)).encode()).hexdigest())
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
 
 class CreateUserView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -24,6 +97,8 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
 class ProjectListCreate(generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]    
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-updated_at', '-id')
 
     parser_classes = [MultiPartParser, FormParser]
 
@@ -32,8 +107,88 @@ class ProjectListCreate(generics.ListCreateAPIView):
         return Project.objects.filter(owner=user)
 
     def perform_create(self, serializer):
-        print(self.request.FILES)
-        serializer.save(owner=self.request.user)
+        image = uploaded_image(self.request)
+        with transaction.atomic():
+            project = serializer.save(owner=self.request.user)
+            if image:
+                stage_image(project, image)
+
+    def list(self, request, *args, **kwargs):
+        # the versions of the user's projects identify the whole list, so check them before serializing anything
+        versions = self.get_queryset().order_by('pk').values_list('pk', 'version', 'updated_at')
+        etag = project_list_etag(request, versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+# creates a project with all of its pages, sections and seed tasks in a single request
+class ProjectTreeCreate(generics.CreateAPIView):
+    serializer_class = ProjectTreeSerializer
+    permission_classes = [IsAuthenticated]
+
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    def perform_create(self, serializer):
+        image = serializer.validated_data.pop('image', None)
+        with transaction.atomic():
+            project = serializer.save(owner=self.request.user)
+            if image:
+                stage_image(project, image)
+
+# everything the dashboard needs in one request: the user, their projects and task progress
+class ProjectDashboardView(generics.GenericAPIView):
+    serializer_class = ProjectDashboardSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Project.objects.filter(owner=self.request.user)
+
+    def get_progress(self):
+        # the stored task counters of every page and section, in one query without touching the tasks table
+        rows = (
+            Page.objects.filter(project__owner=self.request.user)
+            .values(
+                'project_id', 'id', 'name', 'order', 'task_count', 'completed_count',
+                'sections__id', 'sections__title', 'sections__task_count', 'sections__completed_count',
+            )
+            .order_by('project_id', 'order', 'id', 'sections__order', 'sections__id')
+        )
+
+        progress = {}
+        pages = {}
+        for row in rows:
+            project = progress.setdefault(row['project_id'], {'pages': []})
+            page = pages.get(row['id'])
+            if page is None:
+                page = pages[row['id']] = {
+                    'id': row['id'],
+                    'name': row['name'],
+                    'total_tasks': row['task_count'],
+                    'completed_tasks': row['completed_count'],
+                    'sections': [],
+                }
+                project['pages'].append(page)
+            if row['sections__id'] is None:
+                continue
+            page['sections'].append({
+                'id': row['sections__id'],
+                'title': row['sections__title'],
+                'total_tasks': row['sections__task_count'],
+                'completed_tasks': row['sections__completed_count'],
+            })
+        return progress
+
+    def get(self, request, *args, **kwargs):
+        context = self.get_serializer_context()
+        context['progress'] = self.get_progress()
+        projects = self.get_serializer_class()(self.get_queryset(), many=True, context=context)
+        return Response({
+            'user': UserSerializer(request.user, context=context).data,
+            'projects': projects.data,
+        })
 
 class ProjectDelete(generics.DestroyAPIView):
     serializer_class = ProjectSerializer
@@ -50,18 +205,144 @@ class ProjectDetailView(generics.RetrieveUpdateAPIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        return Project.objects.filter(owner=self.request.user).prefetch_related('pages__sections__tasks')
+        return Project.objects.filter(owner=self.request.user).prefetch_related(
+            Prefetch('pages', queryset=Page.objects.order_by('order', 'id')),
+            Prefetch('pages__sections', queryset=ChecklistSection.objects.order_by('order', 'id')),
+            Prefetch('pages__sections__tasks', queryset=Task.objects.order_by('order', 'id')),
+        )
 
-    def get_object(self):
-        project = super().get_object()
-        if self.request.method == "GET" and not self.request.query_params.get('dashboard'):
-            project.updated_at = timezone.now()
-            project.save(update_fields=['updated_at'])
-        return project
+    def perform_update(self, serializer):
+        image = uploaded_image(self.request)
+        with transaction.atomic():
+            project = serializer.save()
+            if image:
+                stage_image(project, image)
+
+    def retrieve(self, request, *args, **kwargs):
+        # answer from the project's version before reading any pages, sections or tasks
+        project = get_object_or_404(Project.objects.filter(owner=request.user), pk=kwargs['pk'])
+
+        if not request.query_params.get('dashboard'):
+            last_opened.touch(project.pk)
+
+        etag = quote_etag(f"{project.pk}-{project.version}")
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        data, hit = project_tree(project)
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        response['ETag'] = etag
+        return response
+
+# pages, sections and tasks changed since the version the client last saw, or a full snapshot when
+# the changes can't be listed
+class ProjectSyncView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Project.objects.filter(owner=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            raise ValidationError({'since': ["A valid integer is required."]})
+
+        project = self.get_object()
+        last_opened.touch(project.pk)
+
+        changes = project_changes(project, since)
+        if changes is None:
+            data, _ = project_tree(project)
+            return Response({'version': project.version, 'snapshot': True, 'project': data})
+        return Response({'version': project.version, 'snapshot': False, 'project': project_fields(project), **changes})
+
+# burn-down, completion velocity and per-stage throughput, read from the daily rollups (see checklists.stats)
+class StatisticsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 365
+
+    def get_days(self):
+        try:
+            days = int(self.request.query_params.get('days', 30))
+        except ValueError:
+            raise ValidationError({'days': ["A valid integer is required."]})
+        if not 1 <= days <= self.MAX_DAYS:
+            raise ValidationError({'days': [f"Must be between 1 and {self.MAX_DAYS}."]})
+        return days
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        return Response(stats.summarize(
+            DailyUserStats.objects.filter(user=user), DailyProjectStats.objects.filter(project__owner=user), self.get_days(),
+        ))
+
+class ProjectStatisticsView(StatisticsView):
+    def get_queryset(self):
+        return Project.objects.filter(owner=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        project = self.get_object()
+        rows = DailyProjectStats.objects.filter(project=project)
+        return Response({'project': project.pk, **stats.summarize(rows, rows, self.get_days())})
+
+# creates projects from an uploaded export or Figma file in one transaction (see checklists.imports)
+class ImportView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ["No file was submitted."]})
+        try:
+            projects, written = imports.import_file(upload, request.user.pk)
+        except imports.ImportFailed as failed:
+            return Response({'errors': failed.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'projects': [project.pk for project in projects], 'created': written}, status=status.HTTP_201_CREATED)
+
+# ranked full-text search over the user's projects, pages and tasks (see checklists.search)
+class SearchView(generics.GenericAPIView):
+    serializer_class = SearchResultSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get(self, request, *args, **kwargs):
+        text = request.query_params.get('q', '')
+        if not search.terms(text):
+            raise ValidationError({'q': ["Enter a word to search for."]})
+        results = self.paginator.paginate_search(
+            lambda limit, offset: search.find(request.user.pk, text, limit, offset), request,
+        )
+        return self.get_paginated_response(self.get_serializer(results, many=True).data)
+
+# a backup of everything the user owns as NDJSON, sent while it is read (see checklists.export); gzipped
+# on the fly for clients that accept it
+class ExportView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        chunks = export.ndjson(export.export_rows(request.user.pk))
+        compressed = re.search(r'\bgzip\b', request.headers.get('Accept-Encoding', '')) is not None
+        if compressed:
+            chunks = compress_sequence(chunks)
+        if isinstance(request._request, ASGIRequest):
+            chunks = export.aiterate(chunks)
+
+        response = StreamingHttpResponse(chunks, content_type='application/x-ndjson')
+        if compressed:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['Content-Disposition'] = f'attachment; filename="devcheck-export-{timezone.localdate()}.ndjson"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 class PageListCreate(generics.ListCreateAPIView):
     serializer_class = PageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('order', 'id')
 
     def get_queryset(self):
         project_id = self.kwargs['project_id']
@@ -70,7 +351,10 @@ class PageListCreate(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         project_id = self.kwargs['project_id']
         project = Project.objects.get(id=project_id, owner=self.request.user)
-        serializer.save(project=project)
+        order = serializer.validated_data.get('order')
+        if order is None:
+            order = append_rank(Page.objects.filter(project=project))
+        serializer.save(project=project, order=order)
 
 class PageDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PageSerializer
@@ -82,10 +366,12 @@ class PageDetail(generics.RetrieveUpdateDestroyAPIView):
 class ChecklistSectionListCreate(generics.ListCreateAPIView):
     serializer_class = ChecklistSectionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('order', 'id')
 
     def get_queryset(self):
         page_id = self.kwargs['page_id']
-        return ChecklistSection.objects.filter(page__project__owner=self.request.user, page_id=page_id)
+        return ChecklistSection.objects.filter(owner=self.request.user, page_id=page_id)
 
     def perform_create(self, serializer):
         page_id = self.kwargs['page_id']
@@ -97,27 +383,359 @@ class ChecklistSectionDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return ChecklistSection.objects.filter(page__project__owner=self.request.user)
+        return ChecklistSection.objects.filter(owner=self.request.user)
 
 class TaskListCreate(generics.ListCreateAPIView):
     serializer_class = ChecklistTaskSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('order', 'id')
 
     def get_queryset(self):
         section_id = self.kwargs['section_id']
-        return Task.objects.filter(section__page__project__owner=self.request.user, section_id=section_id)
+        return Task.objects.filter(owner=self.request.user, section_id=section_id)
 
     def perform_create(self, serializer):
         section_id = self.kwargs['section_id']
-        section = ChecklistSection.objects.get(id=section_id, page__project__owner=self.request.user)
-        serializer.save(section=section)
+        section = ChecklistSection.objects.get(id=section_id, owner=self.request.user)
+        order = serializer.validated_data.get('order')
+        if order is None:
+            order = append_rank(Task.objects.filter(section=section))
+        serializer.save(section=section, order=order)
 
 class TaskDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ChecklistTaskSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Task.objects.filter(section__page__project__owner=self.request.user)
+        return Task.objects.filter(owner=self.request.user)
+
+# moves a page or task directly before / after a sibling; normally only the moved row is written (see checklists.ranks)
+class MoveView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    parent_field = None
+    result_serializer_class = None
+
+    def get_anchor(self, instance, pk):
+        return self.get_queryset().exclude(pk=instance.pk).filter(pk=pk).first()
+
+    def set_parent(self, instance, data):
+        pass
+
+    def post(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        anchors = {}
+        for name in ('before', 'after'):
+            if name in serializer.validated_data:
+                anchors[name] = self.get_anchor(instance, serializer.validated_data[name])
+                if anchors[name] is None:
+                    raise ValidationError({name: ["Not found."]})
+        if not anchors:
+            self.set_parent(instance, serializer.validated_data)
+
+        move(instance, self.parent_field, **anchors)
+        return Response(self.result_serializer_class(instance).data)
+
+class PageMove(MoveView):
+    serializer_class = MoveSerializer
+    result_serializer_class = PageSerializer
+    parent_field = 'project'
+
+    def get_queryset(self):
+        return Page.objects.filter(project__owner=self.request.user)
+
+    def get_anchor(self, instance, pk):
+        # pages only move within their project
+        return self.get_queryset().exclude(pk=instance.pk).filter(pk=pk, project_id=instance.project_id).first()
+
+class TaskMove(MoveView):
+    serializer_class = TaskMoveSerializer
+    result_serializer_class = ChecklistTaskSerializer
+    parent_field = 'section'
+
+    def get_queryset(self):
+        return Task.objects.filter(owner=self.request.user)
+
+    def set_parent(self, instance, data):
+        if 'section' in data:
+            section = ChecklistSection.objects.filter(owner=self.request.user, pk=data['section']).first()
+            if section is None:
+                raise ValidationError({'section': ["Not found."]})
+            instance.section = section
+
+# applies an ordered list of page / section / task operations in one transaction
+class BatchView(generics.GenericAPIView):
+    serializer_class = BatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    # model name -> (model, serializer, parent field, parent model name)
+    MODELS = {
+        'page': (Page, PageSerializer, 'project', 'project'),
+        'section': (ChecklistSection, ChecklistSectionSerializer, 'page', 'page'),
+        'task': (Task, ChecklistTaskSerializer, 'section', 'section'),
+    }
+
+    def get_owned(self, operations):
+        # every object a batch touches is checked with one id__in query per model
+        wanted = {'project': set(), 'page': set(), 'section': set(), 'task': set()}
+        for operation in operations:
+            if operation['op'] == 'create':
+                wanted[self.MODELS[operation['model']][3]].add(operation['parent'])
+            else:
+                wanted[operation['model']].add(operation['id'])
+
+        user = self.request.user
+        querysets = {
+            'project': Project.objects.filter(owner=user),
+            'page': Page.objects.filter(project__owner=user),
+            'section': ChecklistSection.objects.filter(owner=user),
+            'task': Task.objects.filter(owner=user),
+        }
+        return {
+            name: querysets[name].in_bulk(ids) if ids else {}
+            for name, ids in wanted.items()
+        }
+
+    def post(self, request, *args, **kwargs):
+        batch = self.get_serializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        operations = batch.validated_data['operations']
+
+        owned = self.get_owned(operations)
+        deleted = {name: set() for name in self.MODELS}
+        created = {name: [] for name in self.MODELS}
+        appended = {'page': [], 'task': []}
+        updated = {name: {} for name in self.MODELS}
+        applied, errors = [], []
+
+        for index, operation in enumerate(operations):
+            name, op = operation['model'], operation['op']
+            model, serializer_class, parent_field, parent_name = self.MODELS[name]
+
+            if op == 'create':
+                parent = owned[parent_name].get(operation['parent'])
+                if parent is None or operation['parent'] in deleted.get(parent_name, ()):
+                    errors.append({'index': index, 'errors': {'parent': ["Not found."]}})
+                    continue
+                serializer = serializer_class(data=operation['data'])
+                if not serializer.is_valid():
+                    errors.append({'index': index, 'errors': serializer.errors})
+                    continue
+                instance = model(**serializer.validated_data, **{parent_field: parent})
+                if name != 'page':
+                    instance.project_id, instance.owner_id = parent.project_id, request.user.pk
+                created[name].append(instance)
+                if name != 'section' and 'order' not in serializer.validated_data:
+                    appended[name].append(instance)
+                applied.append((index, op, name, instance))
+                continue
+
+            instance = owned[name].get(operation['id'])
+            if instance is None or instance.pk in deleted[name]:
+                errors.append({'index': index, 'errors': {'id': ["Not found."]}})
+                continue
+
+            if op == 'delete':
+                deleted[name].add(instance.pk)
+                updated[name].pop(instance.pk, None)
+                applied.append((index, op, name, instance))
+                continue
+
+            serializer = serializer_class(instance, data=operation['data'], partial=True)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(instance, field, value)
+            updated[name].setdefault(instance.pk, (instance, set()))[1].update(serializer.validated_data)
+            applied.append((index, op, name, instance))
+
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic(), coalesced_version_bumps():
+                # bulk writes don't send signals, so bump the versions and stamp the rows here
+                written = [
+                    instance
+                    for name in self.MODELS
+                    for instance in created[name] + [instance for instance, _ in updated[name].values()]
+                ]
+                versions = record_changes([instance.project_id for instance in written])
+                for instance in written:
+                    instance.change_seq = versions[instance.project_id]
+                for name, instances in appended.items():
+                    model, _, parent_field, _ = self.MODELS[name]
+                    assign_append_ranks(instances, parent_field, model.objects.all())
+                tasks = created['task'] + [instance for instance, _ in updated['task'].values()]
+                for task in tasks:
+                    task.stamp_completion()
+                for section, _ in updated['section'].values():
+                    if section.has_changed('title'):
+                        stats.move_tasks(Task.objects.filter(section=section), stage=section.title)
+                # parents before children so new pages / sections exist before anything below them
+                for name in self.MODELS:
+                    model = self.MODELS[name][0]
+                    if created[name]:
+                        model.objects.bulk_create(created[name])
+                    if updated[name]:
+                        fields = set().union(*(fields for _, fields in updated[name].values()))
+                        if 'completed' in fields:
+                            fields.add('completed_at')
+                        model.objects.bulk_update([instance for instance, _ in updated[name].values()], fields | {'change_seq'})
+                stats.record_tasks(tasks)
+                counters.record_tasks(tasks)
+                search.index(created['page'] + [instance for instance, _ in updated['page'].values()] + tasks)
+                for name in self.MODELS:
+                    publish_changes(created[name], 'created')
+                    publish_changes([instance for instance, _ in updated[name].values()], 'updated')
+                for name in reversed(self.MODELS):
+                    if deleted[name]:
+                        self.MODELS[name][0].objects.filter(pk__in=deleted[name]).delete()
+                # a later delete in the batch may have removed created or updated rows along with their parent
+                remaining = {}
+                if any(deleted.values()):
+                    for name, (model, *_) in self.MODELS.items():
+                        written_ids = [instance.pk for _, op, op_model, instance in applied if op_model == name and op != 'delete']
+                        remaining[name] = set(model.objects.filter(pk__in=written_ids).values_list('pk', flat=True))
+        except IntegrityError:
+            return Response({'errors': [{'index': None, 'errors': ["The batch conflicts with existing data."]}]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = []
+        for index, op, name, instance in applied:
+            result = {'index': index, 'op': op, 'model': name, 'id': instance.pk}
+            if op != 'delete':
+                if name not in remaining or instance.pk in remaining[name]:
+                    result['data'] = self.MODELS[name][1](instance).data
+                else:
+                    # gone by the end of the batch; a created row's id was never visible to anyone
+                    result.update(id=None if op == 'create' else instance.pk, deleted=True)
+            results.append(result)
+        return Response({'results': results})
+
+# live page / section / task changes for one project as server-sent events. Served by the ASGI application
+# only; EventSource can't send headers, so clients first get a short-lived ticket for the stream (below)
+# and pass it as ?ticket=, which keeps the access token out of the URL and so out of access logs
+async def project_events(request, pk):
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': "Live updates are only served by the ASGI application."}, status=501)
+
+    try:
+        user_id, expires_at = read_ticket(request.GET.get('ticket', ''), pk)
+    except BadSignature:
+        return JsonResponse({'detail': "Given ticket is invalid or expired."}, status=401)
+    if not await Project.objects.filter(pk=pk, owner_id=user_id, owner__is_active=True).aexists():
+        return JsonResponse({'detail': "No Project matches the given query."}, status=404)
+
+    response = StreamingHttpResponse(event_stream(pk, expires_at), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+class ProjectEventsTicketView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Project.objects.filter(owner=self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        project = self.get_object()
+        ticket = issue_ticket(request.user.pk, project.pk, request.auth['exp'])
+        return Response({'ticket': ticket, 'expires_in': checklists_setting('EVENT_TICKET_SECONDS')})
+
+# ASYNC READS
+# Under ASGI, GET requests to the project list, project detail and user detail are answered by the
+# coroutines below with the async ORM instead of tying up a thread each. Other methods, and paginated
+# lists, still go to the DRF views.
+
+def auth_failed(detail, authentication):
+    response = JsonResponse(detail if isinstance(detail, dict) else {'detail': detail}, status=401)
+    response['WWW-Authenticate'] = authentication.authenticate_header(None)
+    return response
+
+def async_authenticated(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authentication = CachedJWTAuthentication()
+        try:
+            result = await authentication.aauthenticate(request)
+        except (InvalidToken, AuthenticationFailed) as error:
+            return auth_failed(error.detail, authentication)
+        if result is None:
+            return auth_failed(NotAuthenticated.default_detail, authentication)
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+def async_get(async_view, sync_view):
+    # GET goes to async_view, unless it returns None; everything else to the DRF view in a thread
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            response = await async_view(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await sync_view(request, *args, **kwargs)
+    return csrf_exempt(view)
+
+@async_authenticated
+async def project_list_get(request):
+    if 'limit' in request.GET or 'cursor' in request.GET:
+        return None
+
+    projects = Project.objects.filter(owner=request.user)
+    versions = [row async for row in projects.order_by('pk').values_list('pk', 'version', 'updated_at')]
+    etag = project_list_etag(request, versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    projects = [project async for project in projects.aiterator()]
+    with serializing():
+        response = JsonResponse(ProjectSerializer(projects, many=True).data, safe=False)
+    response['ETag'] = etag
+    return response
+
+@async_authenticated
+async def project_detail_get(request, pk):
+    try:
+        project = await Project.objects.aget(owner=request.user, pk=pk)
+    except Project.DoesNotExist:
+        return JsonResponse({'detail': "No Project matches the given query."}, status=404)
+
+    if not request.GET.get('dashboard'):
+        last_opened.touch(project.pk)
+
+    etag = quote_etag(f"{project.pk}-{project.version}")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    data, hit = await aproject_tree(project)
+    with serializing():
+        response = JsonResponse(data)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    response['ETag'] = etag
+    return response
+
+@async_authenticated
+async def user_detail_get(request):
+    with serializing():
+        return JsonResponse(UserSerializer(request.user).data)
+
+project_list = async_get(project_list_get, ProjectListCreate.as_view())
+project_detail = async_get(project_detail_get, ProjectDetailView.as_view())
+user_detail = async_get(user_detail_get, UserDetailView.as_view())
+
+# hit / miss counts of this process's project tree cache
+class TreeCacheStatsView(generics.GenericAPIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(tree_cache.stats())
 
 class CreateIssueView(generics.CreateAPIView):
     queryset = Issue.objects.all()
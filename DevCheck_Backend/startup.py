@@ -1,22 +0,0 @@
-import os
-import django
-
-# Only run if environment variable is set
-if os.environ.get("CREATE_SUPERUSER") == "True":
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "DevCheck_Backend.settings")
-    django.setup()
-    
-    from django.contrib.auth import get_user_model
-
-    User = get_user_model()
-
-    # Read credentials from environment variables
-    username = os.environ.get("SUPERUSER_USERNAME", "admin")
-    email = os.environ.get("SUPERUSER_EMAIL", "admin@example.com")
-    password = os.environ.get("SUPERUSER_PASSWORD", "StrongPassword123")
-
-    if not User.objects.filter(username=username).exists():
-        User.objects.create_superuser(username=username, email=email, password=password)
-        print(f"Superuser '{username}' created successfully!")
-    else:
-        print(f"Superuser '{username}' already exists.")
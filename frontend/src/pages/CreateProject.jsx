@@ -77,32 +77,15 @@ export default function CreateProject() {
       if (formData.thumbnail)
         formDataToSend.append("image", formData.thumbnail);
 
-      const res = await api.post("checklists/projects/", formDataToSend);
+      // pages (and their MVP / DEV / DEPLOY sections) are created with the project in one request
+      formDataToSend.append(
+        "pages",
+        JSON.stringify(pages.map((page) => ({ name: page.name }))),
+      );
 
-      const projectId = res.data.id;
-
-      if ((res.status === 200 || res.status === 201) && pages.length > 0) {
-        // add pages
-        for (const page of pages) {
-          const pageRes = await api.post(
-            `checklists/projects/${projectId}/pages/`,
-            {
-              name: page.name,
-            }
-          );
-
-          const newPageId = pageRes.data.id;
+      const res = await api.post("checklists/projects/tree/", formDataToSend);
 
-          // Create the three sections for this page
-          const sectionTitles = ["MVP", "DEV", "DEPLOY"];
-          const sectionPromises = sectionTitles.map((title) =>
-            api.post(`checklists/projects/${newPageId}/sections/`, {
-              title: title,
-            })
-          );
-          await Promise.all(sectionPromises);
-        }
-      }
+      const projectId = res.data.id;
 
       console.log("Project, pages, and sections all created successfully.");
       navigate(`/projects/${projectId}`, {
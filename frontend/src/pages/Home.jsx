@@ -4,28 +4,34 @@ import { Link } from "react-router-dom";
 import api from "../api";
 import { FaRegTrashCan } from "react-icons/fa6";
 
+// card-sized WebP with a JPEG / PNG fallback when the server has generated them
+function ProjectImage({ project }) {
+  const card = project.image_urls?.card;
+
+  if (!card) {
+    return <img src={project.image} alt={project.name} />;
+  }
+
+  return (
+    <picture>
+      <source srcSet={card.webp} type="image/webp" />
+      <img src={card.fallback} alt={project.name} />
+    </picture>
+  );
+}
+
 function Home() {
   const [projects, setProjects] = useState([]);
   const [user, setUser] = useState(null);
   const [showAllProjects, setShowAllProjects] = useState(false);
-  const [projectTasks, setProjectTasks] = useState({}); // New state to store tasks by project ID
+  const [projectTasks, setProjectTasks] = useState({}); // task progress by project ID
   const [showDeleteProjectModal, setShowDeleteProjectModal] = useState(false);
   const [projectToDelete, setProjectToDelete] = useState(null);
 
   useEffect(() => {
-    getProjects();
-  }, []);
-
-  useEffect(() => {
-    fetchUser();
+    getDashboard();
   }, []);
 
-  useEffect(() => {
-    if (projects.length > 0) {
-      fetchAllProjectDetails();
-    }
-  }, [projects]);
-
   const location = useLocation();
 
   useEffect(() => {
@@ -43,91 +49,28 @@ function Home() {
     });
   }, [location.hash]);
 
-  const fetchUser = async () => {
-    try {
-      const res = await api.get("/checklists/user/");
-      if (res.status === 200 || res.status === 201) {
-        setUser(res.data);
-      }
-    } catch (err) {
-      console.error("Failed to fetch user", err);
-    }
-  };
-
-  const getProjects = () => {
-    api
-      .get("/checklists/projects/")
-      .then((res) => res.data)
-      .then((data) => {
-        setProjects(data);
-        console.log(data);
-      })
-      .catch((err) => alert(err));
-  };
-
-  const getProjectDetail = async (projectId) => {
+  // user, projects and task progress all come back from a single request
+  const getDashboard = async () => {
     try {
-      const res = await api.get(
-        `/checklists/projects/${projectId}/detail/?dashboard=true`,
-      );
-
-      if (res.status === 200 || res.status === 201) {
-        console.log(`Project detail for ${projectId}:`, res.data);
-        return res.data;
+      const res = await api.get("/checklists/projects/dashboard/");
+      if (res.status === 200) {
+        const tasksMap = {};
+        res.data.projects.forEach((project) => {
+          tasksMap[project.id] = {
+            completed: project.completed_tasks,
+            total: project.total_tasks,
+          };
+        });
+
+        setUser(res.data.user);
+        setProjects(res.data.projects);
+        setProjectTasks(tasksMap);
       }
-      return null;
     } catch (err) {
-      console.error(`Error fetching project detail for ${projectId}:`, err);
-      return null;
+      alert(err);
     }
   };
 
-  // New function to fetch details for all projects and count tasks
-  const fetchAllProjectDetails = async () => {
-    const tasksMap = {};
-
-    for (const project of projects) {
-      const detail = await getProjectDetail(project.id);
-
-      if (detail) {
-        // Count all tasks across all pages and sections
-        let taskCount = 0;
-        let completedCount = 0;
-
-        if (detail.pages) {
-          detail.pages.forEach((page) => {
-            if (page.sections) {
-              page.sections.forEach((section) => {
-                if (section.tasks) {
-                  taskCount += section.tasks.length;
-
-                  const completedTasks = section.tasks.filter(
-                    (task) => task.completed === true,
-                  );
-                  completedCount += completedTasks.length;
-                }
-              });
-            }
-          });
-        }
-
-        console.log(
-          `Project "${project.name}" (ID: ${project.id}): ${taskCount} total tasks, ${completedCount} completed`,
-        );
-        tasksMap[project.id] = {
-          completed: completedCount,
-          total: taskCount,
-          detail,
-        };
-      } else {
-        tasksMap[project.id] = { completed: 0, count: 0, detail: null };
-      }
-    }
-
-    console.log("Final tasksMap:", tasksMap);
-    setProjectTasks(tasksMap);
-  };
-
   const getTopThreeRecentlyEdited = (projects) => {
     if (!projects) return [];
 
@@ -173,7 +116,7 @@ function Home() {
       if (res.status === 200 || res.status === 204) {
         setShowDeleteProjectModal(false);
         setProjectToDelete(null);
-        await getProjects();
+        await getDashboard();
       }
     } catch (err) {
       console.error("Failed to delete project:", err);
@@ -304,7 +247,7 @@ function Home() {
                   className="block bg-white border-muted shadow-lg rounded-xl hover:scale-[1.02] hover:shadow-xl transition-transform duration-200"
                 >
                   <div className="h-48 overflow-hidden rounded-xl mx-auto mb-5 bg-dark">
-                    <img src={project.image} alt={project.name} />
+                    <ProjectImage project={project} />
                   </div>
                   <div className="mx-2 text-center text-xl">
                     <h5 className="text-dark font-bold mb-2">{project.name}</h5>
@@ -350,7 +293,7 @@ function Home() {
                   className="block bg-white border-muted shadow-lg rounded-xl hover:scale-[1.02] hover:shadow-xl transition-transform duration-200"
                 >
                   <div className="h-48 bg-dark overflow-hidden rounded-xl mx-auto mb-5">
-                    <img src={project.image} alt={project.name} />
+                    <ProjectImage project={project} />
                   </div>
                   <div className="mx-2 text-center text-xl">
                     <h5 className="text-dark font-bold mb-2 align-self-center">
@@ -1,12 +1,15 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { FaRegTrashCan } from "react-icons/fa6";
 import api from "../api";
-import { useParams } from "react-router-dom";
+import { ACCESS_TOKEN } from "../constants";
+import { useParams, useNavigate } from "react-router-dom";
 import { useLocation } from "react-router-dom";
 
 export default function ProjectDetail() {
   const { projectId } = useParams();
   const location = useLocation();
+  const navigate = useNavigate();
+  const live = useRef(false); // true while the project's event stream is connected
   const [project, setProject] = useState(null);
   const [pages, setPages] = useState(null);
   const [addingTask, setAddingTask] = useState({}); // Track which section is adding a task
@@ -21,16 +24,78 @@ export default function ProjectDetail() {
   const [successMessage, setSuccessMessage] = useState("");
   const projectCreated = location.state?.message;
 
-  // returns full project tree w/ associated pages, sections, tasks, etc.
+  const byOrder = (a, b) => (a.order ?? 0) - (b.order ?? 0) || a.id - b.id;
+
+  // merges the rows returned by the sync endpoint into a previously synced tree
+  const applyChanges = (tree, changes) => {
+    const pages = new Map();
+    const sections = new Map();
+    const tasks = new Map();
+    tree.pages.forEach((page) => {
+      pages.set(page.id, page);
+      page.sections.forEach((section) => {
+        sections.set(section.id, { ...section, page: page.id });
+        section.tasks.forEach((task) =>
+          tasks.set(task.id, { ...task, section: section.id }),
+        );
+      });
+    });
+
+    changes.pages.forEach((page) => pages.set(page.id, page));
+    changes.sections.forEach((section) => sections.set(section.id, section));
+    changes.tasks.forEach((task) => tasks.set(task.id, task));
+    changes.deleted.pages.forEach((id) => pages.delete(id));
+    changes.deleted.sections.forEach((id) => sections.delete(id));
+    changes.deleted.tasks.forEach((id) => tasks.delete(id));
+
+    // children of deleted pages and sections are dropped with them
+    const tasksBySection = new Map();
+    tasks.forEach(({ section, ...task }) => {
+      if (!tasksBySection.has(section)) tasksBySection.set(section, []);
+      tasksBySection.get(section).push(task);
+    });
+    const sectionsByPage = new Map();
+    sections.forEach(({ page, ...section }) => {
+      if (!sectionsByPage.has(page)) sectionsByPage.set(page, []);
+      sectionsByPage.get(page).push({
+        ...section,
+        tasks: (tasksBySection.get(section.id) || []).sort(byOrder),
+      });
+    });
+
+    return {
+      ...tree,
+      pages: [...pages.values()]
+        .map((page) => ({
+          ...page,
+          sections: (sectionsByPage.get(page.id) || []).sort(byOrder),
+        }))
+        .sort(byOrder),
+    };
+  };
+
+  // returns full project tree w/ associated pages, sections, tasks, etc. A copy of the last synced tree is
+  // kept locally, so after the first visit only the changes since then are downloaded
   const getProject = async () => {
+    const storageKey = `project-tree-${projectId}`;
+    const synced = JSON.parse(localStorage.getItem(storageKey) || "null");
     try {
       console.log("Fetching project with ID:", projectId);
-      const res = await api.get(`/checklists/projects/${projectId}/detail/`);
+      const res = await api.get(`/checklists/projects/${projectId}/sync/`, {
+        params: { since: synced ? synced.version : 0 },
+      });
       console.log("Project fetched successfully");
-      setProject(res.data);
-      setPages(res.data.pages);
-      setProjectStatus(res.data.project_status);
-      console.log(res.data);
+      const tree = res.data.snapshot
+        ? res.data.project
+        : { ...applyChanges(synced.tree, res.data), ...res.data.project };
+      localStorage.setItem(
+        storageKey,
+        JSON.stringify({ version: res.data.version, tree }),
+      );
+      setProject(tree);
+      setPages(tree.pages);
+      setProjectStatus(tree.project_status);
+      console.log(tree);
     } catch (err) {
       console.error("Failed to fetch project:", err);
       console.error("Error status:", err.response?.status);
@@ -43,6 +108,69 @@ export default function ProjectDetail() {
     }
   };
 
+  // only needed when live updates aren't connected; otherwise the event stream delivers our own changes too
+  const refreshIfOffline = () => {
+    if (!live.current) {
+      getProject();
+    }
+  };
+
+  const placeByOrder = (items, item) =>
+    [...items.filter((i) => i.id !== item.id), item].sort(byOrder);
+
+  // applies one change event from the project's event stream to the local tree
+  const applyEvent = ({ model, action, data }) => {
+    if (model === "project") {
+      if (action === "resync") {
+        getProject();
+      } else if (action === "deleted") {
+        navigate("/dashboard");
+      } else {
+        setProject((prev) => ({ ...prev, ...data }));
+        setProjectStatus(data.project_status);
+      }
+      return;
+    }
+
+    setPages((prevPages) => {
+      if (!prevPages) return prevPages;
+
+      if (model === "page") {
+        if (action === "deleted") {
+          return prevPages.filter((page) => page.id !== data.id);
+        }
+        const existing = prevPages.find((page) => page.id === data.id);
+        return placeByOrder(prevPages, {
+          sections: [],
+          ...existing,
+          ...data,
+        });
+      }
+
+      if (model === "section") {
+        return prevPages.map((page) => {
+          const existing = page.sections.find((s) => s.id === data.id);
+          let sections = page.sections.filter((s) => s.id !== data.id);
+          if (action !== "deleted" && page.id === data.page) {
+            sections = placeByOrder(sections, { tasks: [], ...existing, ...data });
+          }
+          return { ...page, sections };
+        });
+      }
+
+      return prevPages.map((page) => ({
+        ...page,
+        sections: page.sections.map((section) => {
+          let tasks = section.tasks.filter((task) => task.id !== data.id);
+          if (action !== "deleted" && section.id === data.section) {
+            tasks = placeByOrder(tasks, data);
+          }
+          return { ...section, tasks };
+        }),
+      }));
+    });
+  };
+
   const statusColors = {
     MVP: "bg-green",
     "In Development": "bg-beige",
@@ -110,10 +238,7 @@ export default function ProjectDetail() {
           return updated;
         });
 
-        // Refresh data after a small delay to allow state to update
-        setTimeout(async () => {
-          await getProject();
-        }, 50);
+        refreshIfOffline();
       }
     } catch (err) {
       console.error("Failed to add task:", err);
@@ -138,7 +263,7 @@ export default function ProjectDetail() {
       console.log("Task deleted successfully: ", res.status);
 
       if (res.status === 200 || res.status === 201) {
-        getProject();
+        refreshIfOffline();
       }
     } catch (err) {
       console.error("Failed to delete task:", err);
@@ -173,8 +298,7 @@ export default function ProjectDetail() {
         await Promise.all(sectionPromises);
         console.log("All sections created successfully");
 
-        // Refresh the project data
-        await getProject();
+        refreshIfOffline();
 
         // Reset the new page state
         setCreatingNewPage(false);
@@ -197,7 +321,7 @@ export default function ProjectDetail() {
         setSuccessMessage("Page deleted successfully."); // currently not working
         setShowDeleteModal(false);
         setPageToDelete(null);
-        await getProject();
+        refreshIfOffline();
       }
     } catch (err) {
       console.error("Failed to delete page:", err);
@@ -265,7 +389,7 @@ export default function ProjectDetail() {
         setSuccessMessage(
           `Project status updated to "${newStatus}" successfully.`,
         );
-        await getProject();
+        refreshIfOffline();
       }
     } catch (err) {
       console.error("Failed to update status:", err);
@@ -277,6 +401,41 @@ export default function ProjectDetail() {
     getProject();
   }, [projectId]);
 
+  // live updates from other tabs and devices; reconnects with the current access token when the stream drops
+  useEffect(() => {
+    let source = null;
+    let retry = null;
+    let reconnecting = false;
+
+    const connect = () => {
+      const token = localStorage.getItem(ACCESS_TOKEN);
+      source = new EventSource(
+        `${import.meta.env.VITE_API_URL}/checklists/projects/${projectId}/events/?token=${token}`,
+      );
+      source.onopen = () => {
+        live.current = true;
+        // anything missed while disconnected is picked up by one refetch
+        if (reconnecting) {
+          getProject();
+        }
+      };
+      source.onmessage = (message) => applyEvent(JSON.parse(message.data));
+      source.onerror = () => {
+        live.current = false;
+        reconnecting = true;
+        source.close();
+        retry = setTimeout(connect, 5000);
+      };
+    };
+
+    connect();
+    return () => {
+      live.current = false;
+      clearTimeout(retry);
+      source?.close();
+    };
+  }, [projectId]);
+
   // Debug: Log the structure to console
   useEffect(() => {
     if (pages) {